@@ -0,0 +1,4 @@
+import sys
+import scripts.cli
+
+sys.exit(scripts.cli.main())
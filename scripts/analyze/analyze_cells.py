@@ -1,6 +1,8 @@
 from scripts.parse.parse import load as ABM_load
 import scripts.analyze.analyze_utilities
-import pickle
+import scripts.cache.cache
+import scripts.profile.profile_stages
+import scripts.storage.storage
 import pandas as pd
 
 def make_cells_df():
@@ -480,6 +482,7 @@ def collect_cell_information(agents, time, H, loc, counts, types, volumes, cycle
 
     return counts, types, volumes, cycles
 
+@scripts.profile.profile_stages.profile_stage(items='T')
 def analyze_cell_simulation(cellsDF, agents, T, C, TUMORID, SEED, sharedLocs):
     """Collect cell dynamics information for given simulation for all time points and locations."""
 
@@ -542,7 +545,7 @@ def analyze_cell_simulations(file, TUMORID, file_extension, sharedLocs):
 
     return cellsDF
 
-def analyze_cells(files, saveLoc, sharedLocs=False):
+def analyze_cells(files, saveLoc, sharedLocs=False, cache='', cachesize=None):
     """Iterate through all files to collect cell dynamcis information.
 
     analyze_cells takes a directory of (or a single) .pkl simulation files
@@ -550,12 +553,12 @@ def analyze_cells(files, saveLoc, sharedLocs=False):
 
         TUMOR ID | SEED | PLATE | DAMAGE | DOSE | TREAT RATIO | CAR AFFINITY | ANTIGENS CANCER | ANTIGENS HEALTHY | DATA
 
-    and saves it to a .pkl where the DATA are the list of cell count and state information as shown in the
+    and saves it to a .tbl table (see storage) where the DATA are the list of cell count and state information as shown in the
     make_cells_dict and make_cells_df functions. For these counts, each is in the format of a list of the value
     of the specified information at each point in time.
 
     Usage:
-        analyze_cells(files, saveLoc, sharedLocs=False)
+        analyze_cells(files, saveLoc, sharedLocs=False, cache='', cachesize=None)
 
         files
             Path to .pkl files or directory.
@@ -563,6 +566,11 @@ def analyze_cells(files, saveLoc, sharedLocs=False):
             Location of where to save file.
         sharedLocs
             Collect CAR T-cell information for only CAR T-cells that share a location with at least one cancer cell (default: False).
+        [cache]
+            Directory of results cache shared across stages, reused when the same file was analyzed with the
+            same options before, empty to not cache (default: '').
+        [cachesize]
+            Maximum size of cache in bytes before least recently used entries are removed (default: 2 GB).
     """
 
     PKLFILES = scripts.analyze.analyze_utilities.get_pkl_files(files)
@@ -579,10 +587,10 @@ def analyze_cells(files, saveLoc, sharedLocs=False):
         else:
             file_extension = '_ANALYZED'
 
-        cellsDF = analyze_cell_simulations(file, TUMORID, file_extension, sharedLocs)
+        cellsDF = scripts.cache.cache.cached_call(cache, analyze_cell_simulations, [file],
+                                                  [TUMORID, file_extension, sharedLocs], cachesize)
 
         if saveLoc != '':
-            with open(saveLoc + TUMORID + file_extension + '.pkl', 'wb') as f:
-                pickle.dump(cellsDF, f)
+            scripts.storage.storage.save_table(cellsDF, saveLoc + TUMORID + file_extension + '.tbl', file_extension[1:])
 
     return
\ No newline at end of file
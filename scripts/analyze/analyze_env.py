@@ -3,6 +3,9 @@ from scripts.parse.parse import load as ABM_load
 from scripts.analyze.analyze_utilities import collect_sumulation_info
 from scripts.analyze.analyze_utilities import get_pkl_files
 from scripts.analyze.analyze_utilities import get_tumor_id
+import scripts.cache.cache
+import scripts.profile.profile_stages
+import scripts.storage.storage
 import pickle
 import pandas as pd
 
@@ -144,6 +147,7 @@ def sum_concentrations_across_simulation(envDict, glucose, oxygen, tgfa, IL2, SE
 
     return envDict, glucTotal, oxyTotal, tgfaTotal, IL2Total, volTotal
 
+@scripts.profile.profile_stages.profile_stage(items='T')
 def analyze_env_simulation(envDF, environments, T, R, TUMORID, SEEDS):
     """Collect environment dynamics information for given set of simulations (all seeds)for all time points."""
 
@@ -194,14 +198,14 @@ def analyze_env_simulations(file, TUMORID):
 
     return envDF
 
-def analyze_env(files, saveLoc):
+def analyze_env(files, saveLoc, cache='', cachesize=None):
     """Iterate through all files to pass into functions that collect environment dynamics information.
 
     analyze_env takes a directory of (or a single) .pkl simulation files and extracts the data into a dataframe in the form:
 
         TUMOR ID | SEED | PLATE | DAMAGE | DOSE | TREAT RATIO | CAR AFFINITY | ANTIGENS CANCER | ANTIGENS HEALTHY | DATA
 
-    and saves it to a .pkl where the DATA are the following list of information (also shown in make_env_dict and make_env_df):
+    and saves it to a .tbl table (see storage) where the DATA are the following list of information (also shown in make_env_dict and make_env_df):
 
         TIME
         RADIUS
@@ -230,12 +234,17 @@ def analyze_env(files, saveLoc):
     TOTAL CONC columns are the total concentration amount of molecule across the entire simulation at each time point.
 
     Usage:
-        analyze_env(files, saveLoc)
+        analyze_env(files, saveLoc, cache='', cachesize=None)
 
         files
             Path to .pkl files or directory.
         saveLoc
             Location of where to save file.
+        [cache]
+            Directory of results cache shared across stages, reused when the same file was analyzed with the
+            same options before, empty to not cache (default: '').
+        [cachesize]
+            Maximum size of cache in bytes before least recently used entries are removed (default: 2 GB).
     """
 
     PKLFILES = get_pkl_files(files)
@@ -246,10 +255,9 @@ def analyze_env(files, saveLoc):
 
         print(TUMORID)
 
-        envDF = analyze_env_simulations(file, TUMORID)
+        envDF = scripts.cache.cache.cached_call(cache, analyze_env_simulations, [file], [TUMORID], cachesize)
 
         if saveLoc != '':
-            with open(saveLoc + TUMORID + '_ENVIRONMENT.pkl', 'wb') as f:
-                pickle.dump(envDF, f)
+            scripts.storage.storage.save_table(envDF, saveLoc + TUMORID + '_ENVIRONMENT.tbl', 'ENVIRONMENT')
 
     return
\ No newline at end of file
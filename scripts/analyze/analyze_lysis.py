@@ -1,7 +1,9 @@
 import scripts.analyze.analyze_utilities
 import scripts.parse.parse_utilities
+import scripts.cache.cache
+import scripts.profile.profile_stages
+import scripts.storage.storage
 from scripts.parse.parse import get_radius
-import pickle
 import pandas as pd
 
 def make_lysis_df():
@@ -212,6 +214,7 @@ def lysis_sim(lysisDF, LYSIS_JSON, TUMORID):
 
     return lysisDF
 
+@scripts.profile.profile_stages.profile_stage()
 def analyze_lysis_simulation(file, TUMORID):
     """Inititalize lysis dictionary and collect lysis file to being processing."""
 
@@ -225,14 +228,14 @@ def analyze_lysis_simulation(file, TUMORID):
 
     return lysisDF
 
-def analyze_lysis(files, saveLoc):
+def analyze_lysis(files, saveLoc, cache='', cachesize=None):
     """Iterate through all files to collect lysis dynamcis information.
 
     analyze_lysis takes a directory of (or a single) .LYSIS.json simulation files and extracts the data into a dataframe. The resulting file will contain a data frame in the form:
 
         TUMOR ID | SEED | PLATE | DAMAGE | DOSE | TREAT RATIO | CAR AFFINITY | ANTIGENS CANCER | ANTIGENS HEALTHY | DATA
 
-    and saves it to a .pkl where the DATA are the following list of information (also shown in make_lysis_dict and make_lysis_df):
+    and saves it to a .tbl table (see storage) where the DATA are the following list of information (also shown in make_lysis_dict and make_lysis_df):
 
             TIME
             RADIUS
@@ -255,12 +258,17 @@ def analyze_lysis(files, saveLoc):
     each in the format of a list of the value of the specified information at each point in time.
 
     Usage:
-        analyze_lysis(files, saveLoc)
+        analyze_lysis(files, saveLoc, cache='', cachesize=None)
 
         files
             Path to .LYSIS.json or directory.
         saveLoc
             Location of where to save file.
+        [cache]
+            Directory of results cache shared across stages, reused when the same file was analyzed with the
+            same options before, empty to not cache (default: '').
+        [cachesize]
+            Maximum size of cache in bytes before least recently used entries are removed (default: 2 GB).
     """
 
     # Get files
@@ -277,9 +285,9 @@ def analyze_lysis(files, saveLoc):
 
         print(TUMORID)
 
-        lysisDF = analyze_lysis_simulation(file, TUMORID)
+        lysisDF = scripts.cache.cache.cached_call(cache, analyze_lysis_simulation, [file], [TUMORID], cachesize)
 
         if saveLoc != '':
-            pickle.dump(lysisDF, open(saveLoc + TUMORID + '_LYSED.pkl', "wb"))
+            scripts.storage.storage.save_table(lysisDF, saveLoc + TUMORID + '_LYSED.tbl', 'LYSED')
 
     return
\ No newline at end of file
@@ -2,7 +2,9 @@ from scripts.parse.parse import get_hex_rings
 from scripts.parse.parse import get_radius
 from scripts.parse.parse import load as ABM_load
 import scripts.analyze.analyze_utilities
-import pickle
+import scripts.cache.cache
+import scripts.profile.profile_stages
+import scripts.storage.storage
 import pandas as pd
 
 def make_spatial_df():
@@ -160,6 +162,7 @@ def update_spatial_dict_with_counts(spatialDict, counts, countsNorm):
 
     return spatialDict
 
+@scripts.profile.profile_stages.profile_stage(items='T')
 def analyze_spatial_simulation(spatialsDF, agents, T, R, C, TUMORID, SEED):
     """Collect cell spatial dynamics information for given simulation for all time points and locations."""
 
@@ -218,7 +221,7 @@ def analyze_spatial_simulations(file, TUMORID):
 
     return spatialsDF
 
-def analyze_spatial(files, saveLoc):
+def analyze_spatial(files, saveLoc, cache='', cachesize=None):
     """Iterate through all files to collect cell dynamcis information.
 
     analyze_spatial takes a directory of (or a single) .pkl simulation files and
@@ -226,7 +229,7 @@ def analyze_spatial(files, saveLoc):
 
         TUMOR ID | SEED | PLATE | DAMAGE | DOSE | TREAT RATIO | CAR AFFINITY | ANTIGENS CANCER | ANTIGENS HEALTHY | DATA
 
-    and saves it to a .pkl where the DATA are the following list of information (also shown in make_spatial_dict and make_spatial_df):
+    and saves it to a .tbl table (see storage) where the DATA are the following list of information (also shown in make_spatial_dict and make_spatial_df):
 
         TIME
         SEED
@@ -251,7 +254,7 @@ def analyze_spatial(files, saveLoc):
     where each cell population is in the format of a list of a list of counts at each radius.
 
     Usage:
-        analyze_spatial(files, saveLoc)
+        analyze_spatial(files, saveLoc, cache='', cachesize=None)
 
         files
             Path to .pkl files or directory.
@@ -259,6 +262,11 @@ def analyze_spatial(files, saveLoc):
             Location of where to save file.
         sharedLocs
             Collect CAR T-cell information for only CAR T-cells that share a location with at least one cancer cell (default: False).
+        [cache]
+            Directory of results cache shared across stages, reused when the same file was analyzed with the
+            same options before, empty to not cache (default: '').
+        [cachesize]
+            Maximum size of cache in bytes before least recently used entries are removed (default: 2 GB).
     """
 
     PKLFILES = scripts.analyze.analyze_utilities.get_pkl_files(files)
@@ -274,10 +282,9 @@ def analyze_spatial(files, saveLoc):
 
         print(TUMORID)
 
-        spatialDF = analyze_spatial_simulations(file, TUMORID)
+        spatialDF = scripts.cache.cache.cached_call(cache, analyze_spatial_simulations, [file], [TUMORID], cachesize)
 
         if saveLoc != '':
-            with open(saveLoc + TUMORID + '_SPATIAL.pkl', 'wb') as f:
-                pickle.dump(spatialDF, f)
+            scripts.storage.storage.save_table(spatialDF, saveLoc + TUMORID + '_SPATIAL.tbl', 'SPATIAL')
 
     return
\ No newline at end of file
@@ -11,6 +11,18 @@ def get_pkl_files(arg):
         assert scripts.parse.parse_utilities.is_pkl(arg)
         return [arg]
 
+def get_table_files(arg):
+    """Get file if it is a stored table or pkl file, skipping pkl files already converted to tables."""
+
+    if arg[-1] == "/" or arg[-1] == "\\":
+        files = os.listdir(arg)
+        tables = [f for f in files if scripts.parse.parse_utilities.is_table(f)]
+        pkls = [f for f in files if scripts.parse.parse_utilities.is_pkl(f) and f[:-4] + ".tbl" not in tables]
+        return [arg + f for f in tables + pkls]
+    else:
+        assert scripts.parse.parse_utilities.is_table(arg) or scripts.parse.parse_utilities.is_pkl(arg)
+        return [arg]
+
 def get_json_files(arg):
     """Get file if it is a json file."""
 
@@ -0,0 +1,350 @@
+import scripts.benchmark.benchmark_synthetic
+import contextlib
+import datetime
+import importlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import time
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def define_benchmark_stages():
+    """Define pipeline stages in order with stages whose outputs they use as inputs."""
+
+    STAGES = {
+        'parse': [],
+        'analyze_cells': ['parse'],
+        'analyze_env': ['parse'],
+        'analyze_spatial': ['parse'],
+        'analyze_lysis': [],
+        'subset_data': ['analyze_cells', 'analyze_env', 'analyze_spatial', 'analyze_lysis'],
+        'stats': ['subset_data'],
+        'plot_data': ['subset_data'],
+        'image': []
+    }
+
+    return STAGES
+
+def define_benchmark_subset():
+    """Define subset of synthetic design with ANTIGENS CANCER as the only X feature."""
+
+    SUBSET = '[(DOSE:500),(TREAT RATIO:50-50),(CAR AFFINITY:1e-7),(ANTIGENS HEALTHY:100)]'
+
+    return SUBSET
+
+def define_benchmark_data_types():
+    """Define analyzed data folders and their subset data types."""
+
+    DATA_TYPES = [('cells/', 'ANALYZED'), ('environment/', 'ENVIRONMENT'), ('spatial/', 'SPATIAL'), ('lysed/', 'LYSED')]
+
+    return DATA_TYPES
+
+def check_stages_arg(stages):
+    """Check requested stages and add stages they depend on, in pipeline order."""
+
+    STAGES = define_benchmark_stages()
+
+    requested = [stage.strip() for stage in stages.split(',') if stage.strip() != '']
+
+    if len(requested) == 0:
+        requested = list(STAGES)
+    elif any([stage not in STAGES for stage in requested]):
+        print("stages must be from " + ', '.join(STAGES) + ", benchmarking all stages")
+        requested = list(STAGES)
+
+    required = set(requested)
+    for stage in reversed(list(STAGES)):
+        if stage in required:
+            required.update(STAGES[stage])
+
+    return [stage for stage in STAGES if stage in required], requested
+
+def parse_times_arg(time):
+    """Parse time points given as comma separated list or min:interval:max."""
+
+    if len(time.split(":")) == 3:
+        t = [float(x) for x in time.split(":")]
+        times = [float(x) for x in np.arange(t[0], t[2] + t[1]/2, t[1])]
+    else:
+        times = [float(x) for x in time.split(",")]
+
+    return times
+
+def make_benchmark_configs(radius, height, seeds, time, density, geometry):
+    """Make all combinations of comma separated synthetic data parameters."""
+
+    times = parse_times_arg(time)
+
+    configs = [{
+        "GEOMETRY": g.upper(),
+        "RADIUS": int(r),
+        "HEIGHT": int(h),
+        "SEEDS": int(s),
+        "TIMEPOINTS": len(times),
+        "DENSITY": float(d),
+        "TIMES": times
+    } for g, r, h, s, d in itertools.product(geometry.split(','), radius.split(','), height.split(','),
+                                             seeds.split(','), density.split(','))]
+
+    return configs
+
+def make_config_name(config):
+    """Make name of synthetic data configuration."""
+
+    return (config['GEOMETRY'] + '_R' + str(config['RADIUS']) + '_H' + str(config['HEIGHT']) + '_S'
+            + str(config['SEEDS']) + '_T' + str(config['TIMEPOINTS']) + '_D' + str(config['DENSITY']))
+
+def make_stage_calls(STAGE, WORKLOC, config, PROCESSES):
+    """Make calls (module, function, args, kwargs) run for stage and output folders they write to."""
+
+    EXP, XMLNAME, SEEDED, TREAT_DELAY, HEX_POSITIONS, RECT_POSITIONS = scripts.benchmark.benchmark_synthetic.define_synthetic_globals()
+    DATA_TYPES = define_benchmark_data_types()
+    SUBSET = define_benchmark_subset()
+
+    # Image first, middle, and last time points
+    TIMES = config['TIMES']
+    imageTimes = ','.join([str(t) for t in sorted(set([TIMES[0], TIMES[len(TIMES)//2], TIMES[-1]]))])
+
+    if STAGE == 'parse':
+        calls = [('scripts.parse.parse', 'parse', [WORKLOC + 'tars/', WORKLOC + 'parsed/'], {'noprint': True})]
+        outputs = ['parsed/']
+    elif STAGE == 'analyze_cells':
+        calls = [('scripts.analyze.analyze_cells', 'analyze_cells', [WORKLOC + 'parsed/', WORKLOC + 'analyzed/cells/'], {})]
+        outputs = ['analyzed/cells/']
+    elif STAGE == 'analyze_env':
+        calls = [('scripts.analyze.analyze_env', 'analyze_env', [WORKLOC + 'parsed/', WORKLOC + 'analyzed/environment/'], {})]
+        outputs = ['analyzed/environment/']
+    elif STAGE == 'analyze_spatial':
+        calls = [('scripts.analyze.analyze_spatial', 'analyze_spatial', [WORKLOC + 'parsed/', WORKLOC + 'analyzed/spatial/'], {})]
+        outputs = ['analyzed/spatial/']
+    elif STAGE == 'analyze_lysis':
+        calls = [('scripts.analyze.analyze_lysis', 'analyze_lysis', [WORKLOC + 'lysis/', WORKLOC + 'analyzed/lysed/'], {})]
+        outputs = ['analyzed/lysed/']
+    elif STAGE == 'subset_data':
+        calls = [('scripts.subset.subset', 'subset_data', [WORKLOC + 'analyzed/' + folder, XMLNAME, TYPE, WORKLOC + 'subset/' + folder, SUBSET], {})
+                 for folder, TYPE in DATA_TYPES]
+        outputs = ['subset/' + folder for folder, TYPE in DATA_TYPES]
+    elif STAGE == 'stats':
+        calls = [('scripts.stats.stats', 'stats', [WORKLOC + 'subset/cells/', WORKLOC + 'stats/'], {'processes': PROCESSES})]
+        outputs = ['stats/']
+    elif STAGE == 'plot_data':
+        calls = [('scripts.plot.plot_data', 'plot_data', [WORKLOC + 'subset/' + folder, 'X', WORKLOC + 'figures/' + folder], {'processes': PROCESSES})
+                 for folder, TYPE in DATA_TYPES]
+        outputs = ['figures/' + folder for folder, TYPE in DATA_TYPES]
+    elif STAGE == 'image':
+        views = {view: True for view in ['number', 'tissue', 'volume', 'types', 'pops']}
+        calls = [('scripts.image.image', 'image', [WORKLOC + 'tars/', WORKLOC + 'images/'],
+                  dict(time=imageTimes, inds='0', noprint=True, processes=PROCESSES, **views))]
+        outputs = ['images/']
+
+    return calls, outputs
+
+def get_peak_memory():
+    """Get peak resident memory of process in MB, nan if not available on platform."""
+
+    if resource is None:
+        return np.nan
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Peak resident memory is in bytes on macOS and in kilobytes elsewhere
+    return maxrss/1024**2 if platform.system() == 'Darwin' else maxrss/1024
+
+def get_folder_size(folder):
+    """Get total size of files in folder in MB."""
+
+    size = 0
+    for root, dirs, files in os.walk(folder):
+        size += sum([os.path.getsize(os.path.join(root, f)) for f in files])
+
+    return size/1024**2
+
+def run_benchmark_stage(calls):
+    """Run calls of stage in this process and return time taken, memory before and at peak, and error if any."""
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    functions = [getattr(importlib.import_module(module), name) for module, name, args, kwargs in calls]
+    baseline = get_peak_memory()
+    error = None
+
+    start = time.perf_counter()
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for function, (module, name, args, kwargs) in zip(functions, calls):
+                function(*args, **kwargs)
+    except Exception as e:
+        error = type(e).__name__ + ': ' + str(e)
+
+    seconds = time.perf_counter() - start
+
+    return seconds, baseline, get_peak_memory(), error
+
+def make_benchmark_data(WORKLOC, config):
+    """Make synthetic data of configuration in work location and return time taken."""
+
+    start = time.perf_counter()
+
+    scripts.benchmark.benchmark_synthetic.make_synthetic_design(WORKLOC, config['RADIUS'], config['HEIGHT'], config['SEEDS'],
+                                                                config['TIMES'], config['DENSITY'], config['GEOMETRY'])
+
+    return time.perf_counter() - start
+
+def benchmark_stage(STAGE, WORKLOC, config, PROCESSES):
+    """Benchmark stage in a fresh process so memory and caches are not shared with other stages."""
+
+    calls, outputs = make_stage_calls(STAGE, WORKLOC, config, PROCESSES)
+
+    for output in outputs:
+        if not os.path.exists(WORKLOC + output):
+            os.makedirs(WORKLOC + output)
+
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        seconds, baseline, peak, error = pool.apply(run_benchmark_stage, (calls,))
+
+    result = {
+        "STAGE": STAGE,
+        "SECONDS": seconds,
+        "BASELINE MB": baseline,
+        "PEAK MB": peak,
+        "OUTPUT MB": sum([get_folder_size(WORKLOC + output) for output in outputs]),
+        "ERROR": error
+    }
+
+    return result
+
+def get_commit():
+    """Get current git commit of repository, None if not in a git repository."""
+
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+        return commit.decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_benchmark_results(saveLoc, results, PROCESSES):
+    """Save benchmark results with commit and machine information as json."""
+
+    commit = get_commit()
+    date = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    contents = {
+        "COMMIT": commit,
+        "DATE": date,
+        "PYTHON": platform.python_version(),
+        "PLATFORM": platform.platform(),
+        "CPUS": multiprocessing.cpu_count(),
+        "PROCESSES": PROCESSES,
+        "RESULTS": results
+    }
+
+    name = saveLoc + 'BENCHMARK_' + (commit[:8] if commit is not None else date) + '.json'
+    with open(name, 'w') as f:
+        json.dump(contents, f, indent=2)
+
+    print('Saved benchmark results to ' + name)
+
+    return name
+
+def compare_benchmarks(baseline, current):
+    """Compare time and peak memory of each stage and configuration between two benchmark result files."""
+
+    with open(baseline, 'r') as f:
+        baseResults = json.load(f)
+    with open(current, 'r') as f:
+        currResults = json.load(f)
+
+    base = {(r['CONFIG'], r['STAGE']): r for r in baseResults['RESULTS']}
+
+    print('Comparing ' + str(currResults['COMMIT']) + ' to ' + str(baseResults['COMMIT']))
+    print('\t' + '{:40s}{:18s}{:>10s}{:>10s}{:>8s}{:>10s}{:>10s}'.format('CONFIG', 'STAGE', 'BASE S', 'CURR S', 'RATIO',
+                                                                      'BASE MB', 'CURR MB'))
+    for r in currResults['RESULTS']:
+        key = (r['CONFIG'], r['STAGE'])
+        if key not in base:
+            continue
+        b = base[key]
+        ratio = r['SECONDS']/b['SECONDS'] if b['SECONDS'] > 0 else np.nan
+        print('\t' + '{:40s}{:18s}{:10.2f}{:10.2f}{:8.2f}{:10.1f}{:10.1f}'.format(r['CONFIG'], r['STAGE'], b['SECONDS'], r['SECONDS'],
+                                                                              ratio, b['PEAK MB'], r['PEAK MB']))
+
+    return
+
+def benchmark(saveLoc, radius='10', height='1', seeds='3', time='0:0.5:2', density='0.5', geometry='hex', stages='', processes='1', keep=False):
+    """Benchmark pipeline stages on synthetic simulation outputs.
+
+    benchmark generates synthetic CARCADE simulation archives and lysis files for each combination of
+    the given synthetic data parameters, runs each requested pipeline stage on them in a fresh process,
+    and saves the time taken, peak memory, and output size of each stage as BENCHMARK_<commit>.json
+    so results can be compared across commits with compare_benchmarks.
+
+    Usage:
+        benchmark(saveLoc, radius='10', height='1', seeds='3', time='0:0.5:2', density='0.5', geometry='hex',
+            stages='', processes='1', keep=False)
+
+        saveLoc
+            Location of where to save benchmark results and synthetic data.
+        [radius]
+            Comma separated list of simulation radii (default: 10).
+        [height]
+            Comma separated list of simulation heights (default: 1).
+        [seeds]
+            Comma separated list of number of seeds per condition (default: 3).
+        [time]
+            Comma separated list of time points or min:interval:max (default: 0:0.5:2).
+        [density]
+            Comma separated list of average number of cells per location (default: 0.5).
+        [geometry]
+            Comma separated list of geometries, hex and/or rect (default: hex).
+        [stages]
+            Comma separated list of stages to benchmark from parse, analyze_cells, analyze_env, analyze_spatial,
+            analyze_lysis, subset_data, stats, plot_data, and image (default: '', all stages). Stages that make
+            inputs of requested stages are also run but not reported.
+        [processes]
+            Number of processes used by stages that run in parallel (default: 1).
+        [keep]
+            Keep synthetic data and stage outputs instead of removing them after each configuration (default: False).
+    """
+
+    RUN, REQUESTED = check_stages_arg(stages)
+    PROCESSES = int(processes)
+    configs = make_benchmark_configs(radius, height, seeds, time, density, geometry)
+
+    results = []
+
+    for config in configs:
+        name = make_config_name(config)
+        WORKLOC = saveLoc + 'work/' + name + '/'
+        print(name)
+
+        seconds = make_benchmark_data(WORKLOC, config)
+        print('\t\t' + 'Generated synthetic data in ' + '{:.1f}'.format(seconds) + ' s')
+
+        for STAGE in RUN:
+            result = benchmark_stage(STAGE, WORKLOC, config, PROCESSES)
+
+            print('\t\t' + '{:16s}{:8.2f} s {:8.1f} MB'.format(STAGE, result['SECONDS'], result['PEAK MB'])
+                  + ('  ' + result['ERROR'] if result['ERROR'] is not None else ''))
+
+            if STAGE in REQUESTED:
+                result.update({key: value for key, value in config.items() if key != 'TIMES'})
+                result['CONFIG'] = name
+                results.append(result)
+
+        if not keep:
+            shutil.rmtree(WORKLOC)
+
+    return save_benchmark_results(saveLoc, results, PROCESSES)
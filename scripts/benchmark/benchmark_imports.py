@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+
+def define_import_budgets():
+    """Define maximum import time in seconds of each entry point module and libraries it must not import."""
+
+    PLOTTING = ['matplotlib', 'seaborn', 'scipy']
+
+    BUDGETS = {
+        'scripts.cli': (0.05, PLOTTING + ['numpy', 'pandas']),
+        'scripts.parse.parse': (0.25, PLOTTING + ['pandas']),
+        'scripts.analyze.analyze_cells': (0.6, PLOTTING),
+        'scripts.analyze.analyze_env': (0.6, PLOTTING),
+        'scripts.analyze.analyze_spatial': (0.6, PLOTTING),
+        'scripts.analyze.analyze_lysis': (0.6, PLOTTING),
+        'scripts.subset.subset': (0.6, PLOTTING),
+        'scripts.image.image': (0.25, PLOTTING + ['pandas']),
+        'scripts.pipeline.pipeline': (0.6, PLOTTING),
+        'scripts.stats.stats': (0.8, ['matplotlib', 'seaborn']),
+        'scripts.plot.plot_data': (2.5, [])
+    }
+
+    return BUDGETS
+
+def measure_import(module, repeats):
+    """Measure shortest time to import module in a fresh interpreter and libraries it imports."""
+
+    LIBRARIES = ['numpy', 'pandas', 'matplotlib', 'seaborn', 'scipy']
+
+    code = ('import sys, time, json\n'
+            'start = time.perf_counter()\n'
+            'import ' + module + '\n'
+            'seconds = time.perf_counter() - start\n'
+            'print(json.dumps([seconds, [m for m in ' + str(LIBRARIES) + ' if m in sys.modules]]))\n')
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+
+    times = []
+    for r in range(0, repeats):
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=root, env=env)
+        seconds, libraries = json.loads(output.decode('utf-8').strip().split('\n')[-1])
+        times.append(seconds)
+
+    return min(times), libraries
+
+def benchmark_imports(repeats='5'):
+    """Measure import time of each entry point and check it against its budget.
+
+    benchmark_imports imports each entry point module in a fresh interpreter (so nothing is already
+    imported), takes the shortest of repeated imports, and checks that it is within the import time
+    budget of the module and does not import libraries it should not need (such as matplotlib for
+    parse, analyze, and subset).
+
+    Usage:
+        benchmark_imports(repeats='5')
+
+        [repeats]
+            Number of times to import each module (default: 5).
+
+    Returns list of modules over budget.
+    """
+
+    BUDGETS = define_import_budgets()
+
+    failures = []
+
+    print('{:36s}{:>10s}{:>10s}  {}'.format('MODULE', 'SECONDS', 'BUDGET', 'LIBRARIES'))
+
+    for module, (budget, forbidden) in BUDGETS.items():
+        seconds, libraries = measure_import(module, int(repeats))
+        extra = [library for library in libraries if library in forbidden]
+
+        status = ''
+        if seconds > budget:
+            status += '  OVER BUDGET'
+        if len(extra) > 0:
+            status += '  IMPORTS ' + ', '.join(extra)
+
+        print('{:36s}{:10.3f}{:10.3f}  {}'.format(module, seconds, budget, ', '.join(libraries)) + status)
+
+        if status != '':
+            failures.append(module)
+
+    return failures
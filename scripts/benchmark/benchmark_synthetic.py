@@ -0,0 +1,199 @@
+import scripts.parse.parse
+import io
+import json
+import os
+import tarfile as tar
+import numpy as np
+
+def define_synthetic_design():
+    """Define treatment conditions of synthetic design, one untreated control and one X feature (ANTIGENS CANCER)."""
+
+    DESIGN = [
+        ('0', 'NA', 'NA', '1000', '100'),
+        ('500', '50-50', '1e-6', '1000', '100'),
+        ('500', '50-50', '1e-6', '5000', '100'),
+        ('500', '50-50', '1e-7', '1000', '100'),
+        ('500', '50-50', '1e-7', '5000', '100')
+    ]
+
+    return DESIGN
+
+def define_synthetic_globals():
+    """Define synthetic simulation globals based on co-culture dish simulations."""
+
+    EXP = 'VITRO_DISH_TREAT_CH'
+    XMLNAME = 'VITRO_DISH_TREAT_CH_2D'
+    SEEDED = 1000
+    TREAT_DELAY = 0.01
+    HEX_POSITIONS = 54
+    RECT_POSITIONS = 64
+
+    return EXP, XMLNAME, SEEDED, TREAT_DELAY, HEX_POSITIONS, RECT_POSITIONS
+
+def make_synthetic_config(R, H, times, geometry, DOSE):
+    """Make simulation config, helpers, and components fields."""
+
+    EXP, XMLNAME, SEEDED, TREAT_DELAY, HEX_POSITIONS, RECT_POSITIONS = define_synthetic_globals()
+
+    config = {
+        "class": "arcade.sim.GrowthSimulation$" + ("Hexagonal" if geometry == 'HEX' else "Rectangular"),
+        "days": times[-1],
+        "size": {"radius": R, "height": H, "margin": 6},
+        "init": 2*SEEDED,
+        "pops": [[0, "arcade.agent.cell.TissueCCell$CC", 0.5, SEEDED],
+                 [1, "arcade.agent.cell.TissueHCell$CC", 0.5, SEEDED],
+                 [2, "arcade.agent.cell.CART4Cell$T4", 0.0, 0],
+                 [3, "arcade.agent.cell.CART8Cell$T8", 0.0, 0]]
+    }
+
+    dose = int(DOSE)
+    helpers = [{"type": "TREAT", "delay": TREAT_DELAY, "pops": [[2, dose//2], [3, dose - dose//2]]}]
+    components = [{"type": "SITE", "class": "source", "specs": {"SOURCE_DAMAGE": 0.0}}]
+
+    return config, helpers, components
+
+def get_synthetic_coords(R, H, geometry):
+    """Get coordinates of all locations in all layers of synthetic simulation."""
+
+    if geometry == 'HEX':
+        coords = scripts.parse.parse.get_hex_coords(R)
+    else:
+        coords = scripts.parse.parse.get_rect_coords(R)
+
+    return [coord + [z] for z in range(-H + 1, H) for coord in coords]
+
+def make_synthetic_cells(rng, coords, density, treated, time, positions):
+    """Make cells at locations with number of cells per location drawn around given density."""
+
+    counts = np.minimum(rng.poisson(density, len(coords)), positions)
+    tcells = 0.1 if treated and time > 0 else 0.0
+    n = int(counts.sum())
+
+    # Draw fields of all cells at once, then split them into locations
+    pops = rng.choice(4, n, p=[(1 - tcells)/2, (1 - tcells)/2, tcells/2, tcells/2])
+    tissue = pops < 2
+    types = np.where(tissue, rng.choice(7, n, p=[.02, .02, .2, .06, .68, .01, .01]),
+                     rng.choice([0, 1, 3, 4, 7, 8, 9, 10, 11, 12], n))
+    volumes = np.round(np.where(tissue, rng.normal(2250, 250, n), rng.normal(300, 50, n)), 2)
+    ages = rng.integers(0, 100000, n)
+    ncycles = rng.integers(0, 3, n)
+    cycles = np.round(rng.normal(1000, 100, int(ncycles.sum()))).tolist()
+    ends = np.cumsum(ncycles).tolist()
+
+    fields = zip(pops.tolist(), types.tolist(), volumes.tolist(), ages.tolist(), [0] + ends, ends)
+    cells = [[1 if pop < 2 else 8, pop, cellType, 0, volume, age, cycles[start:end]]
+             for pop, cellType, volume, age, start, end in fields]
+
+    locations = []
+    start = 0
+    for coord, count in zip(coords, counts.tolist()):
+        if count == 0:
+            continue
+
+        location = cells[start:start + count]
+        for position, cell in enumerate(location):
+            cell[3] = position
+        locations.append([coord, location])
+        start += count
+
+    return locations
+
+def make_synthetic_molecules(rng, R, H, time):
+    """Make molecule concentrations at each radius in each layer."""
+
+    decay = np.exp(-time*np.linspace(0, 1, R))
+    layers = 2*H - 1
+
+    molecules = {
+        "glucose": [np.round(0.005*decay, 6).tolist()]*layers,
+        "oxygen": [np.round(100*decay, 3).tolist()]*layers,
+        "tgfa": [np.round(rng.normal(4000, 200, R)).tolist()]*layers,
+        "IL-2": [np.round(rng.exponential(10*time, R), 3).tolist()]*layers
+    }
+
+    return molecules
+
+def make_synthetic_simulation(R, H, times, density, geometry, treatment, seed):
+    """Make synthetic simulation json for given setup, treatment, and seed."""
+
+    EXP, XMLNAME, SEEDED, TREAT_DELAY, HEX_POSITIONS, RECT_POSITIONS = define_synthetic_globals()
+
+    DESIGN = define_synthetic_design()
+
+    rng = np.random.default_rng([seed, DESIGN.index(treatment)])
+    config, helpers, components = make_synthetic_config(R, H, times, geometry, treatment[0])
+    coords = get_synthetic_coords(R, H, geometry)
+    positions = HEX_POSITIONS if geometry == 'HEX' else RECT_POSITIONS
+
+    timepoints = [{
+        "time": time,
+        "molecules": make_synthetic_molecules(rng, R, H, time),
+        "cells": make_synthetic_cells(rng, coords, density, treatment[0] != '0', time, positions)
+    } for time in times]
+
+    simulation = {
+        "seed": seed,
+        "config": config,
+        "helpers": helpers,
+        "components": components,
+        "parameters": {},
+        "timepoints": timepoints
+    }
+
+    return simulation
+
+def make_synthetic_lysis(simulation):
+    """Make lysis json of tissue cells killed by T-cells, taking killed cells from simulation locations."""
+
+    rng = np.random.default_rng(simulation["seed"])
+    treated = simulation["helpers"][0]["pops"][0][1] > 0
+
+    lysed = []
+    timepoints = []
+    for tp in simulation["timepoints"]:
+        if treated and tp["time"] > 0:
+            tissue = [(coord, cell) for coord, cells in tp["cells"] for cell in cells if cell[1] < 2]
+            for i in rng.choice(len(tissue), min(len(tissue), rng.poisson(5)), replace=False).tolist():
+                coord, cell = tissue[i]
+                lysed.append([float(tp["time"]*1440 - rng.uniform(0, 720)), coord, cell])
+        timepoints.append({"time": tp["time"], "cells": list(lysed)})
+
+    lysis = {key: simulation[key] for key in ["seed", "config", "helpers", "components", "parameters"]}
+    lysis["timepoints"] = timepoints
+
+    return lysis
+
+def make_synthetic_design(saveLoc, radius=10, height=1, seeds=3, times=None, density=0.5, geometry='HEX'):
+    """Make synthetic simulation archives (.tar.xz) and lysis files (.LYSIS.json) for all design conditions.
+
+    Archives are saved in saveLoc/tars/ with one member per seed, and lysis files in saveLoc/lysis/,
+    named like CARCADE outputs so all pipeline stages can run on them.
+    """
+
+    EXP, XMLNAME, SEEDED, TREAT_DELAY, HEX_POSITIONS, RECT_POSITIONS = define_synthetic_globals()
+    DESIGN = define_synthetic_design()
+
+    times = [0.0, 0.5, 1.0] if times is None else times
+
+    for folder in ['tars/', 'lysis/']:
+        if not os.path.exists(saveLoc + folder):
+            os.makedirs(saveLoc + folder)
+
+    for treatment in DESIGN:
+        TUMORID = EXP + '_' + '_'.join(treatment)
+
+        # Fast compression preset since generating archives is not part of what is benchmarked
+        with tar.open(saveLoc + 'tars/' + TUMORID + '.tar.xz', 'w:xz', preset=1) as tar_file:
+            for seed in range(0, seeds):
+                simulation = make_synthetic_simulation(radius, height, times, density, geometry, treatment, seed)
+                name = TUMORID + '_' + str(seed).zfill(2)
+
+                contents = json.dumps(simulation).encode("utf-8")
+                member = tar.TarInfo(name + '.json')
+                member.size = len(contents)
+                tar_file.addfile(member, io.BytesIO(contents))
+
+                with open(saveLoc + 'lysis/' + name + '.LYSIS.json', 'w') as f:
+                    json.dump(make_synthetic_lysis(simulation), f)
+
+    return
@@ -0,0 +1,247 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+
+'''
+Content addressed cache of stage results shared across stages, runs, and users.
+
+Entries are keyed by the hashes of the contents of the input files, the name of the function, its
+parameters, and the version of the code (all modules of scripts, since stages use each other), so the same analysis of the same file with the
+same options is only calculated once no matter where the file is or where its results are saved.
+Entries are stored as CACHELOC/<first two characters of key>/<key>.pkl and written to a temporary file
+in the same directory before being renamed into place, so concurrent workers on a shared filesystem
+never read partial entries. Entries are readable by other users (as allowed by the umask), and entries
+that cannot be read or loaded are treated as missing. Least recently used entries are removed when the
+cache exceeds its size.
+
+Entries are pickles, and loading a pickle can run any code written into it, so only share a cache
+directory with users whose entries you trust (unlike .tbl tables, which are read without pickle).
+'''
+
+def define_cache_max_size():
+    """Define maximum total size of cache in bytes."""
+
+    CACHE_MAX_SIZE = 2 * 1024**3
+
+    return CACHE_MAX_SIZE
+
+def define_cache_version():
+    """Define version of cache entries, increment when entry format changes."""
+
+    CACHE_VERSION = 1
+
+    return CACHE_VERSION
+
+def define_cache_eviction_interval():
+    """Define seconds between scans of cache for entries to evict while the cache is known to be within its size."""
+
+    EVICTION_INTERVAL = 600
+
+    return EVICTION_INTERVAL
+
+def define_cache_temp_max_age():
+    """Define age in seconds after which temporary files left by interrupted writes are removed."""
+
+    TEMP_MAX_AGE = 3600
+
+    return TEMP_MAX_AGE
+
+# Size of each cache at its last scan for entries to evict (plus entries saved since) and time of the scan
+EVICTION = {}
+
+def get_file_hash(file):
+    """Get hash of file contents."""
+
+    sha = hashlib.sha256()
+
+    with open(file, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(block)
+
+    return sha.hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def get_code_version():
+    """Get hash of source of all modules of scripts, so results are remade when any code they use changes."""
+
+    directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    sha = hashlib.sha256()
+
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = sorted([name for name in dirs if name != '__pycache__'])
+        for name in sorted(names):
+            if name.endswith('.py'):
+                file = os.path.join(root, name)
+                sha.update(os.path.relpath(file, directory).replace(os.sep, '/').encode('utf-8'))
+                sha.update(get_file_hash(file).encode('utf-8'))
+
+    return sha.hexdigest()
+
+def make_cache_key(function, files, params):
+    """Make cache key from input file contents, function name, parameters, and code version."""
+
+    key = {
+        "VERSION": define_cache_version(),
+        "FUNCTION": function.__module__ + '.' + function.__qualname__,
+        "CODE": get_code_version(),
+        "INPUTS": [get_file_hash(file) for file in files],
+        "PARAMS": list(params)
+    }
+
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def get_cache_entry_path(CACHELOC, key):
+    """Get path of cache entry with given key."""
+
+    return os.path.join(CACHELOC, key[:2], key + '.pkl')
+
+def load_cache_entry(CACHELOC, key):
+    """Load cached result if present, otherwise return None."""
+
+    entry = get_cache_entry_path(CACHELOC, key)
+
+    try:
+        with open(entry, 'rb') as f:
+            results = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (EOFError, pickle.UnpicklingError):
+        remove_cache_file(entry)
+        return None
+    except (OSError, AttributeError, ImportError):
+        # Entries of other users that cannot be read, or that refer to code that no longer exists, are misses
+        return None
+
+    # Mark entry as recently used for eviction
+    try:
+        os.utime(entry, None)
+    except OSError:
+        pass
+
+    return results
+
+def save_cache_entry(CACHELOC, key, results, maxSize=None):
+    """Save result to cache and evict least recently used entries."""
+
+    directory = os.path.dirname(get_cache_entry_path(CACHELOC, key))
+    os.makedirs(directory, exist_ok=True)
+
+    # Write to temporary file first so interrupted runs and concurrent readers do not see partial entries
+    fd, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        set_shared_permissions(temp)
+        os.replace(temp, get_cache_entry_path(CACHELOC, key))
+    except BaseException:
+        remove_cache_file(temp)
+        raise
+
+    if CACHELOC in EVICTION:
+        EVICTION[CACHELOC]["SIZE"] += os.path.getsize(get_cache_entry_path(CACHELOC, key))
+
+    if check_eviction_due(CACHELOC, maxSize):
+        evict_cache_entries(CACHELOC, maxSize)
+
+    return
+
+def check_eviction_due(CACHELOC, maxSize=None):
+    """Check if cache should be scanned for entries to evict.
+
+    Scanning a large cache on a shared filesystem is slow, so the cache is only scanned on the first save of
+    the process, once entries saved since the last scan may put it over its size, or once entries saved by
+    other processes may have since the last scan (after the eviction interval).
+    """
+
+    if maxSize is None:
+        maxSize = define_cache_max_size()
+
+    if CACHELOC not in EVICTION:
+        return True
+
+    return EVICTION[CACHELOC]["SIZE"] > maxSize or time.time() - EVICTION[CACHELOC]["TIME"] > define_cache_eviction_interval()
+
+def set_shared_permissions(file):
+    """Set permissions of file written through a temporary file to those of a newly created file, so other users can read it."""
+
+    # Temporary files are only readable by their owner, the umask can only be read by setting it
+    umask = os.umask(0)
+    os.umask(umask)
+
+    os.chmod(file, 0o666 & ~umask)
+
+    return
+
+def remove_cache_file(path):
+    """Remove cache file, ignoring files already removed by another worker or owned by another user."""
+
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+    return
+
+def evict_cache_entries(CACHELOC, maxSize=None):
+    """Remove least recently used cache entries until cache is within maximum size."""
+
+    if maxSize is None:
+        maxSize = define_cache_max_size()
+
+    TEMP_MAX_AGE = define_cache_temp_max_age()
+
+    entries = []
+    for root, dirs, names in os.walk(CACHELOC):
+        for name in names:
+            path = os.path.join(root, name)
+
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+
+            if name.endswith('.pkl'):
+                entries.append((stat.st_mtime, stat.st_size, path))
+            elif name.endswith('.tmp') and time.time() - stat.st_mtime > TEMP_MAX_AGE:
+                remove_cache_file(path)
+
+    entries.sort()
+    totalSize = sum([size for mtime, size, path in entries])
+
+    for mtime, size, path in entries:
+        if totalSize <= maxSize:
+            break
+        remove_cache_file(path)
+        totalSize -= size
+
+    EVICTION[CACHELOC] = {"SIZE": totalSize, "TIME": time.time()}
+
+    return
+
+def cached_call(CACHELOC, function, files, params, maxSize=None, noprint=False):
+    """Get result of function called with input files and parameters from cache, calculating and caching it if missing.
+
+    The function is called as function(*files, *params). Input files are identified by the hashes of
+    their contents rather than their paths, so results are shared between copies of the same file.
+    If CACHELOC is empty, the function is called without caching.
+    """
+
+    if CACHELOC == '':
+        return function(*files, *params)
+
+    key = make_cache_key(function, files, params)
+    results = load_cache_entry(CACHELOC, key)
+
+    if results is not None:
+        print('\t\tUsing cached results of ' + function.__name__ + '.') if not noprint else []
+        return results
+
+    results = function(*files, *params)
+    save_cache_entry(CACHELOC, key, results, maxSize)
+
+    return results
@@ -0,0 +1,314 @@
+import argparse
+import importlib
+import inspect
+import sys
+
+'''
+Command line interface to all pipeline stages.
+
+Usage:
+    python -m scripts COMMAND [ARGS] [--workers N] [--cache-dir DIR] [--format FORMAT] [--profile LOG] [--memory SIZE]
+
+    COMMAND
+        One of parse, analyze (cells, sharedlocs, env, spatial, or lysis), subset, stats, plot, image,
+        pipeline, convert, or verify, see python -m scripts COMMAND --help for arguments of each command.
+
+Stage modules (and matplotlib, seaborn, and scipy with them) are only imported when their command
+is run, so commands start without loading libraries they do not use. Peak memory of the run is
+printed once the command finishes.
+
+Each command run into a save location records its parameters, input hashes, library versions, and
+output hashes in the MANIFEST.json file of that location (see scripts/reproduce/), which verify uses
+to recompute a sample of the outputs and compare them.
+'''
+
+def define_commands():
+    """Define module and function run by each command."""
+
+    COMMANDS = {
+        'parse': ('scripts.parse.parse', 'parse'),
+        'analyze cells': ('scripts.analyze.analyze_cells', 'analyze_cells'),
+        'analyze sharedlocs': ('scripts.analyze.analyze_cells', 'analyze_cells'),
+        'analyze env': ('scripts.analyze.analyze_env', 'analyze_env'),
+        'analyze spatial': ('scripts.analyze.analyze_spatial', 'analyze_spatial'),
+        'analyze lysis': ('scripts.analyze.analyze_lysis', 'analyze_lysis'),
+        'subset': ('scripts.subset.subset', 'subset_data'),
+        'stats': ('scripts.stats.stats', 'stats'),
+        'plot': ('scripts.plot.plot_data', 'plot_data'),
+        'image': ('scripts.image.image', 'image'),
+        'pipeline': ('scripts.pipeline.pipeline', 'pipeline'),
+        'convert': ('scripts.storage.storage', 'convert'),
+        'verify': ('scripts.reproduce.reproduce', 'verify')
+    }
+
+    return COMMANDS
+
+def define_common_options():
+    """Define options shared by all commands with the stage argument each sets."""
+
+    COMMON = {
+        'processes': '--workers',
+        'cache': '--cache-dir',
+        'cachesize': '--cachesize',
+        'output': '--format'
+    }
+
+    return COMMON
+
+def make_common_parser():
+    """Make parser of options shared by all commands, only passed to stages that take them."""
+
+    common = argparse.ArgumentParser(add_help=False)
+
+    common.add_argument('--workers', dest='processes', type=int, default=argparse.SUPPRESS,
+                        help='number of worker processes (default: all cores)')
+    common.add_argument('--cache-dir', dest='cache', default=argparse.SUPPRESS,
+                        help='directory of results cache shared across commands and runs')
+    common.add_argument('--cachesize', type=int, default=argparse.SUPPRESS,
+                        help='maximum size of cache in bytes (default: 2 GB)')
+    common.add_argument('--format', dest='output', default=argparse.SUPPRESS,
+                        help='figure or image output format (svg, svgz, png, raster, or auto)')
+    common.add_argument('--profile', dest='PROFILE', default='',
+                        help='log file to profile stages to, summarized at the end of the run')
+    common.add_argument('--pstats', dest='PSTATS', default='',
+                        help='directory to save cProfile stats of each profiled stage to')
+    common.add_argument('--memory', dest='MEMORY', default='',
+                        help='memory budget of run including worker processes, such as 8G (default: none)')
+
+    return common
+
+def add_parse_parser(subparsers, common):
+    """Add parse command arguments."""
+
+    parser = subparsers.add_parser('parse', parents=[common], help='parse simulation files')
+    parser.add_argument('files', help='path to .json, .tar.xz, or directory')
+    parser.add_argument('saveLoc', nargs='?', default=argparse.SUPPRESS, help='location to save parsed files')
+    parser.add_argument('--exclude', default=argparse.SUPPRESS, help='comma separated list of seeds to exclude')
+    parser.add_argument('--nosave', action='store_true', default=argparse.SUPPRESS, help='do not save results')
+    parser.add_argument('--noprint', action='store_true', default=argparse.SUPPRESS, help='do not print progress')
+
+    return
+
+def add_analyze_parser(subparsers, common):
+    """Add analyze command with one subcommand per analysis."""
+
+    parser = subparsers.add_parser('analyze', help='analyze parsed or lysis files')
+    analyses = parser.add_subparsers(dest='ANALYSIS', metavar='ANALYSIS')
+    analyses.required = True
+
+    for analysis, description in [('cells', 'cell counts and states'),
+                                  ('sharedlocs', 'cell counts and states at locations shared with cancer cells'),
+                                  ('env', 'environment concentrations'),
+                                  ('spatial', 'cell counts across radius'),
+                                  ('lysis', 'lysed cells')]:
+        subparser = analyses.add_parser(analysis, parents=[common], help=description)
+        subparser.add_argument('files', help='path to parsed .pkl (or .LYSIS.json for lysis) or directory')
+        subparser.add_argument('saveLoc', help='location to save analyzed files')
+
+    return
+
+def add_subset_parser(subparsers, common):
+    """Add subset command arguments."""
+
+    parser = subparsers.add_parser('subset', parents=[common], help='collect subsets of analyzed files')
+    parser.add_argument('files', help='path to .tbl (or .pkl) or directory')
+    parser.add_argument('xmlName', help='name of XML file used to generate dataset')
+    parser.add_argument('dataType', help='type of analyzed files (analyzed, sharedlocs, environment, spatial, or lysed)')
+    parser.add_argument('saveLoc', help='location to save subset files')
+    parser.add_argument('--subsets', dest='subsetsRequested', default=argparse.SUPPRESS,
+                        help='semicolon separated list of subsets, such as "[(DOSE:500),(TREAT RATIO:50-50)]"')
+    parser.add_argument('--states', action='store_true', default=argparse.SUPPRESS, help='only save state data')
+
+    return
+
+def add_stats_parser(subparsers, common):
+    """Add stats command arguments."""
+
+    parser = subparsers.add_parser('stats', parents=[common], help='run stats on subset cell files')
+    parser.add_argument('files', help='path to .tbl (or .pkl) or directory')
+    parser.add_argument('saveLoc', help='location to save stats')
+    parser.add_argument('--norm', default=argparse.SUPPRESS, help='normalize by INIT or UNTREATED')
+    parser.add_argument('--score', default=argparse.SUPPRESS, help='score type (SUM)')
+    parser.add_argument('--average', action='store_true', default=argparse.SUPPRESS, help='average across seeds')
+    parser.add_argument('--avgstats', default=argparse.SUPPRESS, help='comma separated extra replicate statistics')
+    parser.add_argument('--bootstrap', type=int, default=argparse.SUPPRESS, help='number of bootstrap resamples')
+    parser.add_argument('--permutations', type=int, default=argparse.SUPPRESS, help='number of permutations')
+    parser.add_argument('--seed', type=int, default=argparse.SUPPRESS, help='seed of resampling')
+    parser.add_argument('--dpi', type=int, default=argparse.SUPPRESS, help='resolution of raster figures')
+
+    return
+
+def add_plot_parser(subparsers, common):
+    """Add plot command arguments."""
+
+    parser = subparsers.add_parser('plot', parents=[common], help='plot subset files')
+    parser.add_argument('files', help='path to .tbl (or .pkl) or directory')
+    parser.add_argument('color', help='feature to color by, X for feature along which data varies')
+    parser.add_argument('saveLoc', help='location to save figures')
+    parser.add_argument('--partial', action='store_true', default=argparse.SUPPRESS, help='only partial dataset present')
+    parser.add_argument('--dpi', type=int, default=argparse.SUPPRESS, help='resolution of raster figures')
+
+    return
+
+def add_image_parser(subparsers, common):
+    """Add image command arguments."""
+
+    parser = subparsers.add_parser('image', parents=[common], help='draw images of simulation files')
+    parser.add_argument('files', help='path to .json, .tar.xz, or directory')
+    parser.add_argument('saveLoc', nargs='?', default=argparse.SUPPRESS, help='location to save images')
+
+    for option, description in [('size', 'height of hexagon in pixels'),
+                                ('time', 'comma separated list of time points or min:interval:max'),
+                                ('inds', 'comma separated list of seeds'),
+                                ('radius', 'radius to draw'),
+                                ('bgcol', 'hex code of background color'),
+                                ('padding', 'padding around drawing'),
+                                ('ignore', 'comma separated list of populations to ignore'),
+                                ('spec', 'custom image specification'),
+                                ('duration', 'duration of each frame of animated image in seconds')]:
+        parser.add_argument('--' + option, default=argparse.SUPPRESS, help=description)
+
+    for flag in ['number', 'tissue', 'volume', 'types', 'pops', 'graph', 'custom', 'nosave', 'noprint', 'animate']:
+        parser.add_argument('--' + flag, action='store_true', default=argparse.SUPPRESS, help='see image')
+
+    return
+
+def add_pipeline_parser(subparsers, common):
+    """Add pipeline command arguments."""
+
+    parser = subparsers.add_parser('pipeline', parents=[common], help='run stages whose inputs changed')
+    parser.add_argument('files', help='path to .tar.xz and .json simulation files or directory')
+    parser.add_argument('saveLoc', help='location to save outputs')
+
+    for option, dest, description in [('--xml-name', 'xmlName', 'name of XML file used to generate dataset'),
+                                      ('--lysis', 'lysis', 'path to .LYSIS.json files or directory'),
+                                      ('--subsets', 'subsets', 'semicolon separated list of subsets'),
+                                      ('--analyses', 'analyses', 'comma separated list of analyses'),
+                                      ('--color', 'color', 'feature to color figures by'),
+                                      ('--image', 'image', 'comma separated list of image views'),
+                                      ('--time', 'time', 'time points of images'),
+                                      ('--force', 'force', 'comma separated list of stages to run even if up to date')]:
+        parser.add_argument(option, dest=dest, default=argparse.SUPPRESS, help=description)
+
+    parser.add_argument('--no-stats', dest='stats', action='store_false', default=argparse.SUPPRESS, help='do not run stats')
+    parser.add_argument('--no-plot', dest='plot', action='store_false', default=argparse.SUPPRESS, help='do not plot')
+    parser.add_argument('--dryrun', action='store_true', default=argparse.SUPPRESS, help='print nodes that would run')
+
+    return
+
+def add_convert_parser(subparsers, common):
+    """Add convert command arguments."""
+
+    parser = subparsers.add_parser('convert', parents=[common], help='convert analyzed or subset .pkl files to .tbl tables')
+    parser.add_argument('files', help='path to .pkl or directory')
+    parser.add_argument('saveLoc', nargs='?', default=argparse.SUPPRESS, help='location to save tables')
+    parser.add_argument('--remove', action='store_true', default=argparse.SUPPRESS, help='remove .pkl files once converted')
+
+    return
+
+def add_verify_parser(subparsers, common):
+    """Add verify command arguments."""
+
+    parser = subparsers.add_parser('verify', parents=[common], help='recompute sample of outputs recorded in manifest and compare')
+    parser.add_argument('saveLoc', help='output directory with MANIFEST.json')
+    parser.add_argument('--sample', type=int, default=argparse.SUPPRESS,
+                        help='number of runs, and of input files of each run, to recompute (default: 3)')
+    parser.add_argument('--seed', type=int, default=argparse.SUPPRESS, help='seed of sample')
+
+    return
+
+def make_parser():
+    """Make parser of all commands."""
+
+    common = make_common_parser()
+
+    parser = argparse.ArgumentParser(prog='python -m scripts', description='Run CARCADE data processing pipeline stages.')
+    subparsers = parser.add_subparsers(dest='COMMAND', metavar='COMMAND')
+    subparsers.required = True
+
+    add_parse_parser(subparsers, common)
+    add_analyze_parser(subparsers, common)
+    add_subset_parser(subparsers, common)
+    add_stats_parser(subparsers, common)
+    add_plot_parser(subparsers, common)
+    add_image_parser(subparsers, common)
+    add_pipeline_parser(subparsers, common)
+    add_convert_parser(subparsers, common)
+    add_verify_parser(subparsers, common)
+
+    return parser
+
+def get_command_kwargs(function, args):
+    """Get arguments given for command that stage function takes, warning about common options it does not take."""
+
+    COMMON = define_common_options()
+
+    params = inspect.signature(function).parameters
+    given = {key: value for key, value in vars(args).items() if key not in ['COMMAND', 'ANALYSIS', 'PROFILE', 'PSTATS', 'MEMORY']}
+
+    for key in given:
+        if key not in params:
+            print(COMMON.get(key, key) + ' is not used by ' + function.__name__ + ', ignoring')
+
+    return {key: value for key, value in given.items() if key in params}
+
+def run_command(args):
+    """Import stage module of command and run its stage function with given arguments.
+
+    Runs into a save location are recorded in the manifest of that location, verify returns whether
+    outputs were recomputed and all were identical.
+    """
+
+    import scripts.reproduce.reproduce
+
+    COMMANDS = define_commands()
+
+    command = args.COMMAND + (' ' + args.ANALYSIS if args.COMMAND == 'analyze' else '')
+    module, name = COMMANDS[command]
+
+    function = getattr(importlib.import_module(module), name)
+    kwargs = get_command_kwargs(function, args)
+
+    if command == 'analyze sharedlocs':
+        kwargs['sharedLocs'] = True
+
+    if command == 'verify':
+        differing = function(**kwargs)
+        return differing is not None and len(differing) == 0
+
+    saveLoc = kwargs.get('saveLoc', '')
+    snapshot = scripts.reproduce.reproduce.snapshot_outputs(saveLoc) if saveLoc != '' else None
+
+    function(**kwargs)
+
+    if saveLoc != '' and not kwargs.get('nosave', False) and not kwargs.get('dryrun', False):
+        scripts.reproduce.reproduce.record_run(saveLoc, command, function, kwargs, snapshot)
+
+    return True
+
+def main(argv=None):
+    """Parse command line and run command within memory budget, profiling stages if requested."""
+
+    import scripts.memory.memory
+
+    args = make_parser().parse_args(argv)
+
+    if args.MEMORY != '':
+        scripts.memory.memory.set_memory_budget(args.MEMORY)
+
+    if args.PROFILE != '':
+        import scripts.profile.profile_stages
+        scripts.profile.profile_stages.enable_profiling(args.PROFILE, args.PSTATS)
+
+    try:
+        identical = run_command(args)
+
+        if args.PROFILE != '':
+            scripts.profile.profile_stages.summarize_profile(args.PROFILE)
+    finally:
+        scripts.memory.memory.report_peak_memory()
+
+    return 0 if identical else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,11 @@
 import scripts.parse.parse_utilities
-import random
-import tarfile as tar
+import scripts.image.image_tasks
+import scripts.profile.profile_stages
+import scripts.memory.memory
+import scripts.reproduce.reproduce
+import multiprocessing
+import gzip
+import io
 from math import sqrt, pi, cos, sin, log
 import numpy as np
 
@@ -135,191 +140,288 @@ def color_map(v, ranges, colors, type="hsv"):
     elif type == "hsv":
         return color_map_hsv(v, ranges, colors)
 
-def save_svg(contents, w, h, filename, view, t, bgcol, padding):
-    """Save image as svg."""
+def hsv_to_rgb_array(h, s, v):
+    """Convert arrays of hsv to arrays of rgb colors."""
+
+    bins = np.arange(0, 360, 60)
+    c = v*s
+    x = c*(1 - np.abs(h/60 % 2 - 1))
+    m = v - c
+    i = np.digitize(h, bins)
+    zero = np.zeros_like(c)
+
+    sectors = [i == 1, i == 2, i == 3, i == 4, i == 5, i == 6]
+    rr = np.select(sectors, [c, x, zero, zero, x, c])
+    gg = np.select(sectors, [x, c, c, x, zero, zero])
+    bb = np.select(sectors, [zero, zero, x, c, c, x])
+
+    r = np.round(255*(rr + m)).astype(int)
+    g = np.round(255*(gg + m)).astype(int)
+    b = np.round(255*(bb + m)).astype(int)
+
+    return r, g, b
+
+def color_map_array(values, ranges, colors, type="hsv"):
+    """Make color map for array of values, converting bin colors once for all values."""
+
+    values = np.asarray(values, dtype=float)
+    bounds = np.asarray(ranges)
+
+    i = np.clip(np.digitize(values, ranges), 1, len(colors) - 1)
+    v1, v2 = bounds[i - 1], bounds[i]
+
+    if type == "rgb":
+        lut = np.array([hex_to_rgb(color) for color in colors], dtype=float)
+        rgb = [np.trunc(interp(values, v1, v2, lut[i - 1, k], lut[i, k])).astype(int) for k in range(0, 3)]
+    elif type == "hsv":
+        lut = np.array([hex_to_hsv(color) for color in colors], dtype=float)
+        rgb = hsv_to_rgb_array(*[interp(values, v1, v2, lut[i - 1, k], lut[i, k]) for k in range(0, 3)])
+
+    hexes = ['#%02x%02x%02x' % c for c in zip(*[x.tolist() for x in rgb])]
+
+    # Missing values have no position in color map for either type
+    hexes = ['#555' if np.isnan(v) else c for v, c in zip(values.tolist(), hexes)]
+
+    return hexes
+
+def define_image_output_threshold():
+    """Define size of svg contents in characters above which automatic output compresses images."""
+
+    SVGZ_THRESHOLD = 1000000
+
+    return SVGZ_THRESHOLD
+
+def check_image_output_arg(output):
+    """Check output format argument for how to save images."""
+
+    if output.upper() in ['SVG', 'SVGZ', 'AUTO', 'PNG']:
+        OUTPUT = output.upper()
+    else:
+        print("image output must be one of svg, svgz, auto, or png, saving as svg")
+        OUTPUT = 'SVG'
+
+    return OUTPUT
+
+def save_svg(contents, w, h, filename, view, t, bgcol, padding, output='SVG'):
+    """Save image as svg, writing header, list of contents and footer in one pass."""
+
+    SVGZ_THRESHOLD = define_image_output_threshold()
 
     suffix = "_" + view.lower() + "_" + str(t).replace(".","").zfill(4) + ".svg"
-    with open(filename.replace(".json", suffix), "w") as svg:
-        svg.write('<svg xmlns="http://www.w3.org/2000/svg" ')
-        svg.write('width="' + str(w + padding) + 'px" ')
-        svg.write('height="' + str(h + padding) + 'px">\n')
-        svg.write('<rect width="' + str(w + padding) + 'px" height="' + str(h + padding)
-            + 'px" fill="' + bgcol + '" />\n')
-        svg.write('<g transform="translate(' + str(padding/2) + "," + str(padding/2) + ')">\n')
-        svg.write(contents + "\n</g>\n</svg>")
-
-def get_hex_points(u, v, w, R, S, scale=sqrt(3)):
-    """Get hexagonal points."""
-
-    # Convert to xy coordinate.
-    x = (u + R - 1)*sqrt(3) + 1
-    y = (w - v) + 2*R - 1
-    s = 2*S/scale
-
-    # Get coordinates of six corners.
-    theta = [pi*(60*i)/180.0 for i in range(0,6)]
-    dx = [s*cos(t) for t in theta]
-    dy = [s*sin(t) for t in theta]
-    return S*x, S*y, dx, dy
-
-def get_rect_points(x, y, R, S):
-    """Get rectangular points."""
-
-    xx = 2*x + 2*R - 1
-    yy = 2*y + 2*R - 1
-    dx = [S, S, -S, -S]
-    dy = [-S, S, S, -S]
-    return S*xx, S*yy, dx, dy
-
-def draw_location(coords, R, S, color, coordinate):
-    """Draw location."""
+
+    header = ('<svg xmlns="http://www.w3.org/2000/svg" '
+        + 'width="' + str(w + padding) + 'px" '
+        + 'height="' + str(h + padding) + 'px">\n'
+        + '<rect width="' + str(w + padding) + 'px" height="' + str(h + padding)
+        + 'px" fill="' + bgcol + '" />\n'
+        + '<g transform="translate(' + str(padding/2) + "," + str(padding/2) + ')">\n')
+    footer = "\n</g>\n</svg>"
+
+    lines = [header] + [c + "\n" for c in contents[:-1]] + contents[-1:] + [footer]
+
+    if output == 'SVGZ' or (output == 'AUTO' and sum([len(line) for line in lines]) > SVGZ_THRESHOLD):
+        # Compressed without modification time in the gzip header so the same image is saved to identical bytes
+        with io.TextIOWrapper(gzip.GzipFile(filename.replace(".json", suffix + "z"), "wb", mtime=0)) as f:
+            f.writelines(lines)
+    else:
+        with open(filename.replace(".json", suffix), "w", buffering=1024*1024) as f:
+            f.writelines(lines)
+
+def get_location_offsets(S, geometry):
+    """Get offsets of polygon corners from center of location, shared by all locations."""
 
     HEXAGONAL, RECTANGULAR = define_coord_constants()
 
-    if coordinate == HEXAGONAL:
-        cx, cy, dx, dy = get_hex_points(*coords, R, S)
-    elif coordinate == RECTANGULAR:
-        cx, cy, dx, dy = get_rect_points(*coords, R, S)
-    path = " ".join([str(cx + i) + "," + str(cy + j) for i, j in zip(dx, dy)])
-    return '<polygon stroke-width="0" fill="' + color + '" points="' + path + '" />'
+    if geometry == HEXAGONAL:
+        s = 2*S/sqrt(3)
+        theta = [pi*(60*i)/180.0 for i in range(0,6)]
+        dx = [s*cos(t) for t in theta]
+        dy = [s*sin(t) for t in theta]
+    elif geometry == RECTANGULAR:
+        dx = [S, S, -S, -S]
+        dy = [-S, S, S, -S]
+
+    return dx, dy
 
-def draw_position(coords, R, S, colors, coordinate):
-    """Draw position."""
+def get_location_centers(coords, R, S, geometry):
+    """Get centers of all locations in array of location coordinates."""
 
     HEXAGONAL, RECTANGULAR = define_coord_constants()
-    HEXAGONAL_POINTS, RECTANGULAR_POINTS = define_coord_points_constants()
 
-    if coordinate == HEXAGONAL:
-        cx, cy, dx, dy = get_hex_points(*coords, R, S)
-        div = HEXAGONAL_POINTS
-    elif coordinate == RECTANGULAR:
-        cx, cy, dx, dy = get_rect_points(*coords, R, S)
-        div = RECTANGULAR_POINTS
+    if geometry == HEXAGONAL:
+        x = (coords[:, 0] + R - 1)*sqrt(3) + 1
+        y = (coords[:, 2] - coords[:, 1]) + 2*R - 1
+    elif geometry == RECTANGULAR:
+        x = 2*coords[:, 0] + 2*R - 1
+        y = 2*coords[:, 1] + 2*R - 1
 
-    # Adds random rotation to the positions
-    if coordinate == HEXAGONAL:
-        offset = int(random.random()*6)
-    else:
-        offset = int(random.random()*4)
-    dx = dx[offset:] + dx[:offset]
-    dy = dy[offset:] + dy[:offset]
-
-    dx = dx + [dx[0]] # loop around x
-    dy = dy + [dy[0]] # loop around y
-    ddx = [b - a for a,b in zip(dx, dx[1:])] # get relative x
-    ddy = [b - a for a,b in zip(dy, dy[1:])] # get relative y
-
-    # Group the indices for each triangle group.
-    totals = [0] + list(np.cumsum([n for n, c in colors]))
-    positions = [[i for i in range(totals[i], totals[i + 1])] for i, a in enumerate(totals[:-1])]
-    positions = [[(i + 1)%div for i in p] for p in positions]
-    fills = [c for n, c in colors]
-
-    # All paths start at the center of the hexagon.
-    prefix = "M " + str(cx) + "," + str(cy)
-    paths = ""
-
-    # Iterate through each triangle group.
-    for p, fill in zip(positions, fills):
-        coords = [(ddx[i], ddy[i]) for i in p]
-        d = prefix + " l " + str(dx[p[0]]) + "," + str(dy[p[0]]) + " l "
-        d += " l ".join([str(x) + "," + str(y) for x, y in coords])
-        paths += '<path d="' + d + ' z" fill="' + fill + '"/>'
+    return S*x, S*y
+
+def make_position_paths(dx, dy):
+    """Make path strings for start and sides of triangles for each possible rotation of a location."""
+
+    rotations = []
+
+    for offset in range(0, len(dx)):
+        rdx = dx[offset:] + dx[:offset]
+        rdy = dy[offset:] + dy[:offset]
+        rdx = rdx + [rdx[0]] # loop around x
+        rdy = rdy + [rdy[0]] # loop around y
+
+        starts = [str(x) + "," + str(y) for x, y in zip(rdx, rdy)]
+        sides = [str(b - a) + "," + str(d - c) for a, b, c, d in zip(rdx, rdx[1:], rdy, rdy[1:])]
+        rotations.append((starts, sides))
+
+    return rotations
+
+def draw_locations(cx, cy, colors, dx, dy):
+    """Draw locations as polygons with corners computed for all locations at once."""
+
+    xs = (cx[:, None] + np.array(dx)[None, :]).tolist()
+    ys = (cy[:, None] + np.array(dy)[None, :]).tolist()
+
+    return ['<polygon stroke-width="0" fill="' + color + '" points="'
+            + " ".join([str(x) + "," + str(y) for x, y in zip(xx, yy)]) + '" />'
+            for xx, yy, color in zip(xs, ys, colors)]
+
+def draw_positions(cx, cy, colors, rotations, rng):
+    """Draw positions as groups of triangles with a random rotation for each location."""
+
+    div = len(rotations)
+    paths = []
+
+    for x, y, location in zip(cx.tolist(), cy.tolist(), colors):
+        # Adds random rotation to the positions
+        starts, sides = rotations[int(rng.random()*div)]
+
+        # All paths start at the center of the location.
+        prefix = "M " + str(x) + "," + str(y) + " l "
+
+        total = 0
+        for n, fill in location:
+            p = [(i + 1)%div for i in range(total, total + n)]
+            paths.append('<path d="' + prefix + starts[p[0]] + " l " + " l ".join([sides[i] for i in p])
+                         + ' z" fill="' + fill + '"/>')
+            total += n
 
     return paths
 
-def draw_layer(z, R, S, geometry):
-    """Draw layer."""
+def get_portions(cells, geometry):
+    """Get number of triangles of location for each cell based on cell volumes."""
 
-    if z and type(z[0][1][0]) is tuple:
-        return "".join([draw_position(coords, R, S, colors, geometry) for coords, colors in z])
+    if type(cells[0][4]) == list:
+        total = len(cells)
+        fracs = [1/total*geometry for a in cells]
     else:
-        return "".join([draw_location(coords, R, S, color, geometry) for coords, color in z])
+        total = sum([a[4] for a in cells])
+        fracs = [a[4]/total*geometry for a in cells]
 
-def get_color(view, c, bgcol, spec):
-    """Get color based on view being imaged."""
+    portions = [int(round(f)) for f in fracs]
+    portions = [max(1, p) for p in portions]
+    while sum(portions) > geometry:
+        portions[portions.index(max(portions))] -= 1
+    while sum(portions) < geometry:
+        portions[portions.index(min(portions))] += 1
+    assert sum(portions) == geometry
+    return portions
+
+def get_location_colors(locations, view, bgcol, spec):
+    """Get colors of all locations based on view."""
 
     NUMBER = [(0, 1, 25, 56), (bgcol, "#444444", "#888888", "#eeeeee")]
     NUMBER_TISSUE = ["#000000", "#444", "#666", "#888", "#aaa", "#ccc", "#eee"]
     VOLUME = [(0, 1, 7000, 14000), (bgcol, "#fee8c8", "#fdbb84", "#e34a33")]
+
+    if view == "NUMBER":
+        return color_map_array([len(cells) for cells in locations], *NUMBER)
+    elif view == "TISSUE":
+        return [NUMBER_TISSUE[len(cells)] for cells in locations]
+    elif view == "VOLUME":
+        return color_map_array([sum([a[4] for a in cells]) for cells in locations], *VOLUME)
+    elif view == "CUSTOM":
+        index = int(spec[1])
+        values = [sum([a[index] for a in cells])/(len(cells) if spec[2] == "n" else float(spec[2])) for cells in locations]
+        ranges = [float(x) for x in spec[3].split(',')]
+        colors = ["#" + x for x in spec[4].split(',')]
+        return color_map_array(values, ranges, colors, spec[5])
+
+def get_cell_value(c, spec):
+    """Get value of cell for custom position view."""
+
+    div = spec[2].split(",")
+    indicies = [int(i) for i in spec[1].split("/")]
+
+    if len(indicies) == 1:
+        val = float(c[indicies[0]])
+    elif len(indicies) == 2:
+        val = float(c[indicies[0]][indicies[1]])
+    else:
+        print("indicies must be either a single integer or integer/integer")
+        exit()
+
+    if len(div) == 1:
+        val = val/float(div[0])
+    elif len(div) == 2:
+        if val == 0:
+            val = np.nan
+        else:
+            val = log(val/float(div[0]), int(div[1]))
+
+    return val
+
+def get_position_colors(locations, view, spec, geometry):
+    """Get portions and colors of all cells in all locations based on view."""
+
     TYPES = ["#555555", "#e0b036", "#498a44", "#0c7cba", "#9b0d28", "#642766",
              "#ff8c00", "#9999ff", "#66ffb2", "#af3976", "#ff99ff", "#fab396", "adc0ff"]
     POPS = ["#44888d", "#c3b3a2", "#8dd3c7", "#bebada", "#ffffb3"]
 
+    cells = [c for location in locations for c in location]
+
     if view == "TYPES":
-        return TYPES[c[2]]
+        colors = [TYPES[c[2]] for c in cells]
     elif view == "POPS":
-        return POPS[c[1]]
-    elif view == "NUMBER":
-        cells = [x for x in c]
-        total = len(cells)
-        return color_map(total, *NUMBER)
-    elif view == "TISSUE":
-        cells = [x for x in c]
-        return NUMBER_TISSUE[len(cells)]
-    elif view == "VOLUME":
-        cells = [x for x in c]
-        total = np.sum([a[4] for a in cells])
-        return color_map(total, *VOLUME)
+        colors = [POPS[c[1]] for c in cells]
     elif view == "CUSTOM":
-        if spec[0] == "loc":
-            cells = [x for x in c]
-            n = len(cells) if spec[2] == "n" else float(spec[2])
-            val = np.sum([a[int(spec[1])] for a in cells])/n
-            ranges = [float(x) for x in spec[3].split(',')]
-            colors = ["#" + x for x in spec[4].split(',')]
-            return color_map(val, ranges, colors, spec[5])
-        elif spec[0] == "pos":
-            div = spec[2].split(",")
-            indicies = [int(i) for i in spec[1].split("/")]
-
-            if len(indicies) == 1:
-                val = float(c[indicies[0]])
-            elif len(indicies) == 2:
-                val = float(c[indicies[0]][indicies[1]])
-            else:
-                print("indicies must be either a single integer or integer/integer")
-                exit()
-
-            if len(div) == 1:
-                val = val/float(div[0])
-            elif len(div) == 2:
-                if val == 0:
-                    val = np.nan
-                else:
-                    val = log(val/float(div[0]), int(div[1]))
-
-            ranges = [float(x) for x in spec[3].split(',')]
-            colors = ["#" + x for x in spec[4].split(',')]
-
-            return color_map(val, ranges, colors, spec[5])
-
-def get_colors(cells, view, bgcol, spec, geometry):
-    """Get colors based on view."""
-
-    if view == "VOLUME" or view == "NUMBER" or view == "TISSUE" or (view == "CUSTOM" and spec[0] == "loc"):
-        return get_color(view, cells, bgcol, spec)
-    elif view == "TYPES" or view == "POPS" or (view == "CUSTOM" and spec[0] == "pos"):
-        if type(cells[0][4]) == list:
-            total = len(cells)
-            fracs = [1/total*geometry for a in cells]
-        else:
-            total = np.sum([a[4] for a in cells])
-            fracs = [a[4]/total*geometry for a in cells]
-
-        portions = [int(round(f)) for f in fracs]
-        portions = [max(1, p) for p in portions]
-        while np.sum(portions) > geometry:
-            portions[portions.index(max(portions))] -= 1
-        while np.sum(portions) < geometry:
-            portions[portions.index(min(portions))] += 1
-        assert np.sum(portions) == geometry
-        return [(p, get_color(view, c, bgcol, spec)) for p, c in zip(portions, cells)]
+        ranges = [float(x) for x in spec[3].split(',')]
+        hexes = ["#" + x for x in spec[4].split(',')]
+        colors = color_map_array([get_cell_value(c, spec) for c in cells], ranges, hexes, spec[5])
+
+    positions = []
+    i = 0
+    for location in locations:
+        portions = get_portions(location, geometry)
+        positions.append(list(zip(portions, colors[i:i + len(location)])))
+        i += len(location)
+
+    return positions
+
+def draw_layer(layer, R, S, view, bgcol, spec, geometry, rng):
+    """Draw all locations in layer."""
+
+    HEXAGONAL, RECTANGULAR = define_coord_constants()
+    HEXAGONAL_POINTS, RECTANGULAR_POINTS = define_coord_points_constants()
+
+    if len(layer) == 0:
+        return []
+
+    coords = np.array([a[0][:geometry - 1] for a in layer])
+    locations = [a[1] for a in layer]
+    cx, cy = get_location_centers(coords, R, S, geometry)
+    dx, dy = get_location_offsets(S, geometry)
+
+    if view == "TYPES" or view == "POPS" or (view == "CUSTOM" and spec[0] == "pos"):
+        points = HEXAGONAL_POINTS if geometry == HEXAGONAL else RECTANGULAR_POINTS
+        colors = get_position_colors(locations, view, spec, points)
+        return draw_positions(cx, cy, colors, make_position_paths(dx, dy), rng)
+    else:
+        colors = get_location_colors(locations, view, bgcol, spec)
+        return draw_locations(cx, cy, colors, dx, dy)
 
 def draw_edges(edges, R, S):
     """Draw edges."""
 
-    paths = ""
+    paths = []
     s = 2*S/sqrt(3)
     for edge in edges:
         x1, y1, x2, y2, w = edge
@@ -328,10 +430,343 @@ def draw_edges(edges, R, S):
         x2 = str((x2/3*sqrt(3) + 1)*S - s)
         y2 = str(y2*S)
         sw = str(sqrt(w))#str(w/2)
-        paths += '<path d="M ' + x1 + "," + y1 + " L " + x2 + "," + y2 + '" stroke="#fff" stroke-width="' + sw + 'px" stroke-linecap="round" />'
+        paths.append('<path d="M ' + x1 + "," + y1 + " L " + x2 + "," + y2 + '" stroke="#fff" stroke-width="' + sw + 'px" stroke-linecap="round" />')
+    return "".join(paths)
+
+# Raster masks of locations and triangles by radius, size, geometry, and padding
+RASTER_MASKS = {}
+
+def get_grid_coords(R, geometry):
+    """Get coordinates of all locations within radius."""
+
+    HEXAGONAL, RECTANGULAR = define_coord_constants()
+
+    if geometry == HEXAGONAL:
+        return [(u, v, -u - v) for u in range(-R + 1, R) for v in range(-R + 1, R) if abs(u + v) < R]
+    elif geometry == RECTANGULAR:
+        return [(x, y) for x in range(-R + 1, R) for y in range(-R + 1, R)]
+
+def make_raster_masks(R, S, geometry, padding):
+    """Make pixel masks labeling location and triangle of location drawn at each pixel of canvas."""
+
+    HEXAGONAL, RECTANGULAR = define_coord_constants()
+
+    w = (2*S/sqrt(3))*(3*R - 1) if geometry == HEXAGONAL else S*(4*R - 2)
+    h = S*(4*R - 2)
+    shape = (int(np.ceil(h + padding)), int(np.ceil(w + padding)))
+
+    coords = get_grid_coords(R, geometry)
+    cx, cy = get_location_centers(np.array(coords), R, S, geometry)
+    dx, dy = np.array(get_location_offsets(S, geometry))
+    corners = np.arctan2(dy, dx)
+    angles = (corners - corners[0]) % (2*pi)
+
+    locations = np.full(shape, -1, dtype=int)
+    triangles = np.zeros(shape, dtype=int)
+
+    for i, (x, y) in enumerate(zip(cx + padding/2, cy + padding/2)):
+        left, right = max(0, int(x + dx.min())), min(shape[1], int(np.ceil(x + dx.max())) + 1)
+        top, bottom = max(0, int(y + dy.min())), min(shape[0], int(np.ceil(y + dy.max())) + 1)
+
+        # Pixel centers relative to center of location
+        px, py = np.meshgrid(np.arange(left, right) + 0.5 - x, np.arange(top, bottom) + 0.5 - y)
+
+        # Pixels inside all edges of convex polygon
+        inside = np.ones(px.shape, dtype=bool)
+        for k in range(0, len(dx)):
+            ex, ey = dx[(k + 1) % len(dx)] - dx[k], dy[(k + 1) % len(dy)] - dy[k]
+            inside &= ex*(py - dy[k]) - ey*(px - dx[k]) >= 0
+
+        sector = np.searchsorted(angles, (np.arctan2(py, px) - corners[0]) % (2*pi), side='right') - 1
+
+        locations[top:bottom, left:right][inside] = i
+        triangles[top:bottom, left:right][inside] = sector[inside]
+
+    masks = {
+        "INDEX": {coord: i for i, coord in enumerate(coords)},
+        "LOCATIONS": locations,
+        "TRIANGLES": triangles
+    }
+
+    return masks
+
+def get_raster_masks(R, S, geometry, padding):
+    """Get pixel masks for radius, size, and geometry, making them on first use."""
+
+    key = (R, S, geometry, padding)
+
+    if key not in RASTER_MASKS:
+        RASTER_MASKS[key] = make_raster_masks(R, S, geometry, padding)
+
+    return RASTER_MASKS[key]
+
+def hex_to_rgb_array(colors):
+    """Convert list of hex colors to array of rgb colors."""
+
+    rgb = {}
+
+    for color in set(colors):
+        xx = color.replace('#', '')
+        xx = "".join([x + x for x in xx]) if len(xx) == 3 else xx
+
+        # Invalid colors (such as out of range values in rgb maps) are drawn black as in svg
+        try:
+            rgb[color] = hex_to_rgb(xx)
+        except ValueError:
+            rgb[color] = [0, 0, 0]
+
+    return np.array([rgb[color] for color in colors], dtype=np.uint8).reshape(-1, 3)
+
+def draw_raster_layer(canvas, masks, layer, view, bgcol, spec, geometry, rng):
+    """Draw all locations in layer onto canvas."""
+
+    HEXAGONAL, RECTANGULAR = define_coord_constants()
+    HEXAGONAL_POINTS, RECTANGULAR_POINTS = define_coord_points_constants()
+
+    layer = [a for a in layer if tuple(a[0][:geometry - 1]) in masks["INDEX"]]
+
+    if len(layer) == 0:
+        return
+
+    indices = np.array([masks["INDEX"][tuple(a[0][:geometry - 1])] for a in layer])
+    locations = [a[1] for a in layer]
+    n = len(masks["INDEX"])
+
+    if view == "TYPES" or view == "POPS" or (view == "CUSTOM" and spec[0] == "pos"):
+        div = HEXAGONAL_POINTS if geometry == HEXAGONAL else RECTANGULAR_POINTS
+        positions = get_position_colors(locations, view, spec, div)
+
+        # Cell of each triangle with same random rotations as svg positions
+        fills = []
+        for location in positions:
+            offset = int(rng.random()*div)
+            cells = [fill for count, fill in location for i in range(0, count)]
+            fills.extend([cells[(k - 1 - offset) % div] for k in range(0, div)])
+
+        colors = np.zeros((n*div, 3), dtype=np.uint8)
+        colors[(indices[:, None]*div + np.arange(div)[None, :]).ravel()] = hex_to_rgb_array(fills)
+        labels = masks["LOCATIONS"]*div + masks["TRIANGLES"]
+    else:
+        colors = np.zeros((n, 3), dtype=np.uint8)
+        colors[indices] = hex_to_rgb_array(get_location_colors(locations, view, bgcol, spec))
+        labels = masks["LOCATIONS"]
+
+    drawn = np.zeros(n, dtype=bool)
+    drawn[indices] = True
+    pixels = (masks["LOCATIONS"] >= 0) & drawn[masks["LOCATIONS"]]
+    canvas[pixels] = colors[labels[pixels]]
+
+def save_png(canvas, filename, view, t):
+    """Save image as png."""
+
+    import matplotlib.image
+
+    suffix = "_" + view.lower() + "_" + str(t).replace(".","").zfill(4) + ".png"
+    matplotlib.image.imsave(filename.replace(".json", suffix), canvas)
+
+@scripts.profile.profile_stages.profile_stage(items='T')
+def _raster(jsn, saveLoc, T, S, R, view, filename, nosave, ignore, bgcol, spec, padding):
+    """Create raster image of ABM simulation instance."""
+
+    r, H, time, pops, types = scripts.parse.parse_utilities.parse_fields(jsn)
+
+    if R == "auto":
+        R = r
+    else:
+        R = int(R)
+
+    timepoints = index_timepoints(jsn)
+
+    for t in T:
+        rng = make_image_rng(filename, view, t)
+
+        # Select appropriate time point from data and remove ignored populations.
+        tp = [[i[0], [c for c in i[1] if c[1] not in ignore]] for i in timepoints[t]["cells"]]
+        tp = [i for i in tp if len(i[1]) > 0]
+
+        # Detect if hexagonal or rectangular coordinates.
+        nc = len(tp[0][0])
+
+        masks = get_raster_masks(R, S, nc, padding)
+
+        # Group entries in timepoint by z in a single pass.
+        layers = {z: [] for z in range(-H + 1, H)}
+        for a in tp:
+            if a[0][nc - 1] in layers:
+                layers[a[0][nc - 1]].append(a)
+
+        # Draw each layer on background.
+        canvas = np.empty(masks["LOCATIONS"].shape + (3,), dtype=np.uint8)
+        canvas[:] = hex_to_rgb_array([bgcol])
+        [draw_raster_layer(canvas, masks, layer, view, bgcol, spec, nc, rng) for layer in layers.values()]
+
+        if not nosave:
+            save_png(canvas, saveLoc + filename.split("/")[-1], view, t)
+
+def make_image_rng(filename, view, t):
+    """Make random number generator for position rotations seeded from simulation file name (TUMOR ID and seed), view, and time."""
+
+    return scripts.reproduce.reproduce.make_task_random(filename.split("/")[-1], view, t)
+
+def index_timepoints(jsn):
+    """Map times to first matching time point so each time is not searched for in all time points."""
+
+    timepoints = {}
+    for tp in jsn["timepoints"]:
+        timepoints.setdefault(tp["time"], tp)
+
+    return timepoints
+
+def make_key_times(frames):
+    """Make key times of start of each frame as fractions of animation duration."""
+
+    return [str(round(i/frames, 6)) for i in range(0, frames)]
+
+def draw_animated(element, attribute, values, keyTimes, duration):
+    """Draw element with attribute animated through one value per frame, keeping only frames where value changes."""
+
+    changes = [i for i in range(0, len(values)) if i == 0 or values[i] != values[i - 1]]
+
+    if len(changes) == 1:
+        return element.replace("/>", attribute + '="' + values[0] + '" />')
+
+    keys = ";".join([keyTimes[i] for i in changes])
+    vals = ";".join([values[i] for i in changes])
+
+    return (element.replace("/>", attribute + '="' + values[0] + '">')
+            + '<animate attributeName="' + attribute + '" values="' + vals + '" keyTimes="' + keys
+            + '" dur="' + str(duration*len(values)) + 's" calcMode="discrete" repeatCount="indefinite" />'
+            + element.split(" ")[0].replace("<", "</") + ">")
+
+def draw_animated_edges(frames, R, S, duration):
+    """Draw union of edges across frames once with stroke width animated across frames."""
+
+    s = 2*S/sqrt(3)
+    keyTimes = make_key_times(len(frames))
+    widths = {}
+
+    for f, edges in enumerate(frames):
+        for x1, y1, x2, y2, w in edges:
+            widths.setdefault((x1, y1, x2, y2), ["0px"]*len(frames))[f] = str(sqrt(w)) + "px"
+
+    paths = []
+    for (x1, y1, x2, y2), values in widths.items():
+        x1 = str((x1/3*sqrt(3) + 1)*S - s)
+        y1 = str(y1*S)
+        x2 = str((x2/3*sqrt(3) + 1)*S - s)
+        y2 = str(y2*S)
+        element = '<path d="M ' + x1 + "," + y1 + " L " + x2 + "," + y2 + '" stroke="#fff" stroke-linecap="round" />'
+        paths.append(draw_animated(element, "stroke-width", values, keyTimes, duration))
+
+    return "".join(paths)
+
+def draw_animated_layer(coords, frames, R, S, view, bgcol, spec, geometry, duration, rng):
+    """Draw union of locations in layer once with fills animated across frames."""
+
+    HEXAGONAL, RECTANGULAR = define_coord_constants()
+    HEXAGONAL_POINTS, RECTANGULAR_POINTS = define_coord_points_constants()
+
+    if len(coords) == 0:
+        return []
+
+    cx, cy = get_location_centers(np.array(coords), R, S, geometry)
+    dx, dy = get_location_offsets(S, geometry)
+    keyTimes = make_key_times(len(frames))
+    present = [[c for c in coords if c in frame] for frame in frames]
+    locations = [frame[c] for keys, frame in zip(present, frames) for c in keys]
+
+    if view == "TYPES" or view == "POPS" or (view == "CUSTOM" and spec[0] == "pos"):
+        div = HEXAGONAL_POINTS if geometry == HEXAGONAL else RECTANGULAR_POINTS
+        colors = iter(get_position_colors(locations, view, spec, div))
+
+        # Expand cell portions into fills of each triangle, offset by one to match still images
+        fills = {c: [[bgcol]*div for frame in frames] for c in coords}
+        for f, frame in enumerate(present):
+            for c in frame:
+                triangles = [fill for n, fill in next(colors) for i in range(0, n)]
+                fills[c][f] = triangles[-1:] + triangles[:-1]
+
+        rotations = make_position_paths(dx, dy)
+        paths = []
+        for x, y, c in zip(cx.tolist(), cy.tolist(), coords):
+            starts, sides = rotations[int(rng.random()*div)]
+            prefix = "M " + str(x) + "," + str(y) + " l "
+            for k in range(0, div):
+                element = '<path d="' + prefix + starts[k] + " l " + sides[k] + ' z" />'
+                paths.append(draw_animated(element, "fill", [fill[k] for fill in fills[c]], keyTimes, duration))
+    else:
+        colors = iter(get_location_colors(locations, view, bgcol, spec))
+
+        fills = {c: [bgcol]*len(frames) for c in coords}
+        for f, frame in enumerate(present):
+            for c in frame:
+                fills[c][f] = next(colors)
+
+        elements = draw_locations(cx, cy, [""]*len(coords), dx, dy)
+        paths = [draw_animated(element.replace(' fill=""', ""), "fill", fills[c], keyTimes, duration)
+                 for element, c in zip(elements, coords)]
+
     return paths
 
-def _image(jsn, saveLoc, T, S, R, view, filename, nosave, ignore, bgcol, spec, padding):
+@scripts.profile.profile_stages.profile_stage(items='T')
+def _animate(jsn, saveLoc, T, S, R, view, filename, nosave, ignore, bgcol, spec, padding, duration, output='SVG'):
+    """Create animated image of ABM simulation instance across time points, drawing geometry once."""
+
+    HEXAGONAL, RECTANGULAR = define_coord_constants()
+
+    r, H, time, pops, types = scripts.parse.parse_utilities.parse_fields(jsn)
+
+    if R == "auto":
+        R = r
+    else:
+        R = int(R)
+
+    timepoints = index_timepoints(jsn)
+
+    if view == "GRAPH":
+        frames = [[(a[0][0], a[0][1], a[1][0], a[1][1], a[2][1]) for a in timepoints[t]["graph"]] for t in T]
+
+        g = draw_animated_edges(frames, R, S, duration)
+
+        w = (2*S/sqrt(3))*(3*R - 1)
+        h = S*(4*R - 2)
+
+        if not nosave:
+            save_svg([g], w, h, saveLoc + filename.split("/")[-1], view, "animated", bgcol, padding, output)
+
+        return
+
+    # Map coordinates to cells in each frame, removing ignored populations.
+    frames = []
+    for t in T:
+        tp = [(tuple(i[0]), [c for c in i[1] if c[1] not in ignore]) for i in timepoints[t]["cells"]]
+        frames.append({coord: cells for coord, cells in tp if len(cells) > 0})
+
+    # Detect if hexagonal or rectangular coordinates.
+    nc = len(next(iter(frames[0])))
+
+    # Group union of coordinates across frames by z.
+    layers = {z: {} for z in range(-H + 1, H)}
+    for frame in frames:
+        for coord in frame:
+            if coord[nc - 1] in layers:
+                layers[coord[nc - 1]].setdefault(coord, None)
+
+    # Draw each layer.
+    rng = make_image_rng(filename, view, "animated")
+    contents = ['<g id="z' + str(z) + '">'
+                + "".join(draw_animated_layer(list(layer), frames, R, S, view, bgcol, spec, nc, duration, rng)) + "</g>"
+                for z, layer in layers.items()]
+
+    # Calculate svg size and save.
+    w = (2*S/sqrt(3))*(3*R - 1) if nc == HEXAGONAL else S*(4*R - 2)
+    h = S*(4*R - 2)
+
+    if not nosave:
+        save_svg(contents, w, h, saveLoc + filename.split("/")[-1], view, "animated", bgcol, padding, output)
+
+@scripts.profile.profile_stages.profile_stage(items='T')
+def _image(jsn, saveLoc, T, S, R, view, filename, nosave, ignore, bgcol, spec, padding, output='SVG'):
     """Create image of ABM simulation instance."""
 
     HEXAGONAL, RECTANGULAR = define_coord_constants()
@@ -344,9 +779,11 @@ def _image(jsn, saveLoc, T, S, R, view, filename, nosave, ignore, bgcol, spec, p
     else:
         R = int(R)
 
+    timepoints = index_timepoints(jsn)
+
     for t in T:
         if view == "GRAPH":
-            tp = [tp["graph"] for tp in jsn["timepoints"] if tp["time"] == t][0]
+            tp = timepoints[t]["graph"]
             edges = [(a[0][0], a[0][1], a[1][0], a[1][1], a[2][1]) for a in tp]
 
             g = draw_edges(edges, R, S)
@@ -355,12 +792,14 @@ def _image(jsn, saveLoc, T, S, R, view, filename, nosave, ignore, bgcol, spec, p
             h = S*(4*R - 2)
 
             if not nosave:
-                save_svg(g, w, h, saveLoc + filename.split("/")[-1], view, t, bgcol, padding)
+                save_svg([g], w, h, saveLoc + filename.split("/")[-1], view, t, bgcol, padding, output)
 
             continue
 
+        rng = make_image_rng(filename, view, t)
+
         # Select appropriate time point from data.
-        tp = [tp["cells"] for tp in jsn["timepoints"] if tp["time"] == t][0]
+        tp = timepoints[t]["cells"]
 
         # Remove ignored populations
         tp = [[i[0], [c for c in i[1] if c[1] not in ignore]] for i in tp]
@@ -369,27 +808,34 @@ def _image(jsn, saveLoc, T, S, R, view, filename, nosave, ignore, bgcol, spec, p
         # Detect if hexagonal or rectangular coordinates.
         nc = len(tp[0][0])
 
-        # Group entries in timepoint by z.
-        if nc == HEXAGONAL:
-            ztp = [[((a[0][0], a[0][1], a[0][2]), get_colors(a[1], view, bgcol, spec, HEXAGONAL_POINTS))
-                    for a in tp if a[0][3] == (z - H + 1)] for z in range(0, 2 * H - 1)]
-            zg = ['<g id="z' + str(i) + '">' for i in range(-H + 1, H)]
-        else:
-            ztp = [[((a[0][0], a[0][1]), get_colors(a[1], view, bgcol, spec, RECTANGULAR_POINTS))
-                    for a in tp if a[0][2] == (z - H + 1)] for z in range(0, 2 * H - 1)]
-            zg = ['<g id="z' + str(i) + '">' for i in range(-H + 1, H)]
+        # Group entries in timepoint by z in a single pass.
+        layers = {z: [] for z in range(-H + 1, H)}
+        for a in tp:
+            if a[0][nc - 1] in layers:
+                layers[a[0][nc - 1]].append(a)
 
         # Draw each layer.
-        layers = [g + draw_layer(z, R, S, nc) + "</g>" for g, z in zip(zg, ztp)]
+        contents = ['<g id="z' + str(z) + '">' + "".join(draw_layer(layer, R, S, view, bgcol, spec, nc, rng)) + "</g>"
+                    for z, layer in layers.items()]
 
         # Calculate svg size and save.
         w = (2*S/sqrt(3))*(3*R - 1) if nc == HEXAGONAL else S*(4*R - 2)
         h = S*(4*R - 2)
 
         if not nosave:
-            save_svg("\n".join(layers), w, h, saveLoc + filename.split("/")[-1], view, t, bgcol, padding)
+            save_svg(contents, w, h, saveLoc + filename.split("/")[-1], view, t, bgcol, padding, output)
+
+def draw_views(jsn, saveLoc, T, S, R, view, filename, nosave, ignore, bgcol, spec, padding, output, animate, duration):
+    """Draw view as raster images, animated image, or one image per time point."""
+
+    if output == 'PNG' and view != "GRAPH":
+        _raster(jsn, saveLoc, T, S, R, view, filename, nosave, ignore, bgcol, spec, padding)
+    elif animate:
+        _animate(jsn, saveLoc, T, S, R, view, filename, nosave, ignore, bgcol, spec, padding, duration, output)
+    else:
+        _image(jsn, saveLoc, T, S, R, view, filename, nosave, ignore, bgcol, spec, padding, output)
 
-def image(files, saveLoc='', size='4', time='7,14,21', inds='0', radius='auto', bgcol='#000000', padding='10', ignore='-1', number=False, tissue=False, volume=False, types=False, pops=False, graph=False, custom=False, spec='loc:3:1:0,3,6:ff0000,00ff00,0000ff:hsv', nosave=False, noprint=False):
+def image(files, saveLoc='', size='4', time='7,14,21', inds='0', radius='auto', bgcol='#000000', padding='10', ignore='-1', number=False, tissue=False, volume=False, types=False, pops=False, graph=False, custom=False, spec='loc:3:1:0,3,6:ff0000,00ff00,0000ff:hsv', nosave=False, noprint=False, output='svg', animate=False, duration='0.5', processes=None):
     """Create image of ABM simulaton files.
     Code adapted from Jessica S. Yu.
 
@@ -403,7 +849,8 @@ def image(files, saveLoc='', size='4', time='7,14,21', inds='0', radius='auto',
         image(files, saveLoc='', size='4', time='7,14,21', inds='0', radius='auto',
             bgcol='#000000', padding='10', ignore='-1', number=False, tissue=False,
             volume=False, types=False, pops=False, graph=False, custom=False,
-            spec='loc:3:1:0,3,6:ff0000,00ff00,0000ff:hsv', nosave=False, noprint=False)
+            spec='loc:3:1:0,3,6:ff0000,00ff00,0000ff:hsv', nosave=False, noprint=False, output='svg',
+            animate=False, duration='0.5', processes=None)
 
         files
             Path to .json, .tar.xz, or directory.
@@ -447,6 +894,18 @@ def image(files, saveLoc='', size='4', time='7,14,21', inds='0', radius='auto',
             Do not save results to file (default: False).
         [noprint]
             Do not print results to console (default: False).
+        [output]
+            Image output format, one of svg, svgz (compressed svg), auto (svgz for large images),
+            or png (raster image per time point, graph view is saved as svg) (default: svg).
+        [animate]
+            Draw one animated image across all time points instead of one image per time point,
+            with geometry drawn once and colors changing each frame (default: False).
+        [duration]
+            Duration of each frame of animated image in seconds (default: 0.5).
+        [processes]
+            Number of worker processes to render images in (default: all cores). Each file, seed, view,
+            and time point is rendered separately with rotations seeded from file name, view, and time
+            point, so images do not depend on number of processes.
 
         Must set one of of the following to True: number, tissue, volume, types, pops.
     """
@@ -462,6 +921,9 @@ def image(files, saveLoc='', size='4', time='7,14,21', inds='0', radius='auto',
     radius = radius
     ignore = [int(x) for x in ignore.split(",")]
     padding = int(padding)
+    output = check_image_output_arg(output)
+    duration = float(duration)
+    processes = multiprocessing.cpu_count() if processes is None or int(processes) < 1 else int(processes)
     views = []
     views.append("NUMBER") if number else []
     views.append("TISSUE") if tissue else []
@@ -471,26 +933,29 @@ def image(files, saveLoc='', size='4', time='7,14,21', inds='0', radius='auto',
     views.append("GRAPH") if graph else []
     views.append("CUSTOM") if custom else []
 
-    # Set random seed for position rotations
-    random.seed(0)
-
     # Load custom spec if specified.
     spec = spec.split(":") if custom else []
 
-    # Load json either directly or extract from archive.
-    for f in scripts.parse.parse_utilities.get_files(files):
-        filename = f.split("/")[-1]
-        print(filename) if not noprint else []
-
-        if scripts.parse.parse_utilities.is_tar(f):
-            tar_file = tar.open(f, "r:xz")
-            for i, member in enumerate(tar_file.getmembers()):
-                ind = int(member.name.split("_")[-1].split(".")[0])
-                if ind in inds:
-                    print("   > " + member.name) if not noprint else []
-                    name = f.replace(filename, member.name)
-                    [_image(scripts.parse.parse_utilities.load_tar(tar_file, member), saveLoc, times, size, radius, v, name, nosave, ignore, bgcol, spec, padding) for v in views]
-        else:
-            [_image(scripts.parse.parse_utilities.load_json(f), saveLoc, times, size, radius, v, f, nosave, ignore, bgcol, spec, padding) for v in views]
+    # Render each file, seed, view, and time point as separate task.
+    OPTIONS = {
+        "SAVELOC": saveLoc,
+        "SIZE": size,
+        "RADIUS": radius,
+        "NOSAVE": nosave,
+        "IGNORE": ignore,
+        "BGCOL": bgcol,
+        "SPEC": spec,
+        "PADDING": padding,
+        "OUTPUT": output,
+        "ANIMATE": animate,
+        "DURATION": duration
+    }
+    TASKS = scripts.image.image_tasks.make_image_tasks(files, inds, views, times, animate, noprint)
+
+    # Each worker keeps up to two loaded simulations for following images of the same simulation
+    if len(TASKS) > 0:
+        processes = scripts.memory.memory.limit_processes(processes, 2 * max([scripts.memory.memory.estimate_file_memory(f) for f, member, view, T in TASKS]))
+
+    scripts.image.image_tasks.render_image_tasks(TASKS, OPTIONS, processes)
 
     return
\ No newline at end of file
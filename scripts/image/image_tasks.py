@@ -0,0 +1,79 @@
+import collections
+import functools
+import math
+import multiprocessing
+import tarfile as tar
+import time
+import scripts.parse.parse_utilities
+import scripts.image.image
+
+def make_image_tasks(files, inds, views, times, animate, noprint):
+    """Make image task for each file, seed, view, and time point (or all time points if animated)."""
+
+    TASKS = []
+
+    for f in scripts.parse.parse_utilities.get_files(files):
+        filename = f.split("/")[-1]
+        print(filename) if not noprint else []
+
+        if scripts.parse.parse_utilities.is_tar(f):
+            members = []
+            with tar.open(f, "r:xz") as tar_file:
+                for member in tar_file.getmembers():
+                    ind = int(member.name.split("_")[-1].split(".")[0])
+                    if ind in inds:
+                        print("   > " + member.name) if not noprint else []
+                        members.append(member.name)
+        else:
+            members = [None]
+
+        for member in members:
+            for view in views:
+                for T in ([times] if animate else [[t] for t in times]):
+                    TASKS.append((f, member, view, tuple(T)))
+
+    return TASKS
+
+@functools.lru_cache(maxsize=2)
+def load_image_json(file, member):
+    """Load simulation json from file or archive member, keeping most recent loaded for following tasks."""
+
+    if member is None:
+        return scripts.parse.parse_utilities.load_json(file)
+
+    with tar.open(file, "r:xz") as tar_file:
+        return scripts.parse.parse_utilities.load_tar(tar_file, tar_file.getmember(member))
+
+def render_image_task(task, OPTIONS):
+    """Render image task and return task and time taken."""
+
+    f, member, view, T = task
+
+    start = time.time()
+
+    jsn = load_image_json(f, member)
+    name = f if member is None else f.replace(f.split("/")[-1], member)
+
+    scripts.image.image.draw_views(jsn, OPTIONS['SAVELOC'], list(T), OPTIONS['SIZE'], OPTIONS['RADIUS'], view, name,
+                                   OPTIONS['NOSAVE'], OPTIONS['IGNORE'], OPTIONS['BGCOL'], OPTIONS['SPEC'],
+                                   OPTIONS['PADDING'], OPTIONS['OUTPUT'], OPTIONS['ANIMATE'], OPTIONS['DURATION'])
+
+    return task, time.time() - start
+
+def render_image_tasks(TASKS, OPTIONS, PROCESSES):
+    """Render all image tasks, in a pool of worker processes if more than one process requested."""
+
+    # Images are seeded by file, view, and time so output does not depend on task order or number of processes
+    if PROCESSES == 1 or len(TASKS) <= 1:
+        timings = [render_image_task(task, OPTIONS) for task in TASKS]
+    else:
+        # Send consecutive tasks of the same simulation to the same worker so it is not loaded by every worker
+        perSim = max(collections.Counter([(f, member) for f, member, view, T in TASKS]).values())
+        chunksize = max(1, min(perSim, math.ceil(len(TASKS)/PROCESSES)))
+
+        with multiprocessing.Pool(min(PROCESSES, len(TASKS))) as pool:
+            timings = list(pool.imap(functools.partial(render_image_task, OPTIONS=OPTIONS), TASKS, chunksize=chunksize))
+
+    load_image_json.cache_clear()
+
+    return timings
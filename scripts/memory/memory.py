@@ -0,0 +1,194 @@
+import os
+import platform
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+'''
+Memory budget of stages and their worker processes.
+
+The budget is the memory a run may use in total (the process and its worker processes), such as the
+memory allocated to a job on a shared cluster. It is set with set_memory_budget (or --memory on the
+command line) and kept in the environment so worker processes see the same budget. Stages estimate the
+memory they need from the size of their input files before loading them and, if it would not fit,
+use fewer worker processes, wait for running work to finish, or load and save data in parts instead
+of running out of memory. Without a budget, stages run as they would otherwise.
+'''
+
+def make_memory_dict():
+    """Make memory options from environment so worker processes use the same budget as their parent."""
+
+    budget = os.environ.get('CARCADE_MEMORY_BUDGET', '')
+
+    MEMORY = {
+        "BUDGET": int(budget) if budget != '' else None
+    }
+
+    return MEMORY
+
+# Memory options, no budget unless one is set
+MEMORY = make_memory_dict()
+
+def define_memory_units():
+    """Define size in bytes of each memory unit suffix."""
+
+    UNITS = {
+        'K': 1024,
+        'M': 1024**2,
+        'G': 1024**3,
+        'T': 1024**4
+    }
+
+    return UNITS
+
+def define_file_memory_factors():
+    """Define memory used to load files of each extension as a multiple of their size on disk."""
+
+    # Compressed simulation json expands into json text and then into lists of python objects
+    FACTORS = {
+        '.tar.xz': 150,
+        '.json': 20,
+        '.pkl': 10
+    }
+
+    return FACTORS
+
+def define_table_value_size():
+    """Define memory in bytes used by each stored value of a table once loaded into lists."""
+
+    VALUE_SIZE = 40
+
+    return VALUE_SIZE
+
+def parse_memory_size(size):
+    """Parse memory size given in bytes or with K, M, G, or T suffix (such as 8G) into bytes."""
+
+    UNITS = define_memory_units()
+
+    size = str(size).strip().upper().rstrip('B')
+
+    try:
+        if size[-1:] in UNITS:
+            return int(float(size[:-1]) * UNITS[size[-1]])
+        return int(float(size))
+    except ValueError:
+        raise ValueError('Memory size ' + str(size) + ' must be a number of bytes or end in K, M, G, or T')
+
+def set_memory_budget(budget):
+    """Set memory budget of run, empty (or None) to remove budget.
+
+    Budget is also set in the environment so it applies to stages run in worker processes.
+    """
+
+    if budget is None or str(budget) == '':
+        os.environ.pop('CARCADE_MEMORY_BUDGET', None)
+    else:
+        os.environ['CARCADE_MEMORY_BUDGET'] = str(parse_memory_size(budget))
+
+    MEMORY.update(make_memory_dict())
+
+    return
+
+def get_memory_budget():
+    """Get memory budget of run in bytes, None if no budget is set."""
+
+    return MEMORY["BUDGET"]
+
+def get_current_memory():
+    """Get current resident memory of process in bytes, using peak resident memory where not available."""
+
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, IndexError, ValueError):
+        peak, children = get_peak_memory()
+        return int(peak * 1024**2) if peak is not None else 0
+
+def get_peak_memory():
+    """Get peak resident memory of process and of its largest finished worker process in MB, None if not available."""
+
+    if resource is None:
+        return None, None
+
+    # Peak resident memory is in bytes on macOS and in kilobytes elsewhere
+    scale = 1024**2 if platform.system() == 'Darwin' else 1024
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+
+    return peak, children
+
+def get_available_memory():
+    """Get memory in bytes left in budget after memory used by process, None if no budget is set."""
+
+    if MEMORY["BUDGET"] is None:
+        return None
+
+    return MEMORY["BUDGET"] - get_current_memory()
+
+def estimate_file_memory(file, columns=None, exclude=[]):
+    """Estimate memory in bytes used to load file, or only given columns (if any) of stored tables."""
+
+    if file.endswith('.tbl'):
+        import scripts.storage.storage
+        return scripts.storage.storage.count_table_values(file, columns, exclude) * define_table_value_size()
+
+    FACTORS = define_file_memory_factors()
+    extension = '.tar.xz' if file.endswith('.tar.xz') else os.path.splitext(file)[1]
+
+    return os.path.getsize(file) * FACTORS.get(extension, FACTORS['.pkl'])
+
+def estimate_files_memory(files, columns=None, exclude=[]):
+    """Estimate memory in bytes used to load all given files."""
+
+    return sum([estimate_file_memory(file, columns, exclude) for file in files if os.path.exists(file)])
+
+def check_memory(needed, reserved=0):
+    """Check if memory needed fits in budget on top of memory reserved by running work, True if no budget is set."""
+
+    available = get_available_memory()
+
+    return available is None or needed + reserved <= available
+
+def limit_processes(processes, needed, noprint=False):
+    """Limit number of worker processes so each worker needing given memory fits in budget, using at least one."""
+
+    available = get_available_memory()
+
+    if available is None or needed <= 0:
+        return processes
+
+    limited = max(1, min(processes, int(available // needed)))
+
+    if limited < processes and not noprint:
+        print('\t\tLimiting to ' + str(limited) + ' processes to stay within memory budget of '
+              + format_memory(MEMORY["BUDGET"]) + ' (about ' + format_memory(needed) + ' per process).')
+
+    return limited
+
+def format_memory(size):
+    """Format memory size in bytes as MB."""
+
+    return '{:.1f} MB'.format(size / 1024**2)
+
+def report_peak_memory():
+    """Print peak memory of process and of its largest worker process, and budget if set."""
+
+    peak, children = get_peak_memory()
+
+    if peak is None:
+        return
+
+    report = 'Peak memory: ' + '{:.0f} MB'.format(peak)
+
+    if children > 0:
+        report += ' (largest worker process: ' + '{:.0f} MB'.format(children) + ')'
+
+    if MEMORY["BUDGET"] is not None:
+        report += ', budget ' + format_memory(MEMORY["BUDGET"])
+
+    print(report)
+
+    return
@@ -1,4 +1,5 @@
 import scripts.parse.parse_utilities
+import scripts.profile.profile_stages
 import csv
 import json
 import pickle
@@ -74,6 +75,38 @@ def get_struct(c):
     else:
         return (c[1], c[2], np.round(c[4]), -1)
 
+def define_environment_dtypes():
+    """Define numeric type of each parsed environment."""
+
+    ENV_DTYPES = {
+        "glucose": np.float16,
+        "oxygen": np.float16,
+        "tgfa": np.float16,
+        "IL-2": np.float32
+    }
+
+    return ENV_DTYPES
+
+def stack_arrays(arrays, count, dtype=None):
+    """Stack count equally shaped arrays into one array, copying each in as it is made so they are not all held twice."""
+
+    stacked = None
+
+    for i, array in enumerate(arrays):
+        array = np.asarray(array, dtype=dtype)
+        if stacked is None:
+            stacked = np.empty((count,) + array.shape, dtype=array.dtype)
+        stacked[i] = array
+
+    return stacked if stacked is not None else np.array([], dtype=dtype)
+
+def release_arrays(arrays):
+    """Yield arrays from list, removing each from the list so it can be freed once used."""
+
+    while len(arrays) > 0:
+        yield arrays.pop(0)
+
+@scripts.profile.profile_stages.profile_stage(items='lst')
 def parse_agents(lst, coords, H, N):
     """Parses cell agent fields."""
 
@@ -93,6 +126,7 @@ def parse_agents(lst, coords, H, N):
 
     return container
 
+@scripts.profile.profile_stages.profile_stage(items=lambda jsn, container: len(jsn["timepoints"]))
 def _parse(jsn, container):
     """Parse simulation instance."""
 
@@ -117,14 +151,13 @@ def _parse(jsn, container):
         coords = get_hex_coords(R)
         N = 54
 
-    # Parse agents.
-    container["agents"].append([parse_agents(tp["cells"], coords, H, N) for tp in jsn["timepoints"]])
+    # Parse agents, stacking time points as they are parsed.
+    T = len(jsn["timepoints"])
+    container["agents"].append(stack_arrays((parse_agents(tp["cells"], coords, H, N) for tp in jsn["timepoints"]), T))
 
-    # Parse environments.
-    container["environments"]["glucose"].append([tp["molecules"]["glucose"] for tp in jsn["timepoints"]])
-    container["environments"]["oxygen"].append([tp["molecules"]["oxygen"] for tp in jsn["timepoints"]])
-    container["environments"]["tgfa"].append([tp["molecules"]["tgfa"] for tp in jsn["timepoints"]])
-    container["environments"]["IL-2"].append([tp["molecules"]["IL-2"] for tp in jsn["timepoints"]])
+    # Parse environments, converting to arrays of their final type so lists are not kept for all seeds.
+    for x, dtype in define_environment_dtypes().items():
+        container["environments"][x].append(stack_arrays((tp["molecules"][x] for tp in jsn["timepoints"]), T, dtype))
 
     # Add simulation setup to container.
     if not "setup" in container:
@@ -205,12 +238,6 @@ def parse(files, saveLoc='', exclude=[], nosave=False, noprint=False):
             }
         }
 
-        envdtypes = { "glucose": np.float16,
-                      "oxygen": np.float16,
-                      "tgfa": np.float16,
-                      "IL-2": np.float32
-        }
-
         if scripts.parse.parse_utilities.is_tar(f):
             tar_file = tar.open(f, "r:xz")
             for i, member in enumerate(tar_file.getmembers()):
@@ -222,10 +249,10 @@ def parse(files, saveLoc='', exclude=[], nosave=False, noprint=False):
         else:
             _parse(scripts.parse.parse_utilities.load_json(f), container)
 
-        # Compile data.
+        # Compile data, releasing arrays of each seed once copied so parsed data is not held twice.
         data = {
-            "agents": np.array(container['agents']),
-            "environments": { x: np.array(container['environments'][x], dtype=envdtypes[x])
+            "agents": stack_arrays(release_arrays(container['agents']), len(container['agents'])),
+            "environments": { x: stack_arrays(release_arrays(container['environments'][x]), len(container['environments'][x]))
                 for x in container["environments"].keys() },
             "setup": container["setup"]
         }
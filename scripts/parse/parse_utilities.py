@@ -37,6 +37,11 @@ def is_pkl(f):
 
     return f[-4:] == ".pkl"
 
+def is_table(f):
+    """Check if file has .tbl extension."""
+
+    return f[-4:] == ".tbl"
+
 def load_tar(tar_file, member):
     """Load .tar file."""
 
@@ -0,0 +1,409 @@
+import scripts.pipeline.pipeline_nodes
+import scripts.pipeline.pipeline_state
+import scripts.memory.memory
+import contextlib
+import importlib
+import multiprocessing
+import os
+import queue
+import re
+import shutil
+import time
+import traceback
+
+def check_views_arg(image):
+    """Check image views requested."""
+
+    VIEWS = [view.strip().lower() for view in image.split(',') if view.strip() != '']
+    ALL_VIEWS = ['number', 'tissue', 'volume', 'types', 'pops']
+
+    if any([view not in ALL_VIEWS for view in VIEWS]):
+        print('image views must be from ' + ', '.join(ALL_VIEWS) + ', not drawing images')
+        return []
+
+    return VIEWS
+
+def check_analyses_arg(analyses):
+    """Check analyses requested."""
+
+    ALL_ANALYSES = scripts.pipeline.pipeline_nodes.define_pipeline_analyses()
+    ANALYSES = [analysis.strip().lower() for analysis in analyses.split(',') if analysis.strip() != '']
+
+    if any([analysis not in ALL_ANALYSES for analysis in ANALYSES]):
+        print('analyses must be from ' + ', '.join(ALL_ANALYSES) + ', running cells analysis')
+        return ['cells']
+
+    return ANALYSES
+
+def get_node_file_name(ID):
+    """Get name safe for files from node ID."""
+
+    return re.sub(r'[^A-Za-z0-9_.\-]', '_', ID)
+
+def initialize_pipeline_worker():
+    """Initialize worker process to render figures with headless Agg backend."""
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    return
+
+def fail_pipeline_node(ID, error):
+    """Make result of node whose worker process failed before returning."""
+
+    return ID, 0, type(error).__name__ + ': ' + str(error)
+
+def run_pipeline_node(node, TMPLOC, LOGLOC):
+    """Run node into its own temporary location with output logged to file, and return time taken and error if any."""
+
+    name = get_node_file_name(node["ID"])
+    saveLoc = TMPLOC + name + '/'
+
+    if os.path.exists(saveLoc):
+        shutil.rmtree(saveLoc)
+    os.makedirs(saveLoc)
+
+    start = time.time()
+    error = None
+
+    with open(LOGLOC + name + '.log', 'w') as log, contextlib.redirect_stdout(log):
+        try:
+            function = getattr(importlib.import_module(node["MODULE"]), node["FUNCTION"])
+            function(*node["ARGS"], saveLoc=saveLoc, **node["KWARGS"])
+        except Exception as e:
+            traceback.print_exc(file=log)
+            error = type(e).__name__ + ': ' + str(e)
+
+    return node["ID"], time.time() - start, error
+
+def move_node_outputs(node, TMPLOC):
+    """Move files made by node from its temporary location to its destination and return their new locations."""
+
+    saveLoc = TMPLOC + get_node_file_name(node["ID"]) + '/'
+    outputs = []
+
+    for root, dirs, files in os.walk(saveLoc):
+        for f in sorted(files):
+            relative = os.path.relpath(os.path.join(root, f), saveLoc)
+            dest = os.path.join(node["DEST"], relative)
+
+            if not os.path.exists(os.path.dirname(dest)):
+                os.makedirs(os.path.dirname(dest))
+
+            os.replace(os.path.join(root, f), dest)
+            outputs.append(dest)
+
+    shutil.rmtree(saveLoc)
+
+    return outputs
+
+def get_critical_path(nodes, order, seconds):
+    """Get path of dependent nodes with longest total time and its total time."""
+
+    finish = {}
+    previous = {}
+
+    for ID in order:
+        deps = [dep for dep in nodes[ID]["DEPS"] if dep in finish]
+        previous[ID] = max(deps, key=lambda dep: finish[dep]) if len(deps) > 0 else None
+        finish[ID] = seconds.get(ID, 0) + (finish[previous[ID]] if previous[ID] is not None else 0)
+
+    if len(finish) == 0:
+        return [], 0
+
+    ID = max(finish, key=lambda node: finish[node])
+    total = finish[ID]
+
+    path = []
+    while ID is not None:
+        path.append(ID)
+        ID = previous[ID]
+
+    return path[::-1], total
+
+def print_pipeline_report(nodes, order, status, seconds, wall):
+    """Print number of nodes run, skipped, and failed, with critical path of run."""
+
+    counts = {s: len([ID for ID in order if status[ID] == s]) for s in ['RUN', 'CURRENT', 'FAILED', 'BLOCKED']}
+
+    print('Pipeline finished in ' + '{:.1f}'.format(wall) + ' s: ' + str(counts['RUN']) + ' run, '
+          + str(counts['CURRENT']) + ' up to date, ' + str(counts['FAILED']) + ' failed, '
+          + str(counts['BLOCKED']) + ' blocked by failures.')
+
+    if counts['RUN'] > 0:
+        print('Total node time ' + '{:.1f}'.format(sum(seconds.values())) + ' s.')
+
+    path, total = get_critical_path(nodes, order, seconds)
+
+    if total > 0:
+        print('Critical path (' + '{:.1f}'.format(total) + ' s):')
+        for ID in path:
+            print('\t' + '{:8.2f}'.format(seconds.get(ID, 0)) + ' s  ' + ID)
+
+    for ID in order:
+        if status[ID] == 'FAILED':
+            print('Failed: ' + ID)
+
+    return
+
+def run_pipeline_nodes(nodes, state, OPTIONS):
+    """Run stale nodes once all nodes they depend on are done, running independent nodes concurrently."""
+
+    LOCATIONS = OPTIONS['LOCATIONS']
+    TMPLOC = LOCATIONS["STATE"] + 'tmp/'
+    LOGLOC = LOCATIONS["STATE"] + 'logs/'
+
+    for loc in [TMPLOC, LOGLOC]:
+        if not os.path.exists(loc):
+            os.makedirs(loc)
+
+    nodes = {node["ID"]: node for node in nodes}
+    pending = list(nodes)
+    running = {}
+    status = {}
+    signatures = {}
+    seconds = {}
+    order = []
+
+    # Stale nodes waiting for a worker (and memory) to run and estimated memory of running nodes
+    ready = []
+    reserved = {}
+    waiting = set()
+
+    start = time.time()
+    finished = queue.Queue()
+    pool = None
+    if OPTIONS['PROCESSES'] > 1:
+        pool = multiprocessing.Pool(OPTIONS['PROCESSES'], initializer=initialize_pipeline_worker)
+
+    def complete(ID, outputs):
+        """Mark node done and add nodes that use its outputs."""
+
+        status[ID] = 'RUN' if ID in seconds else 'CURRENT'
+        order.append(ID)
+
+        if nodes[ID]["STAGE"] == 'subset':
+            for child in scripts.pipeline.pipeline_nodes.make_subset_output_nodes(nodes[ID], outputs, OPTIONS['COLOR'],
+                                                                                  OPTIONS['STATS'], OPTIONS['CACHE'],
+                                                                                  LOCATIONS):
+                if child["STAGE"] in OPTIONS['STAGES'] and child["ID"] not in nodes:
+                    nodes[child["ID"]] = child
+                    pending.append(child["ID"])
+
+    try:
+        while len(pending) > 0 or len(running) > 0:
+            for ID in list(pending):
+                node = nodes[ID]
+                deps = [status.get(dep) for dep in node["DEPS"]]
+
+                if any([dep in ['FAILED', 'BLOCKED'] for dep in deps]):
+                    pending.remove(ID)
+                    status[ID] = 'BLOCKED'
+                    order.append(ID)
+                    continue
+                elif any([dep not in ['RUN', 'CURRENT'] for dep in deps]):
+                    continue
+
+                pending.remove(ID)
+
+                signature = scripts.pipeline.pipeline_state.make_node_signature(state, node)
+                signatures[ID] = signature
+
+                # Nodes using outputs of nodes that would run in a dry run would also run
+                stale = (signature is None or node["STAGE"] in OPTIONS['FORCE']
+                         or (OPTIONS['DRYRUN'] and 'RUN' in deps)
+                         or not scripts.pipeline.pipeline_state.check_node_current(state, node, signature))
+
+                if not stale:
+                    complete(ID, scripts.pipeline.pipeline_state.get_node_outputs(state, ID))
+                elif OPTIONS['DRYRUN']:
+                    print('\t' + 'would run ' + ID)
+                    seconds[ID] = state["NODES"].get(ID, {}).get("SECONDS", 0)
+                    complete(ID, [])
+                elif signature is None:
+                    print('\t' + 'missing inputs for ' + ID)
+                    status[ID] = 'FAILED'
+                    order.append(ID)
+                elif pool is None:
+                    running[ID] = None
+                    finished.put(run_pipeline_node(node, TMPLOC, LOGLOC))
+                else:
+                    ready.append(ID)
+
+            # Start ready nodes while workers are free and their estimated memory fits in budget, always running one
+            while len(ready) > 0 and len(running) < OPTIONS['PROCESSES']:
+                ID = ready[0]
+                needed = scripts.memory.memory.estimate_files_memory(nodes[ID]["INPUTS"])
+
+                if len(running) > 0 and not scripts.memory.memory.check_memory(needed, sum(reserved.values())):
+                    if ID not in waiting:
+                        print('\t' + 'waiting for memory to run ' + ID)
+                        waiting.add(ID)
+                    break
+
+                ready.pop(0)
+                reserved[ID] = needed
+                running[ID] = pool.apply_async(run_pipeline_node, (nodes[ID], TMPLOC, LOGLOC), callback=finished.put,
+                                               error_callback=lambda e, ID=ID: finished.put(fail_pipeline_node(ID, e)))
+
+            if len(running) == 0:
+                # Nodes depending on nodes that are not in pipeline can never run
+                if not any([all([status.get(dep) in ['RUN', 'CURRENT'] for dep in nodes[ID]["DEPS"]]) for ID in pending]):
+                    for ID in pending:
+                        status[ID] = 'BLOCKED'
+                        order.append(ID)
+                    pending.clear()
+                continue
+
+            ID, nodeSeconds, error = finished.get()
+            del running[ID]
+            reserved.pop(ID, None)
+            node = nodes[ID]
+
+            if error is not None:
+                print('\t' + '{:8.2f}'.format(nodeSeconds) + ' s  ' + ID + '  ' + error)
+                status[ID] = 'FAILED'
+                order.append(ID)
+                continue
+
+            print('\t' + '{:8.2f}'.format(nodeSeconds) + ' s  ' + ID)
+
+            outputs = move_node_outputs(node, TMPLOC)
+            scripts.pipeline.pipeline_state.remove_node_outputs(state, ID, keep=outputs)
+            scripts.pipeline.pipeline_state.record_node(state, node, signatures[ID], outputs, nodeSeconds)
+            scripts.pipeline.pipeline_state.save_pipeline_state(LOCATIONS["STATE"], state)
+
+            seconds[ID] = nodeSeconds
+            complete(ID, outputs)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    return nodes, order, status, seconds, time.time() - start
+
+def remove_unused_nodes(state, nodes):
+    """Remove outputs and records of nodes not in pipeline whose inputs were removed, such as those of removed conditions."""
+
+    removed = True
+
+    # Removing outputs of a node can remove inputs of nodes using them
+    while removed:
+        removed = False
+
+        for ID in list(state["NODES"]):
+            if ID in nodes or all([os.path.exists(scripts.pipeline.pipeline_state.get_root_path(state, path))
+                                   for path in state["NODES"][ID]["INPUTS"]]):
+                continue
+
+            scripts.pipeline.pipeline_state.remove_node_outputs(state, ID)
+            del state["NODES"][ID]
+            removed = True
+
+    return
+
+def pipeline(files, saveLoc, xmlName='', lysis='', subsets='', analyses='cells,environment,spatial,lysed', color='X',
+             stats=True, plot=True, image='', time='7,14,21', processes=None, force='', dryrun=False, cache=''):
+    """Run pipeline stages on simulation files, only running stages whose inputs changed since last run.
+
+    pipeline builds a graph of nodes over files: each simulation file is parsed, each parsed (and lysis)
+    file is analyzed, each requested subset is made from the analyzed files it includes, and each subset
+    file is plotted (and stats calculated for cell subsets). Images are drawn for each simulation file.
+    Outputs are saved in saveLoc as:
+
+        parsed/                     parsed simulations
+        analyzed/<analysis>/        analyzed simulations
+        subset/<analysis>/          subsets of analyzed simulations
+        figures/<analysis>/         figures of subsets
+        stats/                      stats of cell subsets
+        images/                     images of simulations
+        .pipeline/                  pipeline state and node logs
+
+    A node is run only if the contents of its input files or its options changed since it last completed,
+    or if its outputs were changed or removed, so adding a condition only runs nodes whose inputs include
+    it. Nodes that do not depend on each other are run at the same time in worker processes. Outputs of
+    nodes whose input files were removed (such as those of removed conditions) are removed after each run.
+
+    Usage:
+        pipeline(files, saveLoc, xmlName='', lysis='', subsets='', analyses='cells,environment,spatial,lysed',
+            color='X', stats=True, plot=True, image='', time='7,14,21', processes=None, force='', dryrun=False,
+            cache='')
+
+        files
+            Path to .tar.xz and .json simulation files or directory.
+        saveLoc
+            Location of where to save outputs.
+        [xmlName]
+            Name of XML file used to generate dataset, used to name subsets, empty to not subset (default: '').
+        [lysis]
+            Path to .LYSIS.json files or directory, needed for lysed analysis (default: '').
+        [subsets]
+            Semicolon separated list of subsets as in subset_data, empty for all data in one subset (default: '').
+        [analyses]
+            Comma separated list of analyses from cells, environment, spatial, lysed, and sharedlocs
+            (default: cells,environment,spatial,lysed).
+        [color]
+            Feature to color figures by, see plot_data (default: X). With X, figures of subset files
+            that do not vary along exactly one feature (such as the ALL subset) are colored by DOSE.
+        [stats]
+            Calculate stats of cell subsets (default: True).
+        [plot]
+            Plot subsets (default: True).
+        [image]
+            Comma separated list of image views from number, tissue, volume, types, and pops, empty to not
+            draw images (default: '').
+        [time]
+            Time points of images, see image (default: 7,14,21).
+        [processes]
+            Number of nodes to run at the same time (default: all cores).
+        [force]
+            Comma separated list of stages to run even if up to date, from parse, analyze, subset, stats,
+            plot, and image (default: '').
+        [dryrun]
+            Print nodes that would run without running them (default: False).
+        [cache]
+            Directory of results cache shared across stages passed to analyze and stats, so results
+            already calculated by other runs or users are reused, empty to not cache (default: '').
+    """
+
+    LOCATIONS = scripts.pipeline.pipeline_nodes.define_pipeline_locations(saveLoc)
+    ANALYSES = check_analyses_arg(analyses)
+    VIEWS = check_views_arg(image)
+    SUBSETS = subsets.split(';') if subsets != '' else ['']
+
+    if 'lysed' in ANALYSES and lysis == '':
+        ANALYSES.remove('lysed')
+
+    STAGES = ['parse', 'analyze', 'subset', 'image'] + (['stats'] if stats else []) + (['plot'] if plot else [])
+
+    OPTIONS = {
+        'LOCATIONS': LOCATIONS,
+        'COLOR': color,
+        'STATS': stats,
+        'STAGES': STAGES,
+        'PROCESSES': multiprocessing.cpu_count() if processes is None else int(processes),
+        'FORCE': [stage.strip() for stage in force.split(',')],
+        'DRYRUN': dryrun,
+        'CACHE': cache
+    }
+
+    state = scripts.pipeline.pipeline_state.load_pipeline_state(LOCATIONS["STATE"])
+
+    nodes = scripts.pipeline.pipeline_nodes.make_pipeline_nodes(files, lysis, ANALYSES, SUBSETS, xmlName, VIEWS, time,
+                                                                cache, LOCATIONS)
+
+    for node in nodes:
+        if not os.path.exists(node["DEST"]):
+            os.makedirs(node["DEST"])
+
+    print('Running pipeline of ' + str(len(nodes)) + ' nodes (before plot and stats nodes are added):')
+
+    nodes, order, status, seconds, wall = run_pipeline_nodes(nodes, state, OPTIONS)
+
+    if not dryrun:
+        remove_unused_nodes(state, nodes)
+        scripts.pipeline.pipeline_state.save_pipeline_state(LOCATIONS["STATE"], state)
+
+    print_pipeline_report(nodes, order, status, seconds, wall)
+
+    return
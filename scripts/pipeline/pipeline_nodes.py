@@ -0,0 +1,186 @@
+import scripts.parse.parse_utilities
+import scripts.analyze.analyze_utilities
+import scripts.subset.subset
+import os
+
+def define_pipeline_analyses():
+    """Define analyses with their module, function, options, and analyzed data type."""
+
+    ANALYSES = {
+        'cells': ('scripts.analyze.analyze_cells', 'analyze_cells', {}, 'ANALYZED'),
+        'environment': ('scripts.analyze.analyze_env', 'analyze_env', {}, 'ENVIRONMENT'),
+        'spatial': ('scripts.analyze.analyze_spatial', 'analyze_spatial', {}, 'SPATIAL'),
+        'lysed': ('scripts.analyze.analyze_lysis', 'analyze_lysis', {}, 'LYSED'),
+        'sharedlocs': ('scripts.analyze.analyze_cells', 'analyze_cells', {'sharedLocs': True}, 'SHAREDLOCS')
+    }
+
+    return ANALYSES
+
+def define_pipeline_locations(SAVELOC):
+    """Define locations of outputs of each stage and of pipeline state."""
+
+    LOCATIONS = {
+        "PARSED": SAVELOC + 'parsed/',
+        "ANALYZED": SAVELOC + 'analyzed/',
+        "SUBSET": SAVELOC + 'subset/',
+        "STATS": SAVELOC + 'stats/',
+        "FIGURES": SAVELOC + 'figures/',
+        "IMAGES": SAVELOC + 'images/',
+        "STATE": SAVELOC + '.pipeline/'
+    }
+
+    return LOCATIONS
+
+def make_node(ID, STAGE, MODULE, FUNCTION, ARGS, KWARGS, INPUTS, DEST, DEPS):
+    """Make pipeline node calling stage function on input files and saving outputs to destination."""
+
+    node = {
+        "ID": ID,
+        "STAGE": STAGE,
+        "MODULE": MODULE,
+        "FUNCTION": FUNCTION,
+        "ARGS": ARGS,
+        "KWARGS": KWARGS,
+        "INPUTS": INPUTS,
+        "DEST": DEST,
+        "DEPS": DEPS
+    }
+
+    return node
+
+def get_simulation_name(file):
+    """Get name of simulation file without location and extension."""
+
+    return os.path.basename(file).replace('.tar.xz', '').replace('.LYSIS.json', '').replace('.json', '').replace('.pkl', '').replace('.tbl', '')
+
+def make_parse_nodes(FILES, LOCATIONS):
+    """Make node parsing each simulation file, returning nodes and parsed file made by each node."""
+
+    nodes = []
+    parsed = {}
+
+    for file in FILES:
+        name = get_simulation_name(file)
+        ID = 'parse:' + name
+
+        nodes.append(make_node(ID, 'parse', 'scripts.parse.parse', 'parse', [file], {'noprint': True},
+                               [file], LOCATIONS["PARSED"], []))
+        parsed[ID] = LOCATIONS["PARSED"] + name + '.pkl'
+
+    return nodes, parsed
+
+def make_analyze_nodes(parsed, LYSISFILES, ANALYSES, CACHE, LOCATIONS):
+    """Make node running each analysis on each parsed (or lysis) file, returning nodes and analyzed files by analysis."""
+
+    ALL_ANALYSES = define_pipeline_analyses()
+
+    nodes = []
+    analyzed = {}
+
+    for analysis in ANALYSES:
+        MODULE, FUNCTION, KWARGS, TYPE = ALL_ANALYSES[analysis]
+        KWARGS = dict(KWARGS, cache=CACHE) if CACHE != '' else KWARGS
+        DEST = LOCATIONS["ANALYZED"] + analysis + '/'
+
+        if analysis == 'lysed':
+            sources = [(None, file) for file in LYSISFILES]
+        else:
+            sources = list(parsed.items())
+
+        analyzed[analysis] = {}
+
+        for dep, file in sources:
+            name = get_simulation_name(file)
+            ID = analysis + ':' + name
+
+            nodes.append(make_node(ID, 'analyze', MODULE, FUNCTION, [file], KWARGS, [file], DEST,
+                                   [dep] if dep is not None else []))
+            analyzed[analysis][ID] = DEST + name + '_' + TYPE + '.tbl'
+
+    return nodes, analyzed
+
+def make_subset_nodes(analyzed, SUBSETS, XMLNAME, LOCATIONS):
+    """Make node for each requested subset of each analysis, depending only on analyzed files in the subset."""
+
+    ALL_ANALYSES = define_pipeline_analyses()
+
+    nodes = []
+
+    for analysis, files in analyzed.items():
+        TYPE = ALL_ANALYSES[analysis][3]
+        SOURCE = LOCATIONS["ANALYZED"] + analysis + '/'
+        byFile = {file: ID for ID, file in files.items()}
+
+        for subsetsRequested in SUBSETS:
+            if subsetsRequested == '':
+                selected = list(byFile)
+            else:
+                subsetRequested = scripts.subset.subset.parse_requested_subsets(subsetsRequested)[0]
+                selected = scripts.subset.subset.get_subset_files(subsetRequested, SOURCE, list(byFile))
+
+            ID = 'subset:' + analysis + ':' + (subsetsRequested if subsetsRequested != '' else 'ALL')
+
+            nodes.append(make_node(ID, 'subset', 'scripts.subset.subset', 'subset_data',
+                                   [SOURCE, XMLNAME, TYPE], {'subsetsRequested': subsetsRequested}, selected,
+                                   LOCATIONS["SUBSET"] + analysis + '/', [byFile[file] for file in selected]))
+
+    return nodes
+
+def get_plot_color(name, COLOR):
+    """Get feature to color figures of subset file by, using DOSE if X is given but the file does not vary along exactly one feature."""
+
+    if COLOR != 'X':
+        return COLOR
+
+    # Features are at positions 5 to 9 of subset file names, with X where all values are included
+    features = os.path.basename(name).split('_')[5:10]
+
+    return COLOR if len(features) == 5 and features.count('X') == 1 else 'DOSE'
+
+def make_subset_output_nodes(subsetNode, outputs, COLOR, STATS, CACHE, LOCATIONS):
+    """Make plot node for each file made by subset node, and stats node for each cell analysis file."""
+
+    analysis = subsetNode["ID"].split(':')[1]
+    nodes = []
+
+    for file in outputs:
+        name = os.path.basename(file)
+
+        nodes.append(make_node('plot:' + analysis + ':' + name, 'plot', 'scripts.plot.plot_data', 'plot_data',
+                               [file, get_plot_color(name, COLOR)], {'processes': 1}, [file], LOCATIONS["FIGURES"] + analysis + '/',
+                               [subsetNode["ID"]]))
+
+        # Stats are only calculated on cell analysis files with cell count columns
+        if STATS and analysis == 'cells' and name.endswith('_ANALYZED.tbl') and not name.endswith('STATES_ANALYZED.tbl'):
+            KWARGS = {'processes': 1, 'cache': CACHE} if CACHE != '' else {'processes': 1}
+            nodes.append(make_node('stats:' + name, 'stats', 'scripts.stats.stats', 'stats',
+                                   [file], KWARGS, [file], LOCATIONS["STATS"], [subsetNode["ID"]]))
+
+    return nodes
+
+def make_image_nodes(FILES, VIEWS, TIME, LOCATIONS):
+    """Make node drawing selected views of each simulation file."""
+
+    nodes = []
+
+    for file in FILES:
+        KWARGS = {view: True for view in VIEWS}
+        KWARGS.update({'time': TIME, 'noprint': True, 'processes': 1})
+
+        nodes.append(make_node('image:' + get_simulation_name(file), 'image', 'scripts.image.image', 'image',
+                               [file], KWARGS, [file], LOCATIONS["IMAGES"], []))
+
+    return nodes
+
+def make_pipeline_nodes(files, lysis, ANALYSES, SUBSETS, XMLNAME, VIEWS, TIME, CACHE, LOCATIONS):
+    """Make nodes of all stages known before running, plot and stats nodes are added once subsets are made."""
+
+    FILES = sorted(scripts.parse.parse_utilities.get_files(files)) if files != '' else []
+    LYSISFILES = sorted(scripts.analyze.analyze_utilities.get_json_files(lysis)) if lysis != '' else []
+
+    parseNodes, parsed = make_parse_nodes(FILES, LOCATIONS)
+    analyzeNodes, analyzed = make_analyze_nodes(parsed, LYSISFILES, ANALYSES, CACHE, LOCATIONS)
+    subsetNodes = make_subset_nodes(analyzed, SUBSETS, XMLNAME, LOCATIONS) if XMLNAME != '' else []
+    imageNodes = make_image_nodes(FILES, VIEWS, TIME, LOCATIONS) if len(VIEWS) > 0 else []
+
+    return parseNodes + analyzeNodes + subsetNodes + imageNodes
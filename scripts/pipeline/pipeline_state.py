@@ -0,0 +1,159 @@
+import scripts.cache.cache
+import hashlib
+import json
+import os
+import tempfile
+
+def define_pipeline_state_version():
+    """Define version of pipeline state, increment when node signatures change."""
+
+    STATE_VERSION = 4
+
+    return STATE_VERSION
+
+def make_state_dict():
+    """Make empty pipeline state with cached file hashes and records of completed nodes."""
+
+    state = {
+        "VERSION": define_pipeline_state_version(),
+        "HASHES": {},
+        "NODES": {}
+    }
+
+    return state
+
+def load_pipeline_state(STATELOC):
+    """Load pipeline state, starting a new state if missing, unreadable, or from another version."""
+
+    file = os.path.join(STATELOC, 'STATE.json')
+
+    state = make_state_dict()
+
+    if os.path.exists(file):
+        try:
+            with open(file, 'r') as f:
+                loaded = json.load(f)
+            if loaded.get("VERSION") == define_pipeline_state_version():
+                state = loaded
+        except ValueError:
+            pass
+
+    # Files are recorded relative to directory holding state, so moved or copied pipelines are still up to date
+    state["ROOT"] = os.path.dirname(os.path.abspath(os.path.normpath(STATELOC)))
+
+    return state
+
+def save_pipeline_state(STATELOC, state):
+    """Save pipeline state, writing to temporary file first so interrupted runs do not leave partial state."""
+
+    if not os.path.exists(STATELOC):
+        os.makedirs(STATELOC)
+
+    # Root is where the state is loaded from, not saved with it
+    fd, temp = tempfile.mkstemp(dir=STATELOC, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({key: value for key, value in state.items() if key != 'ROOT'}, f, indent=1)
+    os.replace(temp, os.path.join(STATELOC, 'STATE.json'))
+
+    return
+
+def get_state_path(state, file):
+    """Get path of file relative to pipeline root, as files are recorded in state."""
+
+    return os.path.relpath(os.path.abspath(file), state["ROOT"]).replace(os.sep, '/')
+
+def get_root_path(state, path):
+    """Get location of file recorded in state by path relative to pipeline root."""
+
+    return os.path.join(state["ROOT"], path)
+
+def get_node_outputs(state, ID):
+    """Get locations of recorded outputs of node."""
+
+    return [get_root_path(state, path) for path in state["NODES"][ID]["OUTPUTS"]]
+
+def get_signature_arg(arg):
+    """Get argument of node as included in signature, with paths to files or directories replaced by their names."""
+
+    # Contents of input files are in signature, so moving or copying the pipeline does not change signatures
+    if isinstance(arg, str) and arg != '' and os.path.exists(arg):
+        return os.path.basename(os.path.normpath(arg))
+
+    return arg
+
+def get_cached_file_hash(state, file):
+    """Get hash of file contents, only hashing again if file size or modification time changed."""
+
+    stat = os.stat(file)
+    key = get_state_path(state, file)
+    cached = state["HASHES"].get(key)
+
+    if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    fileHash = scripts.cache.cache.get_file_hash(file)
+    state["HASHES"][key] = [stat.st_size, stat.st_mtime_ns, fileHash]
+
+    return fileHash
+
+def make_node_signature(state, node):
+    """Make signature of node from its call, contents of its input files, and version of code, None if an input is missing."""
+
+    if any([not os.path.exists(file) for file in node["INPUTS"]]):
+        return None
+
+    inputs = [[os.path.basename(file), get_cached_file_hash(state, file)] for file in sorted(node["INPUTS"])]
+
+    # Location of results cache does not change outputs
+    KWARGS = {key: value for key, value in node["KWARGS"].items() if key != 'cache'}
+    # Stages use modules of other packages, so nodes are remade when any module of scripts changes
+    ARGS = [get_signature_arg(arg) for arg in node["ARGS"]]
+    call = [node["MODULE"], node["FUNCTION"], ARGS, KWARGS, inputs, scripts.cache.cache.get_code_version()]
+
+    return hashlib.sha256(json.dumps(call, sort_keys=True).encode('utf-8')).hexdigest()
+
+def check_node_current(state, node, signature):
+    """Check if node was completed with same signature and its outputs are unchanged since."""
+
+    record = state["NODES"].get(node["ID"])
+
+    if record is None or record["SIGNATURE"] != signature:
+        return False
+
+    for path, fileHash in record["OUTPUTS"].items():
+        file = get_root_path(state, path)
+        if not os.path.exists(file) or get_cached_file_hash(state, file) != fileHash:
+            return False
+
+    return True
+
+def record_node(state, node, signature, outputs, seconds):
+    """Record completed node with its signature, inputs, hashes of its outputs, and time taken."""
+
+    state["NODES"][node["ID"]] = {
+        "STAGE": node["STAGE"],
+        "SIGNATURE": signature,
+        "INPUTS": [get_state_path(state, file) for file in node["INPUTS"]],
+        "OUTPUTS": {get_state_path(state, file): get_cached_file_hash(state, file) for file in outputs},
+        "SECONDS": seconds
+    }
+
+    return
+
+def remove_node_outputs(state, ID, keep=[]):
+    """Remove recorded outputs of node except those kept, and forget cached hashes of removed files."""
+
+    record = state["NODES"].get(ID)
+
+    if record is None:
+        return
+
+    keep = [get_state_path(state, file) for file in keep]
+
+    for path in record["OUTPUTS"]:
+        file = get_root_path(state, path)
+        if path not in keep and os.path.exists(file):
+            os.remove(file)
+            state["HASHES"].pop(path, None)
+
+    return
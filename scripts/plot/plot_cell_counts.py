@@ -1,6 +1,41 @@
 import scripts.plot.plot_utilities
+import scripts.plot.plot_context
 import matplotlib.pyplot as plt
 
+def select_normalizable_simulations(POP_NAME, simsDF):
+    """Select simulations with a nonzero starting number of given T cell population to normalize by."""
+
+    TREAT_RATIO_DICT = scripts.plot.plot_utilities.make_treat_ratio_key_dict()
+
+    if POP_NAME in ['CD4', 'CD4 LIVE', 'CD8', 'CD8 LIVE', 'T-CELL', 'T-CELL LIVE']:
+        simsDF = simsDF[simsDF['DOSE'] != 0]
+    if POP_NAME in ['CD4', 'CD4 LIVE']:
+        simsDF = simsDF[simsDF['TREAT RATIO'].map(TREAT_RATIO_DICT) != 0.0]
+    if POP_NAME in ['CD8', 'CD8 LIVE']:
+        simsDF = simsDF[simsDF['TREAT RATIO'].map(TREAT_RATIO_DICT) != 1.0]
+
+    return simsDF
+
+def normalize_count_series(POP_NAME, simsDF, column, START):
+    """Normalize counts by dose of given T cell population or by count at start index for other populations."""
+
+    TREAT_RATIO_DICT = scripts.plot.plot_utilities.make_treat_ratio_key_dict()
+
+    counts = scripts.plot.plot_utilities.stack_time_series(simsDF, column, START)
+    dose = simsDF['DOSE'].values.astype(float)[:, None]
+
+    if POP_NAME in ['CD4', 'CD4 LIVE', 'CD8', 'CD8 LIVE']:
+        frac = simsDF['TREAT RATIO'].map(TREAT_RATIO_DICT).values.astype(float)[:, None]
+        if POP_NAME in ['CD8', 'CD8 LIVE']:
+            frac = 1.0 - frac
+        counts = counts / (dose * frac)
+    elif POP_NAME in ['T-CELL', 'T-CELL LIVE']:
+        counts = counts / dose
+    else:
+        counts = counts / counts[:, [0]]
+
+    return counts
+
 def plot_counts(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     """Plot cell counts over time for given population and color based on selected feature."""
 
@@ -11,24 +46,15 @@ def plot_counts(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
 
     figCounts = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCounts.add_subplot(1, 1, 1)
-    for i in range(0, len(simsDF)):
+    if 'VITRO' in FILEID:
+        plot_time = simsDF.iloc[0]['TIME']
+        counts = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME)
+    else:
+        plot_time = [t-1 for t in simsDF.iloc[0]['TIME'][2:]]
+        counts = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME, 2)
 
-        if 'VITRO' in FILEID:
-            plot_time = simsDF.iloc[i]['TIME']
-            counts = simsDF.iloc[i][POP_NAME]
-        else:
-            plot_time = [t-1 for t in simsDF.iloc[i]['TIME'][2:]]
-            counts = simsDF.iloc[i][POP_NAME][2:]
-
-        if int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS CANCER':
-            ax.plot(plot_time, counts,
-                    color=colorDict[str(0)])
-        elif int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS HEALTHY':
-            ax.plot(plot_time, counts,
-                    color=colorDict["CONTROL"])
-        else:
-            ax.plot(plot_time, counts,
-                    color=colorDict[str(simsDF.iloc[i][COLOR])])
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, counts, keys, colorDict)
     ax.set_xlabel("TIME (DAYS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_TITLES, labelpad=LABELPAD)
     ax.set_ylabel(POP_NAME + " CELL COUNTS\n(NUMBERS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_title(POP_NAME + " COUNT\nOVER TIME", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_TITLES, pad=LABELPAD)
@@ -72,7 +98,7 @@ def plot_counts(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTS_' + POP_NAME.replace(' ','') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTS_' + POP_NAME.replace(' ','') + '.svg')
 
     return
 
@@ -87,38 +113,18 @@ def plot_counts_merge(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
 
     figCounts = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCounts.add_subplot(1, 1, 1)
-    for i in range(0, len(simsDF)):
+    if 'VITRO' in FILEID:
+        plot_time = simsDF.iloc[0]['TIME']
+        counts = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME)
+        counts_live = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME + ' LIVE')
+    else:
+        plot_time = [t - 1 for t in simsDF.iloc[0]['TIME'][2:]]
+        counts = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME, 2)
+        counts_live = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME + ' LIVE', 2)
 
-        if 'VITRO' in FILEID:
-            plot_time = simsDF.iloc[i]['TIME']
-            counts = simsDF.iloc[i][POP_NAME]
-            counts_live = simsDF.iloc[i][POP_NAME + ' LIVE']
-        else:
-            plot_time = [t - 1 for t in simsDF.iloc[i]['TIME'][2:]]
-            counts = simsDF.iloc[i][POP_NAME][2:]
-            counts_live = simsDF.iloc[i][POP_NAME + ' LIVE'][2:]
-
-        if int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS CANCER':
-            ax.plot(plot_time, counts,
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict[str(0)])
-            ax.plot(plot_time, counts_live,
-                    linestyle=liveLineDict['LIVE'],
-                    color=colorDict[str(0)])
-        elif int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS HEALTHY':
-            ax.plot(plot_time, counts,
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict["CONTROL"])
-            ax.plot(plot_time, counts_live,
-                    linestyle=liveLineDict['LIVE'],
-                    color=colorDict["CONTROL"])
-        else:
-            ax.plot(plot_time, counts,
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict[str(simsDF.iloc[i][COLOR])])
-            ax.plot(plot_time, counts_live,
-                    linestyle=liveLineDict['LIVE'],
-                    color=colorDict[str(simsDF.iloc[i][COLOR])])
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, counts, keys, colorDict, liveLineDict['TOTAL'])
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, counts_live, keys, colorDict, liveLineDict['LIVE'])
     ax.set_xlabel("TIME (DAYS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_ylabel(POP_NAME + " CELL COUNTS\n(NUMBERS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_title(POP_NAME + " COUNT\nOVER TIME", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_TITLES, pad=LABELPAD)
@@ -163,7 +169,7 @@ def plot_counts_merge(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTS_MERGE_' + POP_NAME.replace(' ','') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTS_MERGE_' + POP_NAME.replace(' ','') + '.svg')
 
     return
 
@@ -171,53 +177,24 @@ def plot_counts_norm(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     """Plot cell counts normalized by count/dose at start of treatment over time for given population and color based on selected feature."""
 
     COLOR_DICT = scripts.plot.plot_utilities.make_features_color_dict()
-    TREAT_RATIO_DICT = scripts.plot.plot_utilities.make_treat_ratio_key_dict()
     FIG_SIZE_X, FIG_SIZE_Y, TICKSIZE, FONTSIZE_AXES_VALUES, FONTSIZE_AXES_TITLES, LABELPAD = scripts.plot.plot_utilities.define_plotting_globals()
 
     colorDict = COLOR_DICT[COLOR]
     figCounts = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCounts.add_subplot(1, 1, 1)
-    for i in range(0, len(simsDF)):
-        if POP_NAME in ['CD4', 'CD4 LIVE', 'CD8', 'CD8 LIVE', 'T-CELL', 'T-CELL LIVE'] and simsDF.iloc[i]['DOSE'] == 0:
-            continue
-        elif POP_NAME in ['CD4', 'CD4 LIVE'] and TREAT_RATIO_DICT[simsDF.iloc[i]['TREAT RATIO']] == 0.0:
-            continue
-        elif POP_NAME in ['CD8', 'CD8 LIVE'] and TREAT_RATIO_DICT[simsDF.iloc[i]['TREAT RATIO']] == 1.0:
-            continue
-        else:
+    simsDF = select_normalizable_simulations(POP_NAME, simsDF)
 
-            if 'VITRO' in FILEID:
-                plot_time = simsDF.iloc[i]['TIME']
-                if POP_NAME in ['CD4', 'CD4 LIVE', 'CD8', 'CD8 LIVE']:
-                    frac = TREAT_RATIO_DICT[simsDF.iloc[i]['TREAT RATIO']]
-                    if POP_NAME in ['CD8', 'CD8 LIVE']:
-                        frac = 1.0-frac
-                    counts = [n/(simsDF.iloc[i]['DOSE']*frac) for n in simsDF.iloc[i][POP_NAME]]
-                elif POP_NAME in ['T-CELL', 'T-CELL LIVE']:
-                    counts = [n/simsDF.iloc[i]['DOSE'] for n in simsDF.iloc[i][POP_NAME]]
-                else:
-                    counts = [n/simsDF.iloc[i][POP_NAME][0] for n in simsDF.iloc[i][POP_NAME]]
-            else:
-                plot_time = [t-1 for t in simsDF.iloc[i]['TIME'][2:]]
-                if POP_NAME in ['CD4', 'CD4 LIVE', 'CD8', 'CD8 LIVE']:
-                    frac = TREAT_RATIO_DICT[simsDF.iloc[i]['TREAT RATIO']]
-                    if POP_NAME in ['CD8', 'CD8 LIVE']:
-                        frac = 1-frac
-                    counts = [n/(simsDF.iloc[i]['DOSE']*frac) for n in simsDF.iloc[i][POP_NAME][2:]]
-                elif POP_NAME in ['T-CELL', 'T-CELL LIVE']:
-                    counts = [n/simsDF.iloc[i]['DOSE'] for n in simsDF.iloc[i][POP_NAME][2:]]
-                else:
-                    counts = [n/simsDF.iloc[i][POP_NAME][2] for n in simsDF.iloc[i][POP_NAME][2:]]
-
-            if int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS CANCER':
-                ax.plot(plot_time, counts,
-                        color=colorDict[str(0)])
-            elif int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS HEALTHY':
-                ax.plot(plot_time, counts,
-                        color=colorDict["CONTROL"])
-            else:
-                ax.plot(plot_time, counts,
-                        color=colorDict[str(simsDF.iloc[i][COLOR])])
+    if 'VITRO' in FILEID:
+        START = 0
+        plot_time = simsDF.iloc[0]['TIME']
+    else:
+        START = 2
+        plot_time = [t-1 for t in simsDF.iloc[0]['TIME'][2:]]
+
+    counts = normalize_count_series(POP_NAME, simsDF, POP_NAME, START)
+
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, counts, keys, colorDict)
     ax.set_xlabel("TIME (DAYS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_ylabel(POP_NAME + " CELL\nCOUNTS NORAMLIZED", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_title(POP_NAME + " COUNT\nOVER TIME NORAMLIZED", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_TITLES, pad=LABELPAD)
@@ -256,7 +233,7 @@ def plot_counts_norm(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTSNORM_' + POP_NAME.replace(' ','') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTSNORM_' + POP_NAME.replace(' ','') + '.svg')
 
     return
 
@@ -264,7 +241,6 @@ def plot_counts_norm_merge(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     """Plot cell counts normalized by count/dose at start of treatment over time for given population and color based on selected feature and indicate live vs total populations based on linestyle."""
 
     COLOR_DICT = scripts.plot.plot_utilities.make_features_color_dict()
-    TREAT_RATIO_DICT = scripts.plot.plot_utilities.make_treat_ratio_key_dict()
     FIG_SIZE_X, FIG_SIZE_Y, TICKSIZE, FONTSIZE_AXES_VALUES, FONTSIZE_AXES_TITLES, LABELPAD = scripts.plot.plot_utilities.define_plotting_globals()
     liveLineDict = scripts.plot.plot_utilities.make_live_line_dict()
 
@@ -272,65 +248,21 @@ def plot_counts_norm_merge(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
 
     figCounts = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCounts.add_subplot(1, 1, 1)
-    for i in range(0, len(simsDF)):
-        if POP_NAME in ['CD4', 'CD4 LIVE', 'CD8', 'CD8 LIVE', 'T-CELL', 'T-CELL LIVE'] and simsDF.iloc[i]['DOSE'] == 0:
-            continue
-        elif POP_NAME in ['CD4', 'CD4 LIVE'] and TREAT_RATIO_DICT[simsDF.iloc[i]['TREAT RATIO']] == 0.0:
-            continue
-        elif POP_NAME in ['CD8', 'CD8 LIVE'] and TREAT_RATIO_DICT[simsDF.iloc[i]['TREAT RATIO']] == 1.0:
-            continue
-        else:
-            if 'VITRO' in FILEID:
-                plot_time = simsDF.iloc[i]['TIME']
-
-                if POP_NAME in ['CD4', 'CD4 LIVE', 'CD8', 'CD8 LIVE']:
-                    frac = TREAT_RATIO_DICT[simsDF.iloc[i]['TREAT RATIO']]
-                    if POP_NAME in ['CD8']:
-                        frac = 1-frac
-                    counts = [n/(simsDF.iloc[i]['DOSE']*frac) for n in simsDF.iloc[i][POP_NAME]]
-                    counts_live = [n/(simsDF.iloc[i]['DOSE']*frac) for n in simsDF.iloc[i][POP_NAME + ' LIVE']]
-                elif POP_NAME in ['T-CELL']:
-                    counts = [n/simsDF.iloc[i]['DOSE'] for n in simsDF.iloc[i][POP_NAME]]
-                    counts_live = [n/simsDF.iloc[i]['DOSE'] for n in simsDF.iloc[i][POP_NAME + ' LIVE']]
-                else:
-                    counts = [n/simsDF.iloc[i][POP_NAME][0] for n in simsDF.iloc[i][POP_NAME]]
-                    counts_live = [n/simsDF.iloc[i][POP_NAME + ' LIVE'][0] for n in simsDF.iloc[i][POP_NAME + ' LIVE']]
-            else:
-                plot_time = [t - 1 for t in simsDF.iloc[i]['TIME'][2:]]
-                if POP_NAME in ['CD4', 'CD8']:
-                    frac = TREAT_RATIO_DICT[simsDF.iloc[i]['TREAT RATIO']]
-                    if POP_NAME in ['CD8']:
-                        frac = 1-frac
-                    counts = [n/(simsDF.iloc[i]['DOSE']*frac) for n in simsDF.iloc[i][POP_NAME][2:]]
-                    counts_live = [n/(simsDF.iloc[i]['DOSE']*frac) for n in simsDF.iloc[i][POP_NAME + ' LIVE'][2:]]
-                elif POP_NAME in ['T-CELL']:
-                    counts = [n/simsDF.iloc[i]['DOSE'] for n in simsDF.iloc[i][POP_NAME][2:]]
-                    counts_live = [n/simsDF.iloc[i]['DOSE'] for n in simsDF.iloc[i][POP_NAME + ' LIVE'][2:]]
-                else:
-                    counts = [n/simsDF.iloc[i][POP_NAME][2] for n in simsDF.iloc[i][POP_NAME][2:]]
-                    counts_live = [n/simsDF.iloc[i][POP_NAME + ' LIVE'][2] for n in simsDF.iloc[i][POP_NAME + ' LIVE'][2:]]
-
-            if int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS CANCER':
-                ax.plot(plot_time, counts,
-                        linestyle=liveLineDict['TOTAL'],
-                        color=colorDict[str(0)])
-                ax.plot(plot_time, counts_live,
-                        linestyle=liveLineDict['LIVE'],
-                        color=colorDict[str(0)])
-            elif int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS HEALTHY':
-                ax.plot(plot_time, counts,
-                        linestyle=liveLineDict['TOTAL'],
-                        color=colorDict["CONTROL"])
-                ax.plot(plot_time, counts_live,
-                        linestyle=liveLineDict['LIVE'],
-                        color=colorDict["CONTROL"])
-            else:
-                ax.plot(plot_time, counts,
-                        linestyle=liveLineDict['TOTAL'],
-                        color=colorDict[str(simsDF.iloc[i][COLOR])])
-                ax.plot(plot_time, counts_live,
-                        linestyle=liveLineDict['LIVE'],
-                        color=colorDict[str(simsDF.iloc[i][COLOR])])
+    simsDF = select_normalizable_simulations(POP_NAME, simsDF)
+
+    if 'VITRO' in FILEID:
+        START = 0
+        plot_time = simsDF.iloc[0]['TIME']
+    else:
+        START = 2
+        plot_time = [t - 1 for t in simsDF.iloc[0]['TIME'][2:]]
+
+    counts = normalize_count_series(POP_NAME, simsDF, POP_NAME, START)
+    counts_live = normalize_count_series(POP_NAME, simsDF, POP_NAME + ' LIVE', START)
+
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, counts, keys, colorDict, liveLineDict['TOTAL'])
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, counts_live, keys, colorDict, liveLineDict['LIVE'])
     ax.set_xlabel("TIME (DAYS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_ylabel(POP_NAME + " CELL\nCOUNTS NORAMLIZED", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_title(POP_NAME + " COUNT\nOVER TIME NORAMLIZED", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_TITLES, pad=LABELPAD)
@@ -371,7 +303,7 @@ def plot_counts_norm_merge(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTSNORM_MERGE_' + POP_NAME.replace(' ','') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTSNORM_MERGE_' + POP_NAME.replace(' ','') + '.svg')
 
     return
 
@@ -385,24 +317,15 @@ def plot_counts_treat(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
 
     figCounts = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCounts.add_subplot(1, 1, 1)
-    for i in range(0, len(simsDF)):
+    if 'VITRO' in FILEID:
+        plot_time = simsDF.iloc[0]['TIME']
+        counts = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME)
+    else:
+        plot_time = [t-1 for t in simsDF.iloc[0]['TIME'][44:]]
+        counts = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME, 44)
 
-        if 'VITRO' in FILEID:
-            plot_time = simsDF.iloc[i]['TIME']
-            counts = simsDF.iloc[i][POP_NAME]
-        else:
-            plot_time = [t-1 for t in simsDF.iloc[i]['TIME'][44:]]
-            counts = simsDF.iloc[i][POP_NAME][44:]
-
-        if int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS CANCER':
-            ax.plot(plot_time, counts,
-                    color=colorDict[str(0)])
-        elif int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS HEALTHY':
-            ax.plot(plot_time, counts,
-                    color=colorDict["CONTROL"])
-        else:
-            ax.plot(plot_time, counts,
-                    color=colorDict[str(simsDF.iloc[i][COLOR])])
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, counts, keys, colorDict)
     ax.set_xlabel("TIME (DAYS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_ylabel(POP_NAME + " CELL COUNTS\n(NUMBERS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_title(POP_NAME + " COUNT\nOVER TIME", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_TITLES, pad=LABELPAD)
@@ -442,7 +365,7 @@ def plot_counts_treat(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTSTREAT_' + POP_NAME.replace(' ','') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTSTREAT_' + POP_NAME.replace(' ','') + '.svg')
 
     return
 
@@ -457,38 +380,18 @@ def plot_counts_treat_merge(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
 
     figCounts = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCounts.add_subplot(1, 1, 1)
-    for i in range(0, len(simsDF)):
+    if 'VITRO' in FILEID:
+        plot_time = simsDF.iloc[0]['TIME']
+        counts = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME)
+        counts_live = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME + ' LIVE')
+    else:
+        plot_time = [t - 1 for t in simsDF.iloc[0]['TIME'][44:]]
+        counts = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME, 44)
+        counts_live = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME + ' LIVE', 44)
 
-        if 'VITRO' in FILEID:
-            plot_time = simsDF.iloc[i]['TIME']
-            counts = simsDF.iloc[i][POP_NAME]
-            counts_live = simsDF.iloc[i][POP_NAME + ' LIVE']
-        else:
-            plot_time = [t - 1 for t in simsDF.iloc[i]['TIME'][44:]]
-            counts = simsDF.iloc[i][POP_NAME][44:]
-            counts_live = simsDF.iloc[i][POP_NAME + ' LIVE'][44:]
-
-        if int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS CANCER':
-            ax.plot(plot_time, counts,
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict[str(0)])
-            ax.plot(plot_time, counts_live,
-                    linestyle=liveLineDict['LIVE'],
-                    color=colorDict[str(0)])
-        elif int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS HEALTHY':
-            ax.plot(plot_time, counts,
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict["CONTROL"])
-            ax.plot(plot_time, counts_live,
-                    linestyle=liveLineDict['LIVE'],
-                    color=colorDict["CONTROL"])
-        else:
-            ax.plot(plot_time, counts,
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict[str(simsDF.iloc[i][COLOR])])
-            ax.plot(plot_time, counts_live,
-                    linestyle=liveLineDict['LIVE'],
-                    color=colorDict[str(simsDF.iloc[i][COLOR])])
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, counts, keys, colorDict, liveLineDict['TOTAL'])
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, counts_live, keys, colorDict, liveLineDict['LIVE'])
     ax.set_xlabel("TIME (DAYS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_ylabel(POP_NAME + " CELL COUNTS\n(NUMBERS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_title(POP_NAME + " COUNT\nOVER TIME", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_TITLES, pad=LABELPAD)
@@ -530,7 +433,7 @@ def plot_counts_treat_merge(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTSTREAT_MERGE_' + POP_NAME.replace(' ','') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTSTREAT_MERGE_' + POP_NAME.replace(' ','') + '.svg')
 
     return
 
@@ -543,22 +446,16 @@ def plot_counts_treat_norm(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
 
     figCounts = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCounts.add_subplot(1, 1, 1)
-    for i in range(0, len(simsDF)):
-        if 'DISH' in FILEID:
-            killed = [simsDF.iloc[i][POP_NAME][a]/simsDF.iloc[i][POP_NAME][0] for a in range(0, len(simsDF.iloc[i][POP_NAME]))]
-            plot_time = simsDF.iloc[i]['TIME']
-        else:
-            killed = [simsDF.iloc[i][POP_NAME][a]/simsDF.iloc[i][POP_NAME][44] for a in range(44, len(simsDF.iloc[i][POP_NAME]))]
-            plot_time = [t-1 for t in simsDF.iloc[i]['TIME'][44:]]
-        if int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS CANCER':
-            ax.plot(plot_time, killed,
-                    color=colorDict[str(0)])
-        elif int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS HEALTHY':
-            ax.plot(plot_time, killed,
-                    color=colorDict["CONTROL"])
-        else:
-            ax.plot(plot_time, killed,
-                    color=colorDict[str(simsDF.iloc[i][COLOR])])
+    if 'DISH' in FILEID:
+        killed = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME)
+        plot_time = simsDF.iloc[0]['TIME']
+    else:
+        killed = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME, 44)
+        plot_time = [t-1 for t in simsDF.iloc[0]['TIME'][44:]]
+    killed = killed / killed[:, [0]]
+
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, killed, keys, colorDict)
     ax.set_xlabel("TIME (DAYS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_ylabel(POP_NAME + " CELL\nFRACTION REMAINING", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_title(POP_NAME + " FRACTION\n REMAINING OVER TIME", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_TITLES, pad=LABELPAD)
@@ -591,7 +488,7 @@ def plot_counts_treat_norm(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTSTREATNORM_' + POP_NAME.replace(' ','') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTSTREATNORM_' + POP_NAME.replace(' ','') + '.svg')
 
     return
 
@@ -605,38 +502,20 @@ def plot_counts_treat_norm_merge(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
 
     figCounts = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCounts.add_subplot(1, 1, 1)
-    for i in range(0, len(simsDF)):
-        if 'DISH' in FILEID:
-            killed = [simsDF.iloc[i][POP_NAME][a]/simsDF.iloc[i][POP_NAME][0] for a in range(0, len(simsDF.iloc[i][POP_NAME]))]
-            killed_live = [simsDF.iloc[i][POP_NAME + ' LIVE'][a] / simsDF.iloc[i][POP_NAME + ' LIVE'][0] for a in
-                      range(0, len(simsDF.iloc[i][POP_NAME + ' LIVE']))]
-            plot_time = simsDF.iloc[i]['TIME']
-        else:
-            killed = [simsDF.iloc[i][POP_NAME][a]/simsDF.iloc[i][POP_NAME][44] for a in range(44, len(simsDF.iloc[i][POP_NAME]))]
-            killed_live = [simsDF.iloc[i][POP_NAME + ' LIVE'][a] / simsDF.iloc[i][POP_NAME + ' LIVE'][44] for a in
-                      range(44, len(simsDF.iloc[i][POP_NAME + ' LIVE']))]
-            plot_time = [t-1 for t in simsDF.iloc[i]['TIME'][44:]]
-        if int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS CANCER':
-            ax.plot(plot_time, killed,
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict[str(0)])
-            ax.plot(plot_time, killed_live,
-                    linestyle=liveLineDict['LIVE'],
-                    color=colorDict[str(0)])
-        elif int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS HEALTHY':
-            ax.plot(plot_time, killed,
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict["CONTROL"])
-            ax.plot(plot_time, killed_live,
-                    linestyle=liveLineDict['LIVE'],
-                    color=colorDict["CONTROL"])
-        else:
-            ax.plot(plot_time, killed,
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict[str(simsDF.iloc[i][COLOR])])
-            ax.plot(plot_time, killed_live,
-                    linestyle=liveLineDict['LIVE'],
-                    color=colorDict[str(simsDF.iloc[i][COLOR])])
+    if 'DISH' in FILEID:
+        killed = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME)
+        killed_live = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME + ' LIVE')
+        plot_time = simsDF.iloc[0]['TIME']
+    else:
+        killed = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME, 44)
+        killed_live = scripts.plot.plot_utilities.stack_time_series(simsDF, POP_NAME + ' LIVE', 44)
+        plot_time = [t-1 for t in simsDF.iloc[0]['TIME'][44:]]
+    killed = killed / killed[:, [0]]
+    killed_live = killed_live / killed_live[:, [0]]
+
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, killed, keys, colorDict, liveLineDict['TOTAL'])
+    scripts.plot.plot_utilities.plot_series_by_key(ax, plot_time, killed_live, keys, colorDict, liveLineDict['LIVE'])
     ax.set_xlabel("TIME (DAYS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_ylabel(POP_NAME + " CELL\nFRACTION REMAINING", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_title(POP_NAME + " FRACTION\n REMAINING OVER TIME", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_TITLES, pad=LABELPAD)
@@ -671,7 +550,7 @@ def plot_counts_treat_norm_merge(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTSTREATNORM_MERGE_' + POP_NAME.replace(' ','') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTSTREATNORM_MERGE_' + POP_NAME.replace(' ','') + '.svg')
 
     return
 
@@ -685,24 +564,26 @@ def plot_CH_scatter(simsDF, COLOR, MARKER, FILEID, SAVELOC, TIME):
     colorDict = COLOR_DICT[COLOR]
     markerDict = MARKER_DICT[MARKER]
 
-    TIMES = simsDF.iloc[0]['TIME']
-    index = -1
-    for t in range(0, len(TIMES)):
-        if float(TIMES[t]) == float(TIME):
-            index = t
+    index = scripts.plot.plot_context.get_time_index(simsDF, TIME)
 
     figCH = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCH.add_subplot(1, 1, 1)
 
+    cancerLive = scripts.plot.plot_context.get_series_array(simsDF, 'CANCER LIVE')
+    healthyLive = scripts.plot.plot_context.get_series_array(simsDF, 'HEALTHY LIVE')
+    doses = simsDF['DOSE'].values
+    features = simsDF[COLOR].values
+    markers = simsDF[MARKER].values if MARKER != 'o' else None
+
     for i in range(0, len(simsDF)):
-        cancer = simsDF.iloc[i]['CANCER LIVE'][index]
-        healthy = simsDF.iloc[i]['HEALTHY LIVE'][index]
-        if int(simsDF.iloc[i]['DOSE']) == 0:
+        cancer = cancerLive[i, index]
+        healthy = healthyLive[i, index]
+        if int(doses[i]) == 0:
             color = 'black'
         else:
-            color = colorDict[str(simsDF.iloc[i][COLOR])]
+            color = colorDict[str(features[i])]
         if MARKER != 'o':
-            marker = markerDict[simsDF.iloc[i][MARKER]]
+            marker = markerDict[markers[i]]
         else:
             marker = markerDict[MARKER]
 
@@ -725,7 +606,7 @@ def plot_CH_scatter(simsDF, COLOR, MARKER, FILEID, SAVELOC, TIME):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_SCATTER_CH_' + COLOR.replace(' ','') + '_' + MARKER.replace(' ','') + '_' + str(TIME) + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_SCATTER_CH_' + COLOR.replace(' ','') + '_' + MARKER.replace(' ','') + '_' + str(TIME) + '.svg')
 
     return
 
@@ -739,11 +620,7 @@ def plot_CH_scatter_normalized(simsDF, COLOR, MARKER, FILEID, SAVELOC, TIME):
     colorDict = COLOR_DICT[COLOR]
     markerDict = MARKER_DICT[MARKER]
 
-    TIMES = simsDF.iloc[0]['TIME']
-    index = -1
-    for t in range(0, len(TIMES)):
-        if float(TIMES[t]) == float(TIME):
-            index = t
+    index = scripts.plot.plot_context.get_time_index(simsDF, TIME)
 
     figCH = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCH.add_subplot(1, 1, 1)
@@ -761,19 +638,22 @@ def plot_CH_scatter_normalized(simsDF, COLOR, MARKER, FILEID, SAVELOC, TIME):
         ymax = 1
 
 
+    cancerLive = scripts.plot.plot_context.get_series_array(simsDF, 'CANCER LIVE')
+    healthyLive = scripts.plot.plot_context.get_series_array(simsDF, 'HEALTHY LIVE')
+    doses = simsDF['DOSE'].values
+    features = simsDF[COLOR].values
+    markers = simsDF[MARKER].values if MARKER != 'o' else None
+    start = 0 if 'DISH' in FILEID else 44
+
     for i in range(0, len(simsDF)):
-        if 'DISH' in FILEID:
-            cancer = simsDF.iloc[i]['CANCER LIVE'][index]/simsDF.iloc[i]['CANCER LIVE'][0]
-            healthy = simsDF.iloc[i]['HEALTHY LIVE'][index]/simsDF.iloc[i]['HEALTHY LIVE'][0]
-        else:
-            cancer = simsDF.iloc[i]['CANCER LIVE'][index]/simsDF.iloc[i]['CANCER LIVE'][44]
-            healthy = simsDF.iloc[i]['HEALTHY LIVE'][index]/simsDF.iloc[i]['HEALTHY LIVE'][44]
-        if int(simsDF.iloc[i]['DOSE']) == 0:
+        cancer = cancerLive[i, index]/cancerLive[i, start]
+        healthy = healthyLive[i, index]/healthyLive[i, start]
+        if int(doses[i]) == 0:
             color = 'black'
         else:
-            color = colorDict[str(simsDF.iloc[i][COLOR])]
+            color = colorDict[str(features[i])]
         if MARKER != 'o':
-            marker = markerDict[simsDF.iloc[i][MARKER]]
+            marker = markerDict[markers[i]]
         else:
             marker = markerDict[MARKER]
 
@@ -802,6 +682,6 @@ def plot_CH_scatter_normalized(simsDF, COLOR, MARKER, FILEID, SAVELOC, TIME):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_SCATTERNORM_CH_' + COLOR.replace(' ','') + '_' + MARKER.replace(' ','') + '_' + str(TIME) + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_SCATTERNORM_CH_' + COLOR.replace(' ','') + '_' + MARKER.replace(' ','') + '_' + str(TIME) + '.svg')
 
     return
\ No newline at end of file
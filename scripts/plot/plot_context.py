@@ -0,0 +1,62 @@
+import weakref
+import numpy as np
+
+# Plot contexts of simulation dataframes by id, removed when the dataframe is garbage collected
+CONTEXTS = {}
+
+def make_plot_context(simsDF):
+    """Make plot context of simulation dataframe with time to index map and cache of stacked time series arrays."""
+
+    times = simsDF.iloc[0]['TIME'] if len(simsDF) > 0 and 'TIME' in simsDF.columns else []
+
+    context = {
+        "TIME_INDEX": {float(t): i for i, t in enumerate(times)},
+        "ARRAYS": {}
+    }
+
+    return context
+
+def get_plot_context(simsDF):
+    """Get plot context of simulation dataframe, making it on first use.
+
+    Contexts assume the dataframe is not modified in place after it is first plotted,
+    selecting rows or columns makes a new dataframe with its own context.
+    """
+
+    key = id(simsDF)
+
+    if key not in CONTEXTS:
+        CONTEXTS[key] = make_plot_context(simsDF)
+        weakref.finalize(simsDF, CONTEXTS.pop, key, None)
+
+    return CONTEXTS[key]
+
+def get_time_index(simsDF, TIME):
+    """Get index of time point in simulation times, -1 if time point was not simulated."""
+
+    return get_plot_context(simsDF)['TIME_INDEX'].get(float(TIME), -1)
+
+def get_series_array(simsDF, column):
+    """Get array of list column stacked across simulations (simulations x times [x radii])."""
+
+    arrays = get_plot_context(simsDF)['ARRAYS']
+
+    if column not in arrays:
+        series = np.array(simsDF[column].tolist(), dtype=float)
+        series.setflags(write=False)
+        arrays[column] = series
+
+    return arrays[column]
+
+def set_series_arrays(simsDF, arrayTable):
+    """Set stacked time series arrays of simulation dataframe from blocks of the array table it was made from."""
+
+    arrays = get_plot_context(simsDF)['ARRAYS']
+
+    for column, block in arrayTable["BLOCKS"].items():
+        if column not in arrays:
+            series = block.astype(float)
+            series.setflags(write=False)
+            arrays[column] = series
+
+    return
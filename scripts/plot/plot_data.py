@@ -8,7 +8,9 @@ import scripts.plot.plot_spatial
 import scripts.plot.plot_subcell_data
 import scripts.plot.plot_utilities
 import scripts.plot.plot_dish_tissue_compare
-import pickle
+import scripts.plot.plot_tasks
+import scripts.memory.memory
+import multiprocessing
 import re
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -68,7 +70,7 @@ def define_color_based_on_x_location(filesplit, X, COLOR, PARTIAL):
 
     return COLOR
 
-def plot_analyze_counts_data(simsDF, COLOR, ANALYSIS, filesplit, FILEID, fileid, SAVELOC):
+def plot_analyze_counts_data(TASKS, simsDF, COLOR, ANALYSIS, filesplit, FILEID, fileid, SAVELOC):
     """Call plotters for plotting cell count dynamics for each cell population."""
 
     FILEID_SPLIT_INDICES = scripts.plot.plot_utilities.define_fileid_split_indices_dict()
@@ -79,31 +81,29 @@ def plot_analyze_counts_data(simsDF, COLOR, ANALYSIS, filesplit, FILEID, fileid,
         if filesplit[FILEID_SPLIT_INDICES['ANTIGENS HEALTHY']] == 'NA' and 'HEALTHY' in POP_NAMES[p]:
             continue
         else:
-            scripts.plot.plot_cell_counts.plot_counts(POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
+            scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_counts, POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
             if ANALYSIS == 'ANALYZE':
-                scripts.plot.plot_cell_counts.plot_counts_norm(POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_counts_norm, POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
 
             if 'VIVO' in FILEID and POP_NAMES[p] in ['CANCER', 'CANCER LIVE', 'HEALTHY', 'HEALTHY LIVE']:
-                scripts.plot.plot_cell_counts.plot_counts_treat_norm(POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_counts_treat_norm, POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
 
             if 'VIVO' in FILEID and POP_NAMES[p] in ['CD4', 'CD4 LIVE', 'CD8', 'CD8 LIVE', 'T-CELL', 'T-CELL LIVE']:
-                scripts.plot.plot_cell_counts.plot_counts_treat(POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_counts_treat, POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
 
             if 'LIVE' not in POP_NAMES[p]:
-                scripts.plot.plot_cell_counts.plot_counts_merge(POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_counts_merge, POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
                 if ANALYSIS == 'ANALYZE':
-                    scripts.plot.plot_cell_counts.plot_counts_norm_merge(POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
+                    scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_counts_norm_merge, POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
 
                 if 'VIVO' in FILEID and POP_NAMES[p] in ['CANCER', 'CANCER LIVE', 'HEALTHY', 'HEALTHY LIVE']:
-                    scripts.plot.plot_cell_counts.plot_counts_treat_norm_merge(POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
+                    scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_counts_treat_norm_merge, POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
                 if 'VIVO' in FILEID and POP_NAMES[p] in ['CD4', 'CD8', 'T-CELL']:
-                    scripts.plot.plot_cell_counts.plot_counts_treat_merge(POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
-
-            plt.close("all")
+                    scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_counts_treat_merge, POP_NAMES[p], simsDF, COLOR, fileid, SAVELOC)
 
     return
 
-def plot_analyze_scatter_data(simsDF, COLOR, ANALYSIS, filesplit, fileid, SAVELOC):
+def plot_analyze_scatter_data(TASKS, simsDF, COLOR, ANALYSIS, filesplit, fileid, SAVELOC):
     """Call plotters for analyzing living cancer vs healthy cell counts."""
 
     FILEID_SPLIT_INDICES = scripts.plot.plot_utilities.define_fileid_split_indices_dict()
@@ -115,34 +115,31 @@ def plot_analyze_scatter_data(simsDF, COLOR, ANALYSIS, filesplit, fileid, SAVELO
     if filesplit[FILEID_SPLIT_INDICES['POPS']] == 'CH':
         MARKER = 'o'
         if filesplit[FILEID_SPLIT_INDICES['PLATE']] == 'DISH':
-            scripts.plot.plot_cell_counts.plot_CH_scatter(simsDF, COLOR, MARKER, fileid, SAVELOC, DISH_TIMES[-1])
+            scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_CH_scatter, simsDF, COLOR, MARKER, fileid, SAVELOC, DISH_TIMES[-1])
             if ANALYSIS == 'ANALYZED':
-                scripts.plot.plot_cell_counts.plot_CH_scatter_normalized(simsDF, COLOR, MARKER, fileid, SAVELOC, DISH_TIMES[-1])
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_CH_scatter_normalized, simsDF, COLOR, MARKER, fileid, SAVELOC, DISH_TIMES[-1])
         if filesplit[FILEID_SPLIT_INDICES['PLATE']] == 'TISSUE':
-            scripts.plot.plot_cell_counts.plot_CH_scatter(simsDF, COLOR, MARKER, fileid, SAVELOC, TISSUE_TIMES[-1])
+            scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_CH_scatter, simsDF, COLOR, MARKER, fileid, SAVELOC, TISSUE_TIMES[-1])
             if ANALYSIS == 'ANALYZED':
-                scripts.plot.plot_cell_counts.plot_CH_scatter_normalized(simsDF, COLOR, MARKER, fileid, SAVELOC, TISSUE_TIMES[-1])
-        plt.close("all")
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_cell_counts.plot_CH_scatter_normalized, simsDF, COLOR, MARKER, fileid, SAVELOC, TISSUE_TIMES[-1])
 
     return
 
-def plot_analyze_state_frac_data(simsDF, COLOR, fileid, SAVELOC):
+def plot_analyze_state_frac_data(TASKS, simsDF, COLOR, fileid, SAVELOC):
     """Call plotters that plot cell state fractions over time."""
 
     # Plot type fracs
     print('\t\t' + 'Plotting state fraction data')
-    scripts.plot.plot_subcell_data.plot_state_fracs(simsDF, COLOR, fileid, SAVELOC)
-    scripts.plot.plot_subcell_data.plot_state_fracs(simsDF, COLOR, fileid, SAVELOC, True)
-    scripts.plot.plot_subcell_data.plot_state_fracs_neutral(simsDF, COLOR, fileid, SAVELOC)
+    scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_state_fracs, simsDF, COLOR, fileid, SAVELOC)
+    scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_state_fracs, simsDF, COLOR, fileid, SAVELOC, True)
+    scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_state_fracs_neutral, simsDF, COLOR, fileid, SAVELOC)
     if 'VIVO' in fileid:
-        scripts.plot.plot_subcell_data.plot_state_fracs_treat(simsDF, COLOR, fileid, SAVELOC)
-        scripts.plot.plot_subcell_data.plot_state_fracs_treat(simsDF, COLOR, fileid, SAVELOC, True)
-
-    plt.close("all")
+        scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_state_fracs_treat, simsDF, COLOR, fileid, SAVELOC)
+        scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_state_fracs_treat, simsDF, COLOR, fileid, SAVELOC, True)
 
     return
 
-def plot_analyze_volume_data(simsDF, COLOR, filesplit, FILEID, SAVELOC):
+def plot_analyze_volume_data(TASKS, simsDF, COLOR, filesplit, FILEID, SAVELOC):
     """Call plotters that plot cell volume distributions."""
 
     FILEID_SPLIT_INDICES = scripts.plot.plot_utilities.define_fileid_split_indices_dict()
@@ -152,19 +149,17 @@ def plot_analyze_volume_data(simsDF, COLOR, filesplit, FILEID, SAVELOC):
     print('\t\t' + 'Plotting volume distribution data')
     if filesplit[FILEID_SPLIT_INDICES['PLATE']] == 'DISH':
         for time in range(1, len(DISH_TIMES)):
-            scripts.plot.plot_subcell_data.plot_volumes(simsDF, COLOR, FILEID, SAVELOC, DISH_TIMES[time])
-            scripts.plot.plot_subcell_data.plot_volumes_split(simsDF, COLOR, FILEID, SAVELOC, [4, 7])
-        plt.close("all")
+            scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_volumes, simsDF, COLOR, FILEID, SAVELOC, DISH_TIMES[time])
+            scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_volumes_split, simsDF, COLOR, FILEID, SAVELOC, [4, 7])
     if filesplit[FILEID_SPLIT_INDICES['PLATE']] == 'TISSUE':
-        scripts.plot.plot_subcell_data.plot_volumes(simsDF, COLOR, FILEID, SAVELOC, 1)
-        scripts.plot.plot_subcell_data.plot_volumes(simsDF, COLOR, FILEID, SAVELOC, 5)
+        scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_volumes, simsDF, COLOR, FILEID, SAVELOC, 1)
+        scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_volumes, simsDF, COLOR, FILEID, SAVELOC, 5)
         for time in TISSUE_TIMES:
-            scripts.plot.plot_subcell_data.plot_volumes(simsDF, COLOR, FILEID, SAVELOC, time)
-        plt.close("all")
+            scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_volumes, simsDF, COLOR, FILEID, SAVELOC, time)
 
     return
 
-def plot_analyze_cycle_data(simsDF, COLOR, filesplit, FILEID, SAVELOC):
+def plot_analyze_cycle_data(TASKS, simsDF, COLOR, filesplit, FILEID, SAVELOC):
     """Call plotters that plot cell cycle distributions."""
 
     FILEID_SPLIT_INDICES = scripts.plot.plot_utilities.define_fileid_split_indices_dict()
@@ -176,20 +171,17 @@ def plot_analyze_cycle_data(simsDF, COLOR, filesplit, FILEID, SAVELOC):
         # Determine units: False = minutes, True = hours
         for unit in [False, True]:
             for time in range(1, len(DISH_TIMES)):
-                scripts.plot.plot_subcell_data.plot_cycles(simsDF, COLOR, FILEID, SAVELOC, DISH_TIMES[time], unit)
-            plt.close("all")
-            scripts.plot.plot_subcell_data.plot_cycles_split(simsDF, COLOR, FILEID, SAVELOC, [4, 7], True)
-        plt.close("all")
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_cycles, simsDF, COLOR, FILEID, SAVELOC, DISH_TIMES[time], unit)
+            scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_cycles_split, simsDF, COLOR, FILEID, SAVELOC, [4, 7], True)
 
     if filesplit[FILEID_SPLIT_INDICES['PLATE']] == 'TISSUE':
         print('\t\t' + 'Plotting cycle distribution data')
         for unit in [False, True]:
             for time in TISSUE_TIMES:
-                scripts.plot.plot_subcell_data.plot_cycles(simsDF, COLOR, FILEID, SAVELOC, time, unit)
-            plt.close("all")
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_subcell_data.plot_cycles, simsDF, COLOR, FILEID, SAVELOC, time, unit)
     return
 
-def plot_kill_curve_sim_data(simsDF, filesplit, FILEID, fileid, SAVELOC):
+def plot_kill_curve_sim_data(TASKS, simsDF, filesplit, FILEID, fileid, SAVELOC):
     """Call plotters that plot simulated kill curve data."""
 
     FILEID_SPLIT_INDICES = scripts.plot.plot_utilities.define_fileid_split_indices_dict()
@@ -200,12 +192,11 @@ def plot_kill_curve_sim_data(simsDF, filesplit, FILEID, fileid, SAVELOC):
     print('\t\t' + 'Plotting kill curve data')
     if filesplit[FILEID_SPLIT_INDICES['PLATE']] == 'DISH':
         for time in range(2, len(DISH_TIMES)):
-            scripts.plot.plot_kill_curves.plot_kill_curve_normalized_sim(simsDF, FILEID, SAVELOC, 7)
-    plt.close("all")
+            scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_kill_curves.plot_kill_curve_normalized_sim, simsDF, FILEID, SAVELOC, 7)
 
     return
 
-def plot_env_conc_data(simsDF, COLOR, TIMES, FILEID, SAVELOC):
+def plot_env_conc_data(TASKS, simsDF, COLOR, TIMES, FILEID, SAVELOC):
     """Call plotters that plot environment concentrations over time for each species."""
 
     MOL_NAMES = scripts.plot.plot_utilities.define_mol_names_list()
@@ -215,12 +206,11 @@ def plot_env_conc_data(simsDF, COLOR, TIMES, FILEID, SAVELOC):
         if MOL_NAMES[m] == 'OXYGEN':
             continue
         else:
-            scripts.plot.plot_env.plot_env_conc_times_bar(MOL_NAMES[m], simsDF, COLOR, FILEID, SAVELOC, TIMES)
-            plt.close("all")
+            scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_env.plot_env_conc_times_bar, MOL_NAMES[m], simsDF, COLOR, FILEID, SAVELOC, TIMES)
 
     return
 
-def plot_env_parity_data(simsDF, COLOR, TIMES, FILEID, SAVELOC):
+def plot_env_parity_data(TASKS, simsDF, COLOR, TIMES, FILEID, SAVELOC):
     """Call plotters that plot parity plots of environment species concentrations at the final time point in realistic vs ideal co-culture simulations."""
 
     MOL_NAMES = scripts.plot.plot_utilities.define_mol_names_list()
@@ -233,15 +223,13 @@ def plot_env_parity_data(simsDF, COLOR, TIMES, FILEID, SAVELOC):
             for XAXIS in ['IDEAL', 'REALISTIC']:
                 if COLOR == 'X':
                     for color in ['DOSE', 'TREAT RATIO', 'CAR AFFINITY', 'ANTIGENS CANCER']:
-                        scripts.plot.plot_env.plot_evn_concs_ideal_realistic_parity(MOL_NAMES[m], simsDF, XAXIS, color, [TIMES[-1]], FILEID, SAVELOC)
-                        plt.close("all")
+                        scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_env.plot_evn_concs_ideal_realistic_parity, MOL_NAMES[m], simsDF, XAXIS, color, [TIMES[-1]], FILEID, SAVELOC)
                 else:
-                    scripts.plot.plot_env.plot_evn_concs_ideal_realistic_parity(MOL_NAMES[m], simsDF, XAXIS, COLOR, [TIMES[-1]], FILEID, SAVELOC)
-                    plt.close("all")
+                    scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_env.plot_evn_concs_ideal_realistic_parity, MOL_NAMES[m], simsDF, XAXIS, COLOR, [TIMES[-1]], FILEID, SAVELOC)
 
     return
 
-def plot_spatial_counts_data(simsDF, COLOR, TIMES, PARTIAL, filesplit, FILEID, SAVELOC):
+def plot_spatial_counts_data(TASKS, simsDF, COLOR, TIMES, PARTIAL, filesplit, FILEID, SAVELOC):
     """Call plotters that plot cell spatial dynamics for each population"""
 
     FILEID_SPLIT_INDICES = scripts.plot.plot_utilities.define_fileid_split_indices_dict()
@@ -253,19 +241,16 @@ def plot_spatial_counts_data(simsDF, COLOR, TIMES, PARTIAL, filesplit, FILEID, S
             if filesplit[FILEID_SPLIT_INDICES['ANTIGENS HEALTHY']] == 'NA' and 'HEALTHY' in POP_NAMES[p]:
                 continue
             else:
-                scripts.plot.plot_spatial.plot_counts_radius(POP_NAMES[p], simsDF, COLOR, FILEID, SAVELOC, TIME)
-                scripts.plot.plot_spatial.plot_counts_radius(POP_NAMES[p] + ' NORMALIZED', simsDF, COLOR, FILEID, SAVELOC, TIME)
-                plt.close("all")
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_spatial.plot_counts_radius, POP_NAMES[p], simsDF, COLOR, FILEID, SAVELOC, TIME)
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_spatial.plot_counts_radius, POP_NAMES[p] + ' NORMALIZED', simsDF, COLOR, FILEID, SAVELOC, TIME)
 
             if 'LIVE' not in POP_NAMES[p]:
-                scripts.plot.plot_spatial.plot_counts_radius_merge(POP_NAMES[p], simsDF, COLOR, FILEID, SAVELOC, TIME)
-                scripts.plot.plot_spatial.plot_counts_radius_merge(POP_NAMES[p] + ' NORMALIZED', simsDF, COLOR, FILEID, SAVELOC, TIME)
-
-                plt.close("all")
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_spatial.plot_counts_radius_merge, POP_NAMES[p], simsDF, COLOR, FILEID, SAVELOC, TIME)
+                scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_spatial.plot_counts_radius_merge, POP_NAMES[p] + ' NORMALIZED', simsDF, COLOR, FILEID, SAVELOC, TIME)
 
     return
 
-def plot_lysis_counts_data(simsDF, COLOR, filesplit, FILEID, SAVELOC):
+def plot_lysis_counts_data(TASKS, simsDF, COLOR, filesplit, FILEID, SAVELOC):
     """Call plotters that plot cell lysis information for all lysed cell populations."""
 
     FILEID_SPLIT_INDICES = scripts.plot.plot_utilities.define_fileid_split_indices_dict()
@@ -277,18 +262,16 @@ def plot_lysis_counts_data(simsDF, COLOR, filesplit, FILEID, SAVELOC):
         if filesplit[FILEID_SPLIT_INDICES['ANTIGENS HEALTHY']] == 'NA' and 'HEALTHY' in POP_LYSIS_NAMES[p]:
             continue
         else:
-            scripts.plot.plot_lysed.plot_counts_lysed_time(POP_LYSIS_NAMES[p], simsDF, COLOR, FILEID, SAVELOC)
-            scripts.plot.plot_lysed.plot_counts_lysed_time_exact(POP_LYSIS_NAMES[p], simsDF, COLOR, FILEID, SAVELOC)
-        plt.close("all")
+            scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_lysed.plot_counts_lysed_time, POP_LYSIS_NAMES[p], simsDF, COLOR, FILEID, SAVELOC)
+            scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_lysed.plot_counts_lysed_time_exact, POP_LYSIS_NAMES[p], simsDF, COLOR, FILEID, SAVELOC)
 
     if filesplit[FILEID_SPLIT_INDICES['POPS']] == 'CH':
-        scripts.plot.plot_lysed.plot_counts_lysed_time_merge(POP_LYSIS_NAMES, simsDF, COLOR, FILEID, SAVELOC)
-        scripts.plot.plot_lysed.plot_counts_lysed_time_exact_merge(POP_LYSIS_NAMES, simsDF, COLOR, FILEID, SAVELOC)
-        plt.close("all")
+        scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_lysed.plot_counts_lysed_time_merge, POP_LYSIS_NAMES, simsDF, COLOR, FILEID, SAVELOC)
+        scripts.plot.plot_tasks.add_plot_task(TASKS, scripts.plot.plot_lysed.plot_counts_lysed_time_exact_merge, POP_LYSIS_NAMES, simsDF, COLOR, FILEID, SAVELOC)
 
     return
 
-def plot_analyze_data(simsDF, COLOR, PARTIAL, ANALYSIS, FILEID, SAVELOC):
+def plot_analyze_data(TASKS, simsDF, COLOR, PARTIAL, ANALYSIS, FILEID, SAVELOC):
     """Plot and color data for analyze files based on file name."""
 
     filesplit = FILEID.split('_')
@@ -305,19 +288,19 @@ def plot_analyze_data(simsDF, COLOR, PARTIAL, ANALYSIS, FILEID, SAVELOC):
 
         # Plot counts data
         if 'CYCLES' not in FILEID and 'VOLUMES' not in FILEID:
-            plot_analyze_counts_data(simsDF, COLOR, ANALYSIS, filesplit, FILEID, fileid, SAVELOC)
-            plot_analyze_scatter_data(simsDF, COLOR, ANALYSIS, filesplit, fileid, SAVELOC)
-            plot_analyze_state_frac_data(simsDF, COLOR, fileid, SAVELOC)
+            plot_analyze_counts_data(TASKS, simsDF, COLOR, ANALYSIS, filesplit, FILEID, fileid, SAVELOC)
+            plot_analyze_scatter_data(TASKS, simsDF, COLOR, ANALYSIS, filesplit, fileid, SAVELOC)
+            plot_analyze_state_frac_data(TASKS, simsDF, COLOR, fileid, SAVELOC)
 
         # Plot distribution data
         if 'STATES' not in FILEID:
             # Plot volume distributions
             if 'CYCLES' not in FILEID:
-                plot_analyze_volume_data(simsDF, COLOR, filesplit, FILEID, SAVELOC)
+                plot_analyze_volume_data(TASKS, simsDF, COLOR, filesplit, FILEID, SAVELOC)
 
             # Plot cycle distributions
             if 'VOLUMES' not in FILEID:
-                plot_analyze_cycle_data(simsDF, COLOR, filesplit, FILEID, SAVELOC)
+                plot_analyze_cycle_data(TASKS, simsDF, COLOR, filesplit, FILEID, SAVELOC)
 
     if 'VOLUMES' not in FILEID and 'CYCLES' not in FILEID and not PARTIAL:
         fileid = FILEID.replace('_STATES', '')
@@ -326,11 +309,11 @@ def plot_analyze_data(simsDF, COLOR, PARTIAL, ANALYSIS, FILEID, SAVELOC):
                 if COLOR == 'X': COLOR = 'CAR AFFINITY'
 
                 # Plot kill curve
-                plot_kill_curve_sim_data(simsDF, filesplit, FILEID, fileid, SAVELOC)
+                plot_kill_curve_sim_data(TASKS, simsDF, filesplit, FILEID, fileid, SAVELOC)
 
     return
 
-def plot_env_data(simsDF, COLOR, PARTIAL, FILEID, SAVELOC):
+def plot_env_data(TASKS, simsDF, COLOR, PARTIAL, FILEID, SAVELOC):
     """Plot and color data for environment files based on file name."""
 
     filesplit = FILEID.split('_')
@@ -350,14 +333,14 @@ def plot_env_data(simsDF, COLOR, PARTIAL, FILEID, SAVELOC):
         if COLOR == 'X':
             COLOR = define_color_based_on_x_location(filesplit, X, COLOR, PARTIAL)
 
-        plot_env_conc_data(simsDF, COLOR, TIMES, FILEID, SAVELOC)
+        plot_env_conc_data(TASKS, simsDF, COLOR, TIMES, FILEID, SAVELOC)
 
     if X == 5 and 'VITRO' in FILEID:
-        plot_env_parity_data(simsDF, COLOR, TIMES, FILEID, SAVELOC)
+        plot_env_parity_data(TASKS, simsDF, COLOR, TIMES, FILEID, SAVELOC)
 
     return
 
-def plot_spatial_data(simsDF, COLOR, PARTIAL, FILEID, SAVELOC):
+def plot_spatial_data(TASKS, simsDF, COLOR, PARTIAL, FILEID, SAVELOC):
     """Plot and color data for spatial files based on file name."""
 
     filesplit = FILEID.split('_')
@@ -378,11 +361,11 @@ def plot_spatial_data(simsDF, COLOR, PARTIAL, FILEID, SAVELOC):
             COLOR = define_color_based_on_x_location(filesplit, X, COLOR, PARTIAL)
 
         # Plot counts data
-        plot_spatial_counts_data(simsDF, COLOR, TIMES, PARTIAL, filesplit, FILEID, SAVELOC)
+        plot_spatial_counts_data(TASKS, simsDF, COLOR, TIMES, PARTIAL, filesplit, FILEID, SAVELOC)
 
     return
 
-def plot_lysed_data(simsDF, COLOR, PARTIAL, FILEID, SAVELOC):
+def plot_lysed_data(TASKS, simsDF, COLOR, PARTIAL, FILEID, SAVELOC):
     """Plot and color data for lysed files based on file name."""
 
     filesplit = FILEID.split('_')
@@ -394,67 +377,69 @@ def plot_lysed_data(simsDF, COLOR, PARTIAL, FILEID, SAVELOC):
         if COLOR == 'X':
             COLOR = define_color_based_on_x_location(filesplit, X, COLOR, PARTIAL)
 
-    plot_lysis_counts_data(simsDF, COLOR, filesplit, FILEID, SAVELOC)
+    plot_lysis_counts_data(TASKS, simsDF, COLOR, filesplit, FILEID, SAVELOC)
 
     return
 
 def determine_data_file_type(fileName):
     """Determine data file type (and thus plots to make) based on file name."""
 
+    fileName = fileName.replace('.tbl', '').replace('.pkl', '')
+
     if 'ANALYZED' in fileName:
-        FILEID = fileName.replace('_ANALYZED.pkl', '')
+        FILEID = fileName.replace('_ANALYZED', '')
         analysis = 'ANALYZED'
 
     if 'ENVIRONMENT' in fileName:
-        FILEID = fileName.replace('_ENVIRONMENT.pkl', '')
+        FILEID = fileName.replace('_ENVIRONMENT', '')
         analysis = 'ENVIRONMENT'
 
     if 'SPATIAL' in fileName:
-        FILEID = fileName.replace('_SPATIAL.pkl', '')
+        FILEID = fileName.replace('_SPATIAL', '')
         analysis = 'SPATIAL'
 
     if 'LYSED' in fileName:
-        FILEID = fileName.replace('_LYSED.pkl', '')
+        FILEID = fileName.replace('_LYSED', '')
         analysis = 'LYSED'
 
     if 'SHAREDLOCS' in fileName:
-        FILEID = fileName.replace('_SHAREDLOCS.pkl', '')
+        FILEID = fileName.replace('_SHAREDLOCS', '')
         analysis = 'SHAREDLOCS'
 
     return FILEID, analysis
 
-def plot_data_based_on_analysis_type(simsDF, ANALYSIS, COLOR, PARTIAL, FILEID, SAVELOC):
+def plot_data_based_on_analysis_type(TASKS, simsDF, ANALYSIS, COLOR, PARTIAL, FILEID, SAVELOC):
     """Call appropriate data plotter sequence based on file type."""
 
     if ANALYSIS == 'ANALYZED' or ANALYSIS == 'SHAREDLOCS':
 
-        plot_analyze_data(simsDF, COLOR, PARTIAL, ANALYSIS, FILEID, SAVELOC)
+        plot_analyze_data(TASKS, simsDF, COLOR, PARTIAL, ANALYSIS, FILEID, SAVELOC)
 
     if ANALYSIS == 'ENVIRONMENT':
 
-        plot_env_data(simsDF, COLOR, PARTIAL, FILEID, SAVELOC)
+        plot_env_data(TASKS, simsDF, COLOR, PARTIAL, FILEID, SAVELOC)
 
     if ANALYSIS == 'SPATIAL':
 
-        plot_spatial_data(simsDF, COLOR, PARTIAL, FILEID, SAVELOC)
+        plot_spatial_data(TASKS, simsDF, COLOR, PARTIAL, FILEID, SAVELOC)
 
     if ANALYSIS == 'LYSED':
 
-        plot_lysed_data(simsDF, COLOR, PARTIAL, FILEID, SAVELOC)
+        plot_lysed_data(TASKS, simsDF, COLOR, PARTIAL, FILEID, SAVELOC)
 
     return
 
-def plot_data(files, color, saveLoc='', partial=False):
+def plot_data(files, color, saveLoc='', partial=False, processes=None, output='svg', dpi=300):
     """Iterate through all files and plot appropriate file types.
 
-    plot_data takes a directory of (or a single) .pkl simulation files that result from analyze_cells, analyze_env, analyze_spatial, or analyze_lysis and
+    plot_data takes a directory of (or a single) .tbl (or .pkl) simulation files that result from analyze_cells, analyze_env, analyze_spatial, or analyze_lysis and
     plots the data features in the dataframe over time.
 
     Usage:
-        plot_data(files, color, saveLoc='', partial=False)
+        plot_data(files, color, saveLoc='', partial=False, processes=None, output='svg', dpi=300)
 
         files
-            Path to .pkl or directory.
+            Path to .tbl (or .pkl) or directory.
         color
             Feature by which to color data by. If X given, will color by axis along which data varies.
             If two featuers vary, default will be used.
@@ -462,13 +447,25 @@ def plot_data(files, color, saveLoc='', partial=False):
             Flag indicating only partial dataset present instead of full combinatoral set.
         [saveLoc]
             Location of where to save file, default will save here.
+        [processes]
+            Number of worker processes to render figures in (default: all cores). Figures are rendered
+            in this process when not saving (saveLoc is empty) so they can be shown.
+        [output]
+            Figure output format, one of SVG, SVGZ (compressed SVG), PNG, RASTER (vector axes and text with
+            rasterized data) or AUTO (chosen per figure by number of plotted data points) (default: SVG).
+        [dpi]
+            Resolution of PNG figures and rasterized data (default: 300).
     """
 
     print("Making figures for the following files:")
 
     # Get files
-    PKLFILES = scripts.analyze.analyze_utilities.get_pkl_files(files)
+    PKLFILES = scripts.analyze.analyze_utilities.get_table_files(files)
+
+    OUTPUT = scripts.plot.plot_utilities.make_output_format_dict(output, dpi)
 
+    # Collect figure tasks for all files before rendering any of them
+    TASKS = []
     for file in PKLFILES:
 
         fileName = scripts.plot.plot_utilities.get_file_name(file)
@@ -477,11 +474,23 @@ def plot_data(files, color, saveLoc='', partial=False):
 
         FILEID, analysis = determine_data_file_type(fileName)
 
-        with open(file, 'rb') as f:
-            simsDF = pickle.load(f)
+        simsDF = scripts.plot.plot_tasks.SimsReference(file)
+
+        plot_data_based_on_analysis_type(TASKS, simsDF, analysis, color, partial, FILEID, saveLoc)
 
-        plot_data_based_on_analysis_type(simsDF, analysis, color, partial, FILEID, saveLoc)
+    if processes is None or processes < 1:
+        processes = multiprocessing.cpu_count()
+    if saveLoc == '':
+        processes = 1
+
+    # Each worker keeps up to two loaded files for following figures of the same file
+    if len(PKLFILES) > 0:
+        processes = scripts.memory.memory.limit_processes(processes, 2 * max([scripts.memory.memory.estimate_file_memory(file) for file in PKLFILES]))
+
+    print("Rendering " + str(len(TASKS)) + " figures with " + str(processes) + " processes.")
+    timings = scripts.plot.plot_tasks.render_plot_tasks(TASKS, processes, OUTPUT)
+    scripts.plot.plot_tasks.print_plot_task_timings(timings)
 
     print("Finished making plots for all files.")
 
-    return
\ No newline at end of file
+    return
@@ -46,6 +46,6 @@ def plot_rank_ladder(rankDF, COLOR, XRANK, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + 'RANK_LADDER_' + XRANK + '_' + YRANK + '_' + COLOR.replace(' ','') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + 'RANK_LADDER_' + XRANK + '_' + YRANK + '_' + COLOR.replace(' ','') + '.svg')
 
     return
\ No newline at end of file
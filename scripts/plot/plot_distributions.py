@@ -0,0 +1,162 @@
+import itertools
+import numpy as np
+import seaborn as sns
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from colorsys import rgb_to_hls
+import scripts.plot.plot_utilities
+
+def define_violin_globals():
+    """Define violin plot globals matching seaborn violinplot defaults."""
+
+    WIDTH = 0.8
+    GRIDSIZE = 100
+    CUT = 2
+    BINS = 512
+    SATURATION = 0.75
+
+    return WIDTH, GRIDSIZE, CUT, BINS, SATURATION
+
+def stack_group_values(simsDF, key, index, COLOR):
+    """Stack per cell values at time index of all simulations into one array per color key."""
+
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+    lists = [row[index] for row in simsDF[key]]
+
+    groupValues = {}
+    for group in dict.fromkeys(keys):
+        rows = [y for y, k in zip(lists, keys) if k == group]
+        groupValues[group] = np.fromiter(itertools.chain.from_iterable(rows), dtype=float)
+
+    return groupValues
+
+def get_group_order(groupValues, colorDict):
+    """Get color keys with values in color dictionary order."""
+
+    return [key for key in colorDict if key in groupValues and groupValues[key].size > 0]
+
+def estimate_binned_density(values):
+    """Estimate Gaussian KDE of values with Scott bandwidth from histogram of values."""
+
+    WIDTH, GRIDSIZE, CUT, BINS, SATURATION = define_violin_globals()
+
+    if values.size == 0:
+        return np.array([]), np.array([1.])
+    elif values.min() == values.max():
+        return np.array([values[0]]), np.array([1.])
+
+    bw = values.size**(-1./5) * values.std(ddof=1)
+    support = np.linspace(values.min() - bw*CUT, values.max() + bw*CUT, GRIDSIZE)
+
+    # Kernel is evaluated against bin centers instead of every value so cost does not grow with number of cells
+    counts, edges = np.histogram(values, BINS)
+    centers = (edges[:-1] + edges[1:])/2
+    kernel = np.exp(-0.5*((support[:, None] - centers[None, :])/bw)**2)
+    density = kernel.dot(counts)/(values.size*bw*np.sqrt(2*np.pi))
+
+    return support, density
+
+def get_violin_gray(colors):
+    """Get gray used for violin edges and box lines based on darkest color."""
+
+    lum = min([rgb_to_hls(*mpl.colors.to_rgb(color))[1] for color in colors]) * .6
+
+    return mpl.colors.rgb2hex((lum, lum, lum))
+
+def draw_violin(ax, center, support, density, dwidth, color, gray, side=None):
+    """Draw violin (or half violin for a side) of density over support at center."""
+
+    linewidth = mpl.rcParams['lines.linewidth']
+
+    if support.size == 0:
+        return
+    elif support.size == 1:
+        d = density.item()
+        left = center - d*dwidth if side != 'right' else center
+        right = center + d*dwidth if side != 'left' else center
+        ax.plot([left, right], [support.item(), support.item()], color=gray, linewidth=linewidth)
+        return
+
+    left = center - density*dwidth if side != 'right' else np.full(support.size, center)
+    right = center + density*dwidth if side != 'left' else np.full(support.size, center)
+    ax.fill_betweenx(support, left, right, facecolor=color, edgecolor=gray, linewidth=linewidth)
+
+    return
+
+def draw_box_lines(ax, values, center, gray):
+    """Draw box plot whiskers, quartiles and median of values at center."""
+
+    linewidth = mpl.rcParams['lines.linewidth']
+
+    if values.size == 0:
+        return
+
+    q25, q50, q75 = np.percentile(values, [25, 50, 75])
+    whisker_lim = 1.5*(q75 - q25)
+    h1 = values[values >= (q25 - whisker_lim)].min()
+    h2 = values[values <= (q75 + whisker_lim)].max()
+
+    ax.plot([center, center], [h1, h2], linewidth=linewidth, color=gray)
+    ax.plot([center, center], [q25, q75], linewidth=linewidth*3, color=gray)
+    ax.scatter(center, q50, zorder=3, color="white", edgecolor=gray, s=np.square(linewidth*2))
+
+    return
+
+def set_categorical_axis(ax, order):
+    """Set x axis ticks and limits for categorical groups."""
+
+    ax.set_xticks(np.arange(len(order)))
+    ax.set_xticklabels(order)
+    ax.xaxis.grid(False)
+    ax.set_xlim(-.5, len(order) - .5)
+
+    return
+
+def plot_violins(ax, groupValues, order, colorDict):
+    """Plot violins of precomputed densities for each group in order, scaled by area across groups."""
+
+    WIDTH, GRIDSIZE, CUT, BINS, SATURATION = define_violin_globals()
+
+    colors = [sns.desaturate(colorDict[key], SATURATION) for key in order]
+    gray = get_violin_gray(colors)
+
+    densities = [estimate_binned_density(groupValues[key]) for key in order]
+    maxDensity = max([density.max() for support, density in densities if support.size > 1] + [0])
+
+    for i, (support, density) in enumerate(densities):
+        if support.size > 1:
+            density = density/maxDensity
+        draw_violin(ax, i, support, density, WIDTH/2, colors[i], gray)
+        draw_box_lines(ax, groupValues[order[i]], i, gray)
+
+    set_categorical_axis(ax, order)
+
+    return ax
+
+def plot_split_violins(ax, groupValues, order, hues):
+    """Plot violins split into halves for two hues of each group in order, scaled by area within groups."""
+
+    WIDTH, GRIDSIZE, CUT, BINS, SATURATION = define_violin_globals()
+
+    colors = [sns.desaturate(color, SATURATION) for color in sns.color_palette(None, len(hues))]
+    gray = get_violin_gray(colors)
+
+    for i, key in enumerate(order):
+        densities = [estimate_binned_density(groupValues.get((key, hue), np.array([]))) for hue in hues]
+        maxDensity = max([density.max() for support, density in densities if support.size > 1] + [0])
+
+        for h, (support, density) in enumerate(densities):
+            if support.size > 1:
+                density = density/maxDensity
+            draw_violin(ax, i, support, density, WIDTH/2, colors[h], gray, side='left' if h == 0 else 'right')
+
+        values = np.concatenate([groupValues.get((key, hue), np.array([])) for hue in hues])
+        draw_box_lines(ax, values, i, gray)
+
+    for color, hue in zip(colors, hues):
+        ax.add_patch(plt.Rectangle((0, 0), 0, 0, linewidth=mpl.rcParams['lines.linewidth']/2, edgecolor=gray,
+                                   facecolor=color, label=str(hue)))
+
+    set_categorical_axis(ax, order)
+
+    return ax
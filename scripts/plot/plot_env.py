@@ -1,4 +1,5 @@
 import scripts.plot.plot_utilities
+import scripts.plot.plot_context
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -33,7 +34,6 @@ def plot_env_conc_times_bar(MOL_NAME, simsDF, COLOR, FILEID, SAVELOC, TIMES):
     colorDict = COLOR_DICT[COLOR]
     HUES = {}
 
-    SIM_TIMES = simsDF.iloc[0]['TIME']
     indicies = []
     TITLE_TIMES = ''
     for t in range(0, len(TIMES)):
@@ -41,13 +41,13 @@ def plot_env_conc_times_bar(MOL_NAME, simsDF, COLOR, FILEID, SAVELOC, TIMES):
             TITLE_TIMES += str(TIMES[t]) + ', '
         else:
             TITLE_TIMES += str(TIMES[t]-1) + ', '
-        for s in range(0, len(SIM_TIMES)):
-            if float(TIMES[t]) == float(SIM_TIMES[s]):
-                indicies.append(s)
-                if 'VITRO' in FILEID:
-                    HUES[s] = TIMES[t]
-                else:
-                    HUES[s] = TIMES[t]-1
+        s = scripts.plot.plot_context.get_time_index(simsDF, TIMES[t])
+        if s != -1:
+            indicies.append(s)
+            if 'VITRO' in FILEID:
+                HUES[s] = TIMES[t]
+            else:
+                HUES[s] = TIMES[t]-1
 
     TITLE_TIMES = TITLE_TIMES[0:-2]
 
@@ -59,18 +59,15 @@ def plot_env_conc_times_bar(MOL_NAME, simsDF, COLOR, FILEID, SAVELOC, TIMES):
     envDF = make_env_df()
     order = []
 
+    concs = scripts.plot.plot_context.get_series_array(simsDF, key)
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+
     for i in range(0, len(simsDF)):
         for index in indicies:
             envDict = make_env_dict()
-            y = simsDF.iloc[i][key][index]
+            y = concs[i, index]
             h = HUES[index]
-
-            if COLOR == 'ANTIGENS CANCER' and int(simsDF.iloc[i]['DOSE']) == 0:
-                x = str(0)
-            elif COLOR == 'ANTIGENS HEALTHY' and int(simsDF.iloc[i]['DOSE']) == 0:
-                x = "CONTROL"
-            else:
-                x = str(simsDF.iloc[i][COLOR])
+            x = keys[i]
 
             envDict['TIME'] = h
             envDict['AXIS'] = x
@@ -115,8 +112,8 @@ def plot_env_conc_times_bar(MOL_NAME, simsDF, COLOR, FILEID, SAVELOC, TIMES):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_CONC_' + MOL_NAME + '_XTIME_DAYS_' + TITLE_TIMES.replace(',','').replace(' ','')
-                    + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_CONC_' + MOL_NAME + '_XTIME_DAYS_' + TITLE_TIMES.replace(',','').replace(' ','')
+                                                + '.svg')
     return
 
 def plot_evn_concs_ideal_realistic_parity(MOL_NAME, simsDF, XAXIS, COLOR, TIMES, FILEID, SAVELOC):
@@ -147,17 +144,16 @@ def plot_evn_concs_ideal_realistic_parity(MOL_NAME, simsDF, XAXIS, COLOR, TIMES,
     else:
         ymax = 160
 
-    timeIndicies = []
-    SIM_TIMES = simsDF.iloc[0]['TIME']
-    for t in TIMES:
-        for s in range(0,len(SIM_TIMES)):
-            if float(t) == float(SIM_TIMES[s]):
-                timeIndicies.append(s)
+    timeIndicies = [scripts.plot.plot_context.get_time_index(simsDF, t) for t in TIMES]
+    timeIndicies = [s for s in timeIndicies if s != -1]
 
     timeMarkers = {'1': 's',
                    '4': 'd',
                    '7': 'o'}
 
+    # Axis names are needed for labels even when no selected time point is present in data
+    YAXIS = 'IDEAL' if XAXIS == 'REALISTIC' else 'REALISTIC'
+
     for time in timeIndicies:
         ideal = []
         realistic = []
@@ -175,14 +171,12 @@ def plot_evn_concs_ideal_realistic_parity(MOL_NAME, simsDF, XAXIS, COLOR, TIMES,
             marker.append(timeMarkers[str(int(time/2))])
 
         if XAXIS == 'REALISTIC':
-            YAXIS = 'IDEAL'
             ax.plot([0, ymax], [0, ymax], color='lightgray', zorder=0)
             ax.set_xlim([0, ymax])
             ax.set_ylim([0, ymax])
             for i in range(0, len(ideal)):
                 ax.scatter(realistic[i], ideal[i], s=100, zorder=1, color=color[i], marker=marker[i])
         else:
-            YAXIS = 'REALISTIC'
             ax.plot([0, ymax], [0, ymax], color='lightgray', zorder=0)
             ax.set_xlim([0, ymax])
             ax.set_ylim([0, ymax])
@@ -208,7 +202,7 @@ def plot_evn_concs_ideal_realistic_parity(MOL_NAME, simsDF, XAXIS, COLOR, TIMES,
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_CONC_' + MOL_NAME + '_COCULTURE_PARITY_' + XAXIS + '_' + YAXIS + '_' + COLOR.replace(' ', '') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_CONC_' + MOL_NAME + '_COCULTURE_PARITY_' + XAXIS + '_' + YAXIS + '_' + COLOR.replace(' ', '') + '.svg')
 
     return
 
@@ -44,7 +44,7 @@ def plot_binding_heuristic_CAR(SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + 'BINDING_HEURISTIC_CAR' + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + 'BINDING_HEURISTIC_CAR' + '.svg')
 
     return
 
@@ -96,6 +96,6 @@ def plot_binding_heuristic_self(SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + 'BINDING_HEURISTIC_SELF' + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + 'BINDING_HEURISTIC_SELF' + '.svg')
 
     return
\ No newline at end of file
@@ -1,4 +1,5 @@
 import scripts.plot.plot_utilities
+import scripts.plot.plot_context
 import matplotlib.pyplot as plt
 
 def get_max(LIST, INDEX):
@@ -17,11 +18,7 @@ def plot_kill_curve_normalized_sim(simsDF, FILEID, SAVELOC, TIME):
     affinityColorDict = scripts.plot.plot_utilities.make_car_affinity_color_dict()
     doseLineDict = scripts.plot.plot_utilities.make_dose_line_dict()
 
-    TIMES = simsDF.iloc[0]['TIME']
-    index = -1
-    for t in range(0,len(TIMES)):
-        if float(TIMES[t]) == float(TIME):
-            index = t
+    index = scripts.plot.plot_context.get_time_index(simsDF, TIME)
 
     figKC = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figKC.add_subplot(1, 1, 1)
@@ -43,11 +40,10 @@ def plot_kill_curve_normalized_sim(simsDF, FILEID, SAVELOC, TIME):
 
 
     # Make ANTIGEN and % KILLING CANCER CELLS array sorted by dose
-    for i in range(0, len(simsDF)):
-        antigen = simsDF.iloc[i]['ANTIGENS CANCER']
-        dose = simsDF.iloc[i]['DOSE']
-        affinity = simsDF.iloc[i]['CAR AFFINITY']
-        killed = 1-(simsDF.iloc[i]['CANCER LIVE'][index]/simsDF.iloc[i]['CANCER LIVE'][0])
+    cancerLive = scripts.plot.plot_context.get_series_array(simsDF, 'CANCER LIVE')
+    killedAll = 1 - cancerLive[:, index]/cancerLive[:, 0]
+
+    for i, (antigen, dose, affinity, killed) in enumerate(zip(simsDF['ANTIGENS CANCER'], simsDF['DOSE'], simsDF['CAR AFFINITY'], killedAll)):
 
         if dose == 250:
             if affinity >= 1e-6:
@@ -180,7 +176,7 @@ def plot_kill_curve_normalized_sim(simsDF, FILEID, SAVELOC, TIME):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_KILLCURVE_NORM_SIM_' + str(TIME) + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_KILLCURVE_NORM_SIM_' + str(TIME) + '.svg')
 
     return
 
@@ -241,6 +237,6 @@ def plot_kill_curve_normalized_exp_separated(SAVELOC):
         if SAVELOC == '':
             plt.show()
         else:
-            plt.savefig(SAVELOC + 'KILLCURVE_NORM_EXP_' + d["SAVE"] + '.svg', bbox_inches='tight')
+            scripts.plot.plot_utilities.save_figure(SAVELOC + 'KILLCURVE_NORM_EXP_' + d["SAVE"] + '.svg')
 
     return
\ No newline at end of file
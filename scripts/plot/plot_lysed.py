@@ -58,7 +58,7 @@ def plot_counts_lysed_time(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTSLYSED_' + POP_NAME.replace(' ', '') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTSLYSED_' + POP_NAME.replace(' ', '') + '.svg')
 
     return
 
@@ -124,7 +124,7 @@ def plot_counts_lysed_time_merge(POP_NAMES, simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTSLYSED_MERGE' + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTSLYSED_MERGE' + '.svg')
 
     return
 
@@ -173,7 +173,7 @@ def plot_counts_lysed_time_exact(POP_NAME, simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTSLYSEDEXACT_' + POP_NAME.replace(' ', '') + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTSLYSEDEXACT_' + POP_NAME.replace(' ', '') + '.svg')
 
     return
 
@@ -224,6 +224,6 @@ def plot_counts_lysed_time_exact_merge(POP_NAMES, simsDF, COLOR, FILEID, SAVELOC
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTSLYSEDEXACT_MERGE' + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTSLYSEDEXACT_MERGE' + '.svg')
 
     return
\ No newline at end of file
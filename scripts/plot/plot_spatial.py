@@ -1,4 +1,5 @@
 import scripts.plot.plot_utilities
+import scripts.plot.plot_context
 import matplotlib.pyplot as plt
 
 def plot_counts_radius(POP_NAME, simsDF, COLOR, FILEID, SAVELOC, TIME):
@@ -10,24 +11,14 @@ def plot_counts_radius(POP_NAME, simsDF, COLOR, FILEID, SAVELOC, TIME):
 
     colorDict = COLOR_DICT[COLOR]
 
-    TIMES = simsDF.iloc[0]['TIME']
-    index = -1
-    for t in range(0, len(TIMES)):
-        if float(TIMES[t]) == float(TIME):
-            index = t
+    index = scripts.plot.plot_context.get_time_index(simsDF, TIME)
 
     figCountsRad = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCountsRad.add_subplot(1, 1, 1)
-    for i in range(0, len(simsDF)):
-        if int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS CANCER':
-            ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][POP_NAME][index],
-                    color=colorDict[str(0)])
-        elif int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS HEALTHY':
-            ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][POP_NAME][index],
-                    color=colorDict["CONTROL"])
-        else:
-            ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][POP_NAME][index],
-                    color=colorDict[str(simsDF.iloc[i][COLOR])])
+    radius = scripts.plot.plot_context.get_series_array(simsDF, 'RADIUS')[0]
+    counts = scripts.plot.plot_context.get_series_array(simsDF, POP_NAME)[:, index, :]
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+    scripts.plot.plot_utilities.plot_series_by_key(ax, radius, counts, keys, colorDict)
     ax.set_xlabel("RADIUS", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_ylabel(POP_NAME + "\nCELL COUNTS (NUMBERS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_title(POP_NAME + " COUNT\nACROSS RADIUS AT TIME " + str(TIME), fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, pad=LABELPAD)
@@ -54,7 +45,7 @@ def plot_counts_radius(POP_NAME, simsDF, COLOR, FILEID, SAVELOC, TIME):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTS_' + POP_NAME.replace(' ','').replace('NORMALIZED','_NORM') + '_DAY_' + str(TIME) +  '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTS_' + POP_NAME.replace(' ','').replace('NORMALIZED','_NORM') + '_DAY_' + str(TIME) +  '.svg')
 
     return
 
@@ -67,54 +58,21 @@ def plot_counts_radius_merge(POP_NAME, simsDF, COLOR, FILEID, SAVELOC, TIME):
 
     colorDict = COLOR_DICT[COLOR]
 
-    TIMES = simsDF.iloc[0]['TIME']
-    index = -1
-    for t in range(0, len(TIMES)):
-        if float(TIMES[t]) == float(TIME):
-            index = t
+    index = scripts.plot.plot_context.get_time_index(simsDF, TIME)
 
     figCountsRad = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
     ax = figCountsRad.add_subplot(1, 1, 1)
-    for i in range(0, len(simsDF)):
-        if int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS CANCER':
-            ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][POP_NAME][index],
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict[str(0)])
-            if 'NORMALIZED' in POP_NAME:
-                pop = POP_NAME.replace(' NORMALIZED','')
-                ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][pop + ' LIVE NORMALIZED'][index],
-                        linestyle=liveLineDict['LIVE'],
-                        color=colorDict[str(0)])
-            else:
-                ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][POP_NAME + ' LIVE'][index],
-                        linestyle=liveLineDict['LIVE'],
-                        color=colorDict[str(0)])
-        elif int(simsDF.iloc[i]['DOSE']) == 0 and COLOR == 'ANTIGENS HEALTHY':
-            ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][POP_NAME][index],
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict["CONTROL"])
-            if 'NORMALIZED' in POP_NAME:
-                pop = POP_NAME.replace(' NORMALIZED','')
-                ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][pop + ' LIVE NORMALIZED'][index],
-                        linestyle=liveLineDict['LIVE'],
-                        color=colorDict["CONTROL"])
-            else:
-                ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][POP_NAME + ' LIVE'][index],
-                        linestyle=liveLineDict['LIVE'],
-                        color=colorDict["CONTROL"])
-        else:
-            ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][POP_NAME][index],
-                    linestyle=liveLineDict['TOTAL'],
-                    color=colorDict[str(simsDF.iloc[i][COLOR])])
-            if 'NORMALIZED' in POP_NAME:
-                pop = POP_NAME.replace(' NORMALIZED','')
-                ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][pop + ' LIVE NORMALIZED'][index],
-                        linestyle=liveLineDict['LIVE'],
-                        color=colorDict[str(simsDF.iloc[i][COLOR])])
-            else:
-                ax.plot(simsDF.iloc[i]['RADIUS'], simsDF.iloc[i][POP_NAME + ' LIVE'][index],
-                        linestyle=liveLineDict['LIVE'],
-                        color=colorDict[str(simsDF.iloc[i][COLOR])])
+    if 'NORMALIZED' in POP_NAME:
+        live = POP_NAME.replace(' NORMALIZED','') + ' LIVE NORMALIZED'
+    else:
+        live = POP_NAME + ' LIVE'
+
+    radius = scripts.plot.plot_context.get_series_array(simsDF, 'RADIUS')[0]
+    counts = scripts.plot.plot_context.get_series_array(simsDF, POP_NAME)[:, index, :]
+    countsLive = scripts.plot.plot_context.get_series_array(simsDF, live)[:, index, :]
+    keys = scripts.plot.plot_utilities.get_color_keys(simsDF, COLOR)
+    scripts.plot.plot_utilities.plot_series_by_key(ax, radius, counts, keys, colorDict, liveLineDict['TOTAL'])
+    scripts.plot.plot_utilities.plot_series_by_key(ax, radius, countsLive, keys, colorDict, liveLineDict['LIVE'])
     ax.set_xlabel("RADIUS", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_ylabel(POP_NAME + "\nCELL COUNTS (NUMBERS)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
     ax.set_title(POP_NAME + " COUNT\nACROSS RADIUS AT TIME " + str(TIME), fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_TITLES, pad=LABELPAD)
@@ -141,6 +99,6 @@ def plot_counts_radius_merge(POP_NAME, simsDF, COLOR, FILEID, SAVELOC, TIME):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_COUNTS_MERGE_' + POP_NAME.replace(' ','').replace('NORMALIZED','_NORM') + '_DAY_' + str(TIME) + '.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_COUNTS_MERGE_' + POP_NAME.replace(' ','').replace('NORMALIZED','_NORM') + '_DAY_' + str(TIME) + '.svg')
 
     return
\ No newline at end of file
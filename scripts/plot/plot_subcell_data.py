@@ -1,7 +1,7 @@
 import scripts.analyze.analyze_utilities
 import scripts.plot.plot_utilities
-import pandas as pd
-import seaborn as sns
+import scripts.plot.plot_context
+import scripts.plot.plot_distributions
 import matplotlib.pyplot as plt
 
 def plot_state_fracs(simsDF, COLOR, FILEID, SAVELOC, ALT_AXES=False):
@@ -191,9 +191,9 @@ def plot_state_fracs(simsDF, COLOR, FILEID, SAVELOC, ALT_AXES=False):
         plt.show()
     else:
         if ALT_AXES:
-            plt.savefig(SAVELOC + FILEID + '_STATESFRAC_ALTAXES.svg', bbox_inches='tight')
+            scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_STATESFRAC_ALTAXES.svg')
         else:
-            plt.savefig(SAVELOC + FILEID + '_STATESFRAC.svg', bbox_inches='tight')
+            scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_STATESFRAC.svg')
 
     return
 
@@ -384,9 +384,9 @@ def plot_state_fracs_treat(simsDF, COLOR, FILEID, SAVELOC, ALT_AXES=False):
         plt.show()
     else:
         if ALT_AXES:
-            plt.savefig(SAVELOC + FILEID + '_STATESFRAC_TREAT_ALTAXES.svg', bbox_inches='tight')
+            scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_STATESFRAC_TREAT_ALTAXES.svg')
         else:
-            plt.savefig(SAVELOC + FILEID + '_STATESFRAC_TREAT.svg', bbox_inches='tight')
+            scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_STATESFRAC_TREAT.svg')
 
     return
 
@@ -568,7 +568,7 @@ def plot_state_fracs_neutral(simsDF, COLOR, FILEID, SAVELOC):
     if SAVELOC == '':
         plt.show()
     else:
-        plt.savefig(SAVELOC + FILEID + '_STATESFRACNEUTR.svg', bbox_inches='tight')
+        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + '_STATESFRACNEUTR.svg')
 
     return
 
@@ -581,11 +581,7 @@ def plot_volumes(simsDF, COLOR, FILEID, SAVELOC, TIME):
 
     colorDict = COLOR_DICT[COLOR]
 
-    TIMES = simsDF.iloc[0]['TIME']
-    index = -1
-    for t in range(0, len(TIMES)):
-        if float(TIMES[t]) == float(TIME):
-            index = t
+    index = scripts.plot.plot_context.get_time_index(simsDF, TIME)
 
     filesplit = FILEID.split('_')
 
@@ -595,31 +591,13 @@ def plot_volumes(simsDF, COLOR, FILEID, SAVELOC, TIME):
         else:
             if 'LIVE' not in POP_NAMES[p]:
                 key = 'CELL VOLUMES ' + POP_NAMES[p]
-                Y = []
-                X = []
-                order = []
+                groupValues = scripts.plot.plot_distributions.stack_group_values(simsDF, key, index, COLOR)
+                order = scripts.plot.plot_distributions.get_group_order(groupValues, colorDict)
 
-                for i in range(0, len(simsDF)):
-                    y = simsDF.iloc[i][key][index]
-
-                    if COLOR == 'ANTIGENS CANCER' and int(simsDF.iloc[i]['DOSE']) == 0:
-                        x = [str(0)] * len(y)
-                    elif COLOR == 'ANTIGENS HEALTHY' and int(simsDF.iloc[i]['DOSE']) == 0:
-                        x = ["CONTROL"] * len(y)
-                    else:
-                        x = [str(simsDF.iloc[i][COLOR])] * len(y)
-
-                    Y = Y + y
-                    X = X + x
-
-                for key in colorDict:
-                    if key in X:
-                        order.append(key)
-
-                if X != [] and Y != []:
+                if order != []:
                     figV = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
                     ax = figV.add_subplot(1, 1, 1)
-                    ax = sns.violinplot(x=X, y=Y, order=order, palette=colorDict)
+                    ax = scripts.plot.plot_distributions.plot_violins(ax, groupValues, order, colorDict)
                     ax.set_xlabel(POP_NAMES[p] + " POPULATION", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES,
                                   labelpad=LABELPAD)
                     ax.set_ylabel("VOLUME (um^3)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
@@ -637,7 +615,7 @@ def plot_volumes(simsDF, COLOR, FILEID, SAVELOC, TIME):
                     if SAVELOC == '':
                         plt.show()
                     else:
-                        plt.savefig(SAVELOC + FILEID.replace('_VOLUMES','') + '_VOLUMES_' + POP_NAMES[p].replace(' ', '') + '_DAY_' + str(TIME) + '.svg', bbox_inches='tight')
+                        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID.replace('_VOLUMES','') + '_VOLUMES_' + POP_NAMES[p].replace(' ', '') + '_DAY_' + str(TIME) + '.svg')
 
     return
 
@@ -650,11 +628,7 @@ def plot_cycles(simsDF, COLOR, FILEID, SAVELOC, TIME, HOURS):
 
     colorDict = COLOR_DICT[COLOR]
 
-    TIMES = simsDF.iloc[0]['TIME']
-    index = -1
-    for t in range(0, len(TIMES)):
-        if float(TIMES[t]) == float(TIME):
-            index = t
+    index = scripts.plot.plot_context.get_time_index(simsDF, TIME)
 
     filesplit = FILEID.split('_')
 
@@ -664,35 +638,17 @@ def plot_cycles(simsDF, COLOR, FILEID, SAVELOC, TIME, HOURS):
         else:
             if 'LIVE' not in POP_NAMES[p]:
                 key = 'AVG CELL CYCLES ' + POP_NAMES[p]
-                Y = []
-                X = []
-                order = []
-
-                for i in range(0, len(simsDF)):
-                    y = simsDF.iloc[i][key][index]
+                groupValues = scripts.plot.plot_distributions.stack_group_values(simsDF, key, index, COLOR)
+                order = scripts.plot.plot_distributions.get_group_order(groupValues, colorDict)
 
-                    if COLOR == 'ANTIGENS CANCER' and int(simsDF.iloc[i]['DOSE']) == 0:
-                        x = [str(0)] * len(y)
-                    elif COLOR == 'ANTIGENS HEALTHY' and int(simsDF.iloc[i]['DOSE']) == 0:
-                        x = ["CONTROL"] * len(y)
-                    else:
-                        x = [str(simsDF.iloc[i][COLOR])] * len(y)
-
-                    Y = Y + y
-                    X = X + x
-
-                for key in colorDict:
-                    if key in X:
-                        order.append(key)
-
-                if X != [] and Y != []:
+                if order != []:
 
                     if HOURS:
-                        Y = [float(c)/float(60) for c in Y]
+                        groupValues = {group: values/60. for group, values in groupValues.items()}
 
                     figC = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
                     ax = figC.add_subplot(1, 1, 1)
-                    ax = sns.violinplot(x=X, y=Y, order=order, palette=colorDict)
+                    ax = scripts.plot.plot_distributions.plot_violins(ax, groupValues, order, colorDict)
                     unit = "(hrs)" if HOURS else "(min)"
                     ax.set_xlabel(POP_NAMES[p] + " POPULATION", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
                     ax.set_ylabel("CYCLE LENGTH " + unit, fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
@@ -725,7 +681,7 @@ def plot_cycles(simsDF, COLOR, FILEID, SAVELOC, TIME, HOURS):
                             units = '_HOURS'
                         else:
                             units = '_MINUTES'
-                        plt.savefig(SAVELOC + FILEID.replace('_CYCLES','') + '_CYCLES_' + POP_NAMES[p].replace(' ', '') + '_DAY_' + str(TIME) + units + '.svg', bbox_inches='tight')
+                        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID.replace('_CYCLES','') + '_CYCLES_' + POP_NAMES[p].replace(' ', '') + '_DAY_' + str(TIME) + units + '.svg')
 
     return
 
@@ -746,45 +702,26 @@ def plot_volumes_split(simsDF, COLOR, FILEID, SAVELOC, TIME):
         else:
             if 'LIVE' not in POP_NAMES[p]:
 
-                TIMES_SIM = simsDF.iloc[0]['TIME']
-                index = -1
-
                 key = 'CELL VOLUMES ' + POP_NAMES[p]
-                Y = []
-                X = []
-                order = []
-                T = []
+                groupValues = {}
+                hues = []
 
                 for time in TIME:
-                    for t in range(0, len(TIMES_SIM)):
-                        if float(TIMES_SIM[t]) == float(time):
-                            index = t
-                            for i in range(0, len(simsDF)):
-                                y = simsDF.iloc[i][key][index]
-                                times = [time] * len(y)
-                                if COLOR == 'ANTIGENS CANCER' and int(simsDF.iloc[i]['DOSE']) == 0:
-                                    x = [str(0)] * len(y)
-                                elif COLOR == 'ANTIGENS HEALTHY' and int(simsDF.iloc[i]['DOSE']) == 0:
-                                    x = ["CONTROL"] * len(y)
-                                else:
-                                    x = [str(simsDF.iloc[i][COLOR])] * len(y)
-
-                                Y = Y + y
-                                X = X + x
-                                T = T + times
-
-                dictVols = {'TIME': T, 'FEATURE': X, 'VOLUME': Y}
-                dfVols = pd.DataFrame(dictVols, columns={'TIME': pd.Series([], dtype='float'),
-                                                         'FEATURE': pd.Series([], dtype='str'),
-                                                         'VOLUME': pd.Series([], dtype='float')})
-                for key in colorDict:
-                    if key in X:
-                        order.append(key)
-
-                if X != [] and Y != []:
+                    index = scripts.plot.plot_context.get_time_index(simsDF, time)
+                    if index != -1:
+                        timeValues = scripts.plot.plot_distributions.stack_group_values(simsDF, key, index, COLOR)
+                        for group in scripts.plot.plot_distributions.get_group_order(timeValues, colorDict):
+                            groupValues[(group, time)] = timeValues[group]
+                        if time not in hues:
+                            hues.append(time)
+
+                groups = [group for group, time in groupValues]
+                order = [group for group in colorDict if group in groups]
+
+                if groupValues != {}:
                     figV = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
                     ax = figV.add_subplot(1, 1, 1)
-                    sns.violinplot(ax=ax, data=dfVols, x="FEATURE", y="VOLUME", order=order, hue="TIME", split=True)#, palette=colorDict)
+                    scripts.plot.plot_distributions.plot_split_violins(ax, groupValues, order, hues)
                     ax.set_xlabel(POP_NAMES[p] + " POPULATION", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES,
                                   labelpad=LABELPAD)
                     ax.set_ylabel("VOLUME (um^3)", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES, labelpad=LABELPAD)
@@ -802,7 +739,7 @@ def plot_volumes_split(simsDF, COLOR, FILEID, SAVELOC, TIME):
                     if SAVELOC == '':
                         plt.show()
                     else:
-                        plt.savefig(SAVELOC + FILEID.replace('_VOLUMES','') + '_VOLUMES_' + POP_NAMES[p].replace(' ', '') + '_DAY_' + str(TIME[0]) + str(TIME[1]) + '.svg', bbox_inches='tight')
+                        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID.replace('_VOLUMES','') + '_VOLUMES_' + POP_NAMES[p].replace(' ', '') + '_DAY_' + str(TIME[0]) + str(TIME[1]) + '.svg')
 
     return
 
@@ -823,47 +760,27 @@ def plot_cycles_split(simsDF, COLOR, FILEID, SAVELOC, TIME, HOURS):
         else:
             if 'LIVE' not in POP_NAMES[p]:
 
-                TIMES_SIM = simsDF.iloc[0]['TIME']
-                index = -1
-
                 key = 'AVG CELL CYCLES ' + POP_NAMES[p]
-                Y = []
-                X = []
-                order = []
-                T = []
+                groupValues = {}
+                hues = []
 
                 for time in TIME:
-                    for t in range(0, len(TIMES_SIM)):
-                        if float(TIMES_SIM[t]) == float(time):
-                            index = t
-                            for i in range(0, len(simsDF)):
-                                y = simsDF.iloc[i][key][index]
-                                times = [time] * len(y)
-                                if COLOR == 'ANTIGENS CANCER' and int(simsDF.iloc[i]['DOSE']) == 0:
-                                    x = [str(0)] * len(y)
-                                elif COLOR == 'ANTIGENS HEALTHY' and int(simsDF.iloc[i]['DOSE']) == 0:
-                                    x = ["CONTROL"] * len(y)
-                                else:
-                                    x = [str(simsDF.iloc[i][COLOR])] * len(y)
-
-                                Y = Y + y
-                                X = X + x
-                                T = T + times
-                if HOURS:
-                    Y = [float(c) / float(60) for c in Y]
-
-                dictVols = {'TIME': T, 'FEATURE': X, 'CYCLE': Y}
-                dfVols = pd.DataFrame(dictVols, columns={'TIME': pd.Series([], dtype='float'),
-                                                         'FEATURE': pd.Series([], dtype='str'),
-                                                         'CYCLE': pd.Series([], dtype='float')})
-                for key in colorDict:
-                    if key in X:
-                        order.append(key)
-
-                if X != [] and Y != []:
+                    index = scripts.plot.plot_context.get_time_index(simsDF, time)
+                    if index != -1:
+                        timeValues = scripts.plot.plot_distributions.stack_group_values(simsDF, key, index, COLOR)
+                        for group in scripts.plot.plot_distributions.get_group_order(timeValues, colorDict):
+                            values = timeValues[group]/60. if HOURS else timeValues[group]
+                            groupValues[(group, time)] = values
+                        if time not in hues:
+                            hues.append(time)
+
+                groups = [group for group, time in groupValues]
+                order = [group for group in colorDict if group in groups]
+
+                if groupValues != {}:
                     figV = plt.figure(figsize=(FIG_SIZE_X,FIG_SIZE_Y))
                     ax = figV.add_subplot(1, 1, 1)
-                    sns.violinplot(ax=ax, data=dfVols, x="FEATURE", y="CYCLE", order=order, hue="TIME", split=True)#, palette=colorDict)
+                    scripts.plot.plot_distributions.plot_split_violins(ax, groupValues, order, hues)
                     ax.set_xlabel(POP_NAMES[p] + " POPULATION", fontname='Arial', fontweight='bold', fontsize=FONTSIZE_AXES_VALUES,
                                   labelpad=LABELPAD)
                     unit = "(hrs)" if HOURS else "(min)"
@@ -900,6 +817,6 @@ def plot_cycles_split(simsDF, COLOR, FILEID, SAVELOC, TIME, HOURS):
                             units = '_HOURS'
                         else:
                             units = '_MINUTES'
-                        plt.savefig(SAVELOC + FILEID.replace('_CYCLES','') + '_CYCLES_' + POP_NAMES[p].replace(' ', '') + '_DAY_' + str(TIME[0]) + str(TIME[1]) + units + '.svg', bbox_inches='tight')
+                        scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID.replace('_CYCLES','') + '_CYCLES_' + POP_NAMES[p].replace(' ', '') + '_DAY_' + str(TIME[0]) + str(TIME[1]) + units + '.svg')
 
     return
\ No newline at end of file
@@ -0,0 +1,110 @@
+import collections
+import functools
+import importlib
+import multiprocessing
+import time
+import scripts.plot.plot_utilities
+import scripts.plot.plot_context
+import scripts.profile.profile_stages
+import scripts.storage.storage_arrays
+
+# Reference to simulation dataframe stored in a .tbl (or .pkl) file, loaded by whichever process renders the figure
+SimsReference = collections.namedtuple('SimsReference', ['FILE'])
+
+def add_plot_task(TASKS, plotter, *args):
+    """Add figure task for given plotter and plotter arguments to task list, skipping repeated tasks."""
+
+    task = (plotter.__module__, plotter.__name__, args)
+
+    # Repeated tasks would render the same figure file twice, possibly at the same time
+    if task not in TASKS:
+        TASKS.append(task)
+
+    return
+
+def describe_plot_task(task):
+    """Describe figure task with plotter name and simple arguments."""
+
+    module, name, args = task
+
+    description = []
+    for arg in args:
+        if isinstance(arg, SimsReference):
+            description.append(arg.FILE.split('/')[-1])
+        elif isinstance(arg, (str, int, float, bool)) and arg != '':
+            description.append(str(arg))
+
+    return name + '(' + ', '.join(description) + ')'
+
+@functools.lru_cache(maxsize=2)
+def load_simsdf(file):
+    """Load simulation dataframe and its plot context, keeping most recent files loaded for following tasks on the same file."""
+
+    # Plotters take dataframes of lists, while stacked time series are taken directly from the loaded arrays
+    arrayTable = scripts.storage.storage_arrays.load_array_table(file)
+    simsDF = scripts.storage.storage_arrays.make_frame(arrayTable)
+
+    scripts.plot.plot_context.set_series_arrays(simsDF, arrayTable)
+
+    return simsDF
+
+def initialize_plot_worker(OUTPUT):
+    """Initialize worker process to render figures with headless Agg backend and given output options."""
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    scripts.plot.plot_utilities.set_output_format(OUTPUT)
+
+    return
+
+@scripts.profile.profile_stages.profile_stage()
+def render_plot_task(task):
+    """Render figure task and return task description and time taken."""
+
+    import matplotlib.pyplot as plt
+
+    module, name, args = task
+    plotter = getattr(importlib.import_module(module), name)
+
+    start = time.time()
+
+    args = [load_simsdf(arg.FILE) if isinstance(arg, SimsReference) else arg for arg in args]
+
+    # Release figures even if plotter fails so long runs do not accumulate open figures
+    try:
+        plotter(*args)
+    finally:
+        plt.close('all')
+
+    return describe_plot_task(task), time.time() - start
+
+def render_plot_tasks(TASKS, PROCESSES, OUTPUT=None):
+    """Render all figure tasks, in a pool of worker processes if more than one process requested."""
+
+    if OUTPUT is None:
+        OUTPUT = scripts.plot.plot_utilities.make_output_format_dict()
+
+    scripts.plot.plot_utilities.set_output_format(OUTPUT)
+
+    if PROCESSES == 1 or len(TASKS) <= 1:
+        timings = [render_plot_task(task) for task in TASKS]
+    else:
+        with multiprocessing.Pool(min(PROCESSES, len(TASKS)), initializer=initialize_plot_worker, initargs=(OUTPUT,)) as pool:
+            timings = list(pool.imap(render_plot_task, TASKS, chunksize=1))
+
+    load_simsdf.cache_clear()
+
+    return timings
+
+def print_plot_task_timings(timings, top=20):
+    """Print total time and slowest figures rendered."""
+
+    total = sum([seconds for description, seconds in timings])
+
+    print('Rendered ' + str(len(timings)) + ' figures in ' + '{:.1f}'.format(total) + ' s of plotting time.')
+    print('Slowest figures:')
+    for description, seconds in sorted(timings, key=lambda t: t[1], reverse=True)[:top]:
+        print('\t' + '{:8.2f}'.format(seconds) + ' s  ' + description)
+
+    return
@@ -1,6 +1,196 @@
+import contextlib
+import gzip
+import os
 import re
-from matplotlib import cm as mplcm
-from colour import Color
+import scripts.plot.plot_context
+import numpy as np
+
+def define_output_format_thresholds():
+    """Define number of plotted data points above which automatic output rasterizes data or saves PNG."""
+
+    OUTPUT_THRESHOLDS = {
+        "RASTER": 20000,
+        "PNG": 500000
+    }
+
+    return OUTPUT_THRESHOLDS
+
+def check_output_format_arg(output):
+    """Check output format argument for how to save figures."""
+
+    if output.upper() in ['SVG', 'SVGZ', 'PNG', 'RASTER', 'AUTO']:
+        FORMAT = output.upper()
+    else:
+        FORMAT = 'SVG'
+
+    return FORMAT
+
+def make_output_format_dict(output='svg', dpi=300):
+    """Make dictionary of figure output options."""
+
+    OUTPUT = {
+        "FORMAT": check_output_format_arg(output),
+        "DPI": int(dpi)
+    }
+
+    return OUTPUT
+
+# Figure output options used by save_figure, set once per run (and per worker process) with set_output_format
+OUTPUT_FORMAT = make_output_format_dict()
+
+def set_output_format(OUTPUT):
+    """Set figure output options used when saving figures in this process."""
+
+    OUTPUT_FORMAT.update(OUTPUT)
+
+    return
+
+def count_figure_data_points(fig):
+    """Count data points drawn in all axes of figure."""
+
+    points = 0
+
+    for ax in fig.axes:
+        for line in ax.lines:
+            points += len(line.get_xdata())
+        for collection in ax.collections:
+            points += max(len(collection.get_offsets()), sum([len(path.vertices) for path in collection.get_paths()]))
+        points += len(ax.patches)
+        for image in ax.images:
+            points += image.get_array().size
+
+    return points
+
+def resolve_output_format(fig, FORMAT):
+    """Resolve automatic output format based on number of data points in figure."""
+
+    OUTPUT_THRESHOLDS = define_output_format_thresholds()
+
+    if FORMAT != 'AUTO':
+        return FORMAT
+
+    points = count_figure_data_points(fig)
+
+    if points >= OUTPUT_THRESHOLDS['PNG']:
+        return 'PNG'
+    elif points >= OUTPUT_THRESHOLDS['RASTER']:
+        return 'RASTER'
+    else:
+        return 'SVG'
+
+def rasterize_figure_data(fig):
+    """Rasterize data artists in all axes of figure, keeping axes, labels and legends as vectors."""
+
+    for ax in fig.axes:
+        for artist in list(ax.lines) + list(ax.collections) + list(ax.patches) + list(ax.images):
+            artist.set_rasterized(True)
+
+    return
+
+def define_figure_date_metadata():
+    """Define metadata of each figure extension that leaves out date of saving."""
+
+    DATE_METADATA = {
+        "svg": {'Date': None},
+        "pdf": {'CreationDate': None}
+    }
+
+    return DATE_METADATA
+
+def make_figure_metadata(fileName):
+    """Make metadata to save figure with so the same figure is saved to identical bytes, None where not supported."""
+
+    import matplotlib
+
+    # Metadata of svg figures can only be given from matplotlib 3.2, dates are then left out through SOURCE_DATE_EPOCH
+    version = tuple([int(v) for v in re.findall(r'\d+', matplotlib.__version__)[:2]])
+    extension = fileName.rsplit('.', 1)[-1].lower()
+
+    if version < (3, 2) or extension not in define_figure_date_metadata():
+        return None
+
+    return define_figure_date_metadata()[extension]
+
+@contextlib.contextmanager
+def reproducible_figure_output():
+    """Fix ids and dates written into figures saved within context, restoring options of caller afterwards."""
+
+    import matplotlib
+
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch is None:
+        os.environ['SOURCE_DATE_EPOCH'] = '0'
+
+    # Svg ids are otherwise salted with a random uuid
+    try:
+        with matplotlib.rc_context({'svg.hashsalt': 'carcade'}):
+            yield
+    finally:
+        if epoch is None:
+            os.environ.pop('SOURCE_DATE_EPOCH', None)
+
+def save_figure(fileName):
+    """Save current figure to file in selected output format and close it so figures do not accumulate across plots."""
+
+    import matplotlib.pyplot as plt
+
+    fig = plt.gcf()
+
+    # Png figures hold no date, so only svg and pdf figures are given metadata
+    metadata = make_figure_metadata(fileName)
+    METADATA = {'metadata': metadata} if metadata is not None else {}
+
+    try:
+        FORMAT = resolve_output_format(fig, OUTPUT_FORMAT['FORMAT'])
+
+        with reproducible_figure_output():
+            if FORMAT == 'PNG':
+                fig.savefig(fileName.rsplit('.', 1)[0] + '.png', bbox_inches='tight', dpi=OUTPUT_FORMAT['DPI'])
+            elif FORMAT == 'RASTER':
+                rasterize_figure_data(fig)
+                fig.savefig(fileName, bbox_inches='tight', dpi=OUTPUT_FORMAT['DPI'], **METADATA)
+            elif FORMAT == 'SVGZ' and fileName.endswith('.svg'):
+                # Compressed without modification time in the gzip header
+                with gzip.GzipFile(fileName + 'z', 'wb', mtime=0) as f:
+                    fig.savefig(f, format='svg', bbox_inches='tight', **METADATA)
+            else:
+                fig.savefig(fileName, bbox_inches='tight', **METADATA)
+    finally:
+        plt.close(fig)
+
+    return
+
+def get_color_keys(simsDF, COLOR):
+    """Get color dictionary key for each simulation, with untreated simulations colored as controls."""
+
+    keys = simsDF[COLOR].astype(str).values.copy()
+    untreated = simsDF['DOSE'].astype(int).values == 0
+
+    if COLOR == 'ANTIGENS CANCER':
+        keys[untreated] = '0'
+    elif COLOR == 'ANTIGENS HEALTHY':
+        keys[untreated] = 'CONTROL'
+
+    return keys
+
+def stack_time_series(simsDF, column, START=0):
+    """Stack time series in column of all simulations from start index into simulations x times array."""
+
+    series = scripts.plot.plot_context.get_series_array(simsDF, column)
+
+    return series[:, START:]
+
+def plot_series_by_key(ax, plot_time, series, keys, colorDict, linestyle='solid'):
+    """Plot time series of all simulations as a single line per color key with gaps between simulations."""
+
+    # Separate simulations with NaN so each line draws all simulations of a key at once
+    x = np.append(np.asarray(plot_time, dtype=float), np.nan)
+    for key in dict.fromkeys(keys):
+        selected = series[keys == key]
+        y = np.concatenate([selected, np.full((len(selected), 1), np.nan)], axis=1).ravel()
+        ax.plot(np.tile(x, len(selected))[:-1], y[:-1], color=colorDict[key], linestyle=linestyle)
+
+    return
 
 def define_fileid_split_indices_dict():
     """Make dictionary of file split information contained at each index after splitting based on _."""
@@ -62,6 +252,8 @@ def define_tissue_times_list():
 def make_dose_color_scale():
     """Make color scale for dose feature."""
 
+    from matplotlib import cm as mplcm
+
     # Set DOSE color scale
     DCOLORS = []
     dcmap = mplcm.get_cmap('Greens')
@@ -74,6 +266,8 @@ def make_dose_color_scale():
 def make_treat_ratio_color_scale():
     """Make color scale for treat ratio feature."""
 
+    from matplotlib import cm as mplcm
+
     TRCOLORS = []
     trcmap = mplcm.get_cmap('Reds')
     trvalues = [0.2, 0.3, 0.4, 0.6, 0.8, 0.9, 1.0]  # CD4%: 0, 10, 25, 50, 75, 90, 100
@@ -85,6 +279,8 @@ def make_treat_ratio_color_scale():
 def make_car_affinity_color_scale():
     """Make color scale for CAR affinity feature."""
 
+    from matplotlib import cm as mplcm
+
     # Set AFFINITY color scale
     ACOLORS = []
     acmap = mplcm.get_cmap('Oranges')
@@ -97,6 +293,8 @@ def make_car_affinity_color_scale():
 def make_antigens_cancer_color_scale():
     """Make color scale for antigens per cancer cell feature."""
 
+    from matplotlib import cm as mplcm
+
     # Set ANTIGENS CANCER color scale
     ACCOLORS = []
     accmap = mplcm.get_cmap('Blues')
@@ -109,6 +307,8 @@ def make_antigens_cancer_color_scale():
 def make_antigens_healthy_color_scale():
     """Make color scale for antigens per healthy cell feature."""
 
+    from matplotlib import cm as mplcm
+
     # Set ANTIGENS HEALTHY color scale
     AHCOLORS = []
     ahcmap = mplcm.get_cmap('Purples')
@@ -121,6 +321,8 @@ def make_antigens_healthy_color_scale():
 def make_dose_color_dict():
     """Make dictionary of feature value to color value for dose feature."""
 
+    from colour import Color
+
     DCOLORS = make_dose_color_scale()
 
     doseColorDict = {
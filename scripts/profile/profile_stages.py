@@ -0,0 +1,228 @@
+import cProfile
+import functools
+import inspect
+import json
+import os
+import platform
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def make_profile_dict():
+    """Make profiling options from environment so worker processes profile the same as their parent."""
+
+    PROFILE = {
+        "LOG": os.environ.get('CARCADE_PROFILE_LOG', ''),
+        "PSTATS": os.environ.get('CARCADE_PROFILE_PSTATS', '')
+    }
+
+    return PROFILE
+
+# Profiling options, profiling is off unless a log file is set
+PROFILE = make_profile_dict()
+
+# cProfile profiles of each stage in this process and stages currently running, outermost first
+PROFILERS = {}
+ACTIVE = []
+
+def enable_profiling(logFile, pstatsLoc=''):
+    """Enable profiling of pipeline stages to log file, with cProfile stats of each stage saved to pstatsLoc if given.
+
+    Options are also set in the environment so they apply to stages run in worker processes.
+    """
+
+    os.environ['CARCADE_PROFILE_LOG'] = logFile
+    os.environ['CARCADE_PROFILE_PSTATS'] = pstatsLoc
+
+    if pstatsLoc != '' and not os.path.exists(pstatsLoc):
+        os.makedirs(pstatsLoc)
+
+    PROFILE.update(make_profile_dict())
+
+    return
+
+def disable_profiling():
+    """Disable profiling of pipeline stages."""
+
+    os.environ.pop('CARCADE_PROFILE_LOG', None)
+    os.environ.pop('CARCADE_PROFILE_PSTATS', None)
+
+    PROFILE.update(make_profile_dict())
+
+    return
+
+def get_peak_rss():
+    """Get peak resident memory of process so far in MB, None if not available on platform."""
+
+    if resource is None:
+        return None
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Peak resident memory is in bytes on macOS and in kilobytes elsewhere
+    return maxrss/1024**2 if platform.system() == 'Darwin' else maxrss/1024
+
+def get_io_bytes():
+    """Get bytes read and written by process so far, None if not available on platform."""
+
+    try:
+        with open('/proc/self/io', 'r') as f:
+            counters = dict(line.split(': ') for line in f.read().splitlines())
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def save_profile_record(record):
+    """Append stage record to profile log as a single json line."""
+
+    with open(PROFILE['LOG'], 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+    return
+
+def save_stage_pstats(STAGE):
+    """Save cProfile stats of stage collected in this process so far."""
+
+    PROFILERS[STAGE].dump_stats(os.path.join(PROFILE['PSTATS'], STAGE + '_' + str(os.getpid()) + '.pstats'))
+
+    return
+
+def count_stage_items(function, items, args, kwargs):
+    """Count items processed by stage call as length of named argument or with given counting function."""
+
+    if items is None:
+        return None
+    elif callable(items):
+        return items(*args, **kwargs)
+
+    return len(inspect.signature(function).bind(*args, **kwargs).arguments[items])
+
+def run_profiled_stage(STAGE, items, function, args, kwargs):
+    """Run stage function and log time, memory, bytes read and written, and items processed."""
+
+    # Only the outermost stage is run under cProfile, nested stages are included in its stats
+    profiler = None
+    if PROFILE['PSTATS'] != '' and len(ACTIVE) == 0:
+        profiler = PROFILERS.setdefault(STAGE, cProfile.Profile())
+
+    ACTIVE.append(STAGE)
+
+    readStart, writeStart = get_io_bytes()
+    cpuStart = time.process_time()
+    wallStart = time.perf_counter()
+    error = None
+
+    try:
+        if profiler is not None:
+            profiler.enable()
+        return function(*args, **kwargs)
+    except Exception as e:
+        error = type(e).__name__ + ': ' + str(e)
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+        wall = time.perf_counter() - wallStart
+        cpu = time.process_time() - cpuStart
+        readEnd, writeEnd = get_io_bytes()
+
+        ACTIVE.pop()
+
+        record = {
+            "STAGE": STAGE,
+            "PARENT": ACTIVE[-1] if len(ACTIVE) > 0 else None,
+            "PID": os.getpid(),
+            "START": time.time() - wall,
+            "WALL S": wall,
+            "CPU S": cpu,
+            "PEAK RSS MB": get_peak_rss(),
+            "READ MB": (readEnd - readStart)/1024**2 if readStart is not None else None,
+            "WRITE MB": (writeEnd - writeStart)/1024**2 if writeStart is not None else None,
+            "ITEMS": count_stage_items(function, items, args, kwargs) if error is None else None,
+            "ERROR": error
+        }
+
+        save_profile_record(record)
+
+        if profiler is not None:
+            save_stage_pstats(STAGE)
+
+def profile_stage(items=None):
+    """Decorate pipeline stage so each call is profiled when profiling is enabled.
+
+    items is the name of the argument whose length is the number of items processed by the call,
+    or a function called with the stage arguments that counts them.
+    """
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if PROFILE['LOG'] == '':
+                return function(*args, **kwargs)
+
+            return run_profiled_stage(function.__name__, items, function, args, kwargs)
+
+        return wrapper
+
+    return decorator
+
+def load_profile_log(logFile):
+    """Load stage records of profile log into dataframe."""
+
+    import pandas as pd
+
+    with open(logFile, 'r') as f:
+        records = [json.loads(line) for line in f if line.strip() != '']
+
+    return pd.DataFrame(records)
+
+def summarize_profile(logFile, saveLoc=''):
+    """Summarize profile log with totals of each stage.
+
+    summarize_profile takes a profile log written by stages run with profiling enabled and
+    prints a table of calls, wall and CPU time, peak memory, bytes read and written, and items
+    processed for each stage. CPU FRACTION is CPU time over wall time, stages well below 1 spent
+    most of their time waiting on reading and writing files (or on worker processes).
+
+    Nested stages (PARENT is not empty) are also included in the totals of the stages they run in.
+
+    Usage:
+        summarize_profile(logFile, saveLoc='')
+
+        logFile
+            Path to profile log given to enable_profiling.
+        [saveLoc]
+            Location of where to save summary as PROFILE_SUMMARY.csv, empty to only print (default: '').
+    """
+
+    import pandas as pd
+
+    profileDF = load_profile_log(logFile)
+
+    summaryDF = profileDF.groupby('STAGE', sort=False).agg(**{
+        'CALLS': ('WALL S', 'size'),
+        'ERRORS': ('ERROR', 'count'),
+        'WALL S': ('WALL S', 'sum'),
+        'CPU S': ('CPU S', 'sum'),
+        'PEAK RSS MB': ('PEAK RSS MB', 'max'),
+        'READ MB': ('READ MB', 'sum'),
+        'WRITE MB': ('WRITE MB', 'sum'),
+        'ITEMS': ('ITEMS', lambda items: items.sum(min_count=1))
+    })
+
+    summaryDF['CPU FRACTION'] = summaryDF['CPU S']/summaryDF['WALL S']
+    summaryDF['ITEMS PER S'] = summaryDF['ITEMS']/summaryDF['WALL S']
+    summaryDF = summaryDF.sort_values('WALL S', ascending=False)
+
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.float_format', '{:.2f}'.format):
+        print(summaryDF)
+
+    if saveLoc != '':
+        summaryDF.to_csv(saveLoc + 'PROFILE_SUMMARY.csv')
+
+    return summaryDF
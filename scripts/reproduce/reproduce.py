@@ -0,0 +1,431 @@
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+'''
+Deterministic seeding of tasks and reproducibility manifests of output directories.
+
+Random streams of tasks (such as the positions of cells drawn in an image, or the resamples of a
+bootstrap) are seeded from stable keys of the task (such as TUMOR ID, seed, view, and time point)
+with make_task_seed, never from the order in which tasks are run, so outputs are the same whatever
+the number of worker processes.
+
+Each command run from the command line into an output directory records a run in the MANIFEST.json
+file of that directory with the command, all its parameters, the hashes of its input files, the
+versions of python, the libraries, and the code, and the hashes of the outputs it wrote. Runs whose
+outputs were all written again by later runs are dropped from the manifest.
+
+Usage:
+    python -m scripts verify SAVELOC [--sample N] [--seed SEED] [--workers N]
+
+    SAVELOC
+        Output directory with MANIFEST.json to verify.
+    [--sample N]
+        Number of recorded runs to recompute and, for stages run once per input file, number of input
+        files of each run to recompute (default: 3).
+    [--seed SEED]
+        Seed of sample (default: 0).
+    [--workers N]
+        Number of worker processes to recompute with (default: as recorded).
+
+Verify recomputes the sample into a temporary directory and compares the hashes of the outputs with
+those recorded in the manifest.
+'''
+
+def define_manifest_name():
+    """Define name of manifest file in each output directory."""
+
+    MANIFEST_NAME = 'MANIFEST.json'
+
+    return MANIFEST_NAME
+
+def define_manifest_version():
+    """Define version of manifest, increased when the layout of manifests changes."""
+
+    MANIFEST_VERSION = 1
+
+    return MANIFEST_VERSION
+
+def define_ignored_outputs():
+    """Define names of files and directories in output directories that are not outputs of runs."""
+
+    IGNORED = ['MANIFEST.json', '.pipeline']
+
+    return IGNORED
+
+def define_library_names():
+    """Define libraries whose versions are recorded in manifests."""
+
+    LIBRARIES = ['numpy', 'pandas', 'scipy', 'matplotlib', 'seaborn', 'Pillow']
+
+    return LIBRARIES
+
+def define_per_file_commands():
+    """Define commands whose outputs of each input file only depend on that file, so inputs can be sampled."""
+
+    PER_FILE = ['parse', 'analyze cells', 'analyze sharedlocs', 'analyze env', 'analyze spatial', 'analyze lysis',
+                'stats', 'plot', 'image', 'convert']
+
+    return PER_FILE
+
+def make_task_seed(*keys):
+    """Make seed of task from its stable keys, the same in any process and on any run."""
+
+    text = json.dumps([str(key) for key in keys])
+    digest = hashlib.sha256(text.encode('utf-8')).digest()
+
+    return int.from_bytes(digest[:8], 'little')
+
+def make_task_random(*keys):
+    """Make random number generator of task seeded from its stable keys."""
+
+    return random.Random(make_task_seed(*keys))
+
+def get_file_hash(file):
+    """Get hash of file contents."""
+
+    import scripts.cache.cache
+
+    return scripts.cache.cache.get_file_hash(file)
+
+def get_input_files(path):
+    """Get files given by path to file or directory (not including subdirectories)."""
+
+    if os.path.isfile(path):
+        return [path]
+
+    return sorted([os.path.join(path, name) for name in os.listdir(path) if os.path.isfile(os.path.join(path, name))])
+
+def hash_input_files(PARAMETERS):
+    """Hash all files given by parameters that are paths to existing files or directories, other than save location."""
+
+    INPUTS = {}
+
+    for key, value in PARAMETERS.items():
+        if key == 'saveLoc' or key == 'cache' or not isinstance(value, str) or value == '' or not os.path.exists(value):
+            continue
+        for file in get_input_files(value):
+            INPUTS[file] = get_file_hash(file)
+
+    return INPUTS
+
+def list_output_files(saveLoc):
+    """List files in output directory and its subdirectories by path relative to it."""
+
+    IGNORED = define_ignored_outputs()
+
+    files = []
+
+    for root, dirs, names in os.walk(saveLoc):
+        dirs[:] = sorted([name for name in dirs if name not in IGNORED])
+        for name in sorted(names):
+            if name not in IGNORED:
+                files.append(os.path.relpath(os.path.join(root, name), saveLoc).replace(os.sep, '/'))
+
+    return files
+
+def snapshot_outputs(saveLoc):
+    """Snapshot modification time and size of files in output directory, to find files written by a run."""
+
+    if not os.path.isdir(saveLoc):
+        return {}
+
+    snapshot = {}
+
+    for file in list_output_files(saveLoc):
+        stat = os.stat(os.path.join(saveLoc, file))
+        snapshot[file] = (stat.st_mtime_ns, stat.st_size)
+
+    return snapshot
+
+def get_written_outputs(saveLoc, snapshot):
+    """Get hashes of files in output directory that are new or changed since snapshot."""
+
+    after = snapshot_outputs(saveLoc)
+
+    return {file: get_file_hash(os.path.join(saveLoc, file)) for file in after if snapshot.get(file) != after[file]}
+
+def get_library_version(library):
+    """Get installed version of library, None if not installed."""
+
+    try:
+        import importlib.metadata
+        try:
+            return importlib.metadata.version(library)
+        except importlib.metadata.PackageNotFoundError:
+            return None
+    except ImportError:
+        import pkg_resources
+        try:
+            return pkg_resources.get_distribution(library).version
+        except pkg_resources.DistributionNotFound:
+            return None
+
+def make_code_dict():
+    """Make dictionary of hash of source of all modules of scripts, and git commit of repository if available."""
+
+    import scripts.cache.cache
+
+    directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=directory, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, universal_newlines=True).stdout.strip()
+    except OSError:
+        commit = ''
+
+    CODE = {
+        "HASH": scripts.cache.cache.get_code_version(),
+        "COMMIT": commit if commit != '' else None
+    }
+
+    return CODE
+
+def make_versions_dict():
+    """Make dictionary of versions of python and libraries."""
+
+    VERSIONS = {"python": platform.python_version()}
+
+    for library in define_library_names():
+        VERSIONS[library] = get_library_version(library)
+
+    return VERSIONS
+
+def make_parameters_dict(function, kwargs):
+    """Make dictionary of all parameters of stage function, including defaults of those not given."""
+
+    bound = inspect.signature(function).bind(**kwargs)
+    bound.apply_defaults()
+
+    return dict(bound.arguments)
+
+def make_run_dict(command, PARAMETERS, INPUTS, OUTPUTS):
+    """Make manifest entry of run."""
+
+    RUN = {
+        "COMMAND": command,
+        "PARAMETERS": PARAMETERS,
+        "INPUTS": INPUTS,
+        "OUTPUTS": OUTPUTS,
+        "VERSIONS": make_versions_dict(),
+        "CODE": make_code_dict(),
+        "PLATFORM": platform.platform(),
+        "TIME": time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+    return RUN
+
+def load_manifest(saveLoc):
+    """Load manifest of output directory, empty manifest if there is none."""
+
+    file = os.path.join(saveLoc, define_manifest_name())
+
+    if not os.path.exists(file):
+        return {"VERSION": define_manifest_version(), "RUNS": []}
+
+    with open(file, 'r') as f:
+        manifest = json.load(f)
+
+    if manifest.get("VERSION") != define_manifest_version():
+        raise ValueError('Manifest ' + file + ' has version ' + str(manifest.get("VERSION"))
+                         + ', expected ' + str(define_manifest_version()))
+
+    return manifest
+
+def save_manifest(saveLoc, manifest):
+    """Save manifest of output directory, replacing existing manifest only once fully written."""
+
+    fd, temp = tempfile.mkstemp(dir=saveLoc, prefix='.manifest-', suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=4, sort_keys=True)
+        os.replace(temp, os.path.join(saveLoc, define_manifest_name()))
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+    return
+
+def record_run(saveLoc, command, function, kwargs, snapshot):
+    """Record run of command in manifest of output directory, with outputs written since snapshot."""
+
+    if not os.path.isdir(saveLoc):
+        return
+
+    PARAMETERS = make_parameters_dict(function, kwargs)
+    OUTPUTS = get_written_outputs(saveLoc, snapshot)
+    RUN = make_run_dict(command, PARAMETERS, hash_input_files(PARAMETERS), OUTPUTS)
+
+    manifest = load_manifest(saveLoc)
+
+    # Outputs written again belong to this run, earlier runs left without outputs are dropped
+    for earlier in manifest["RUNS"]:
+        earlier["OUTPUTS"] = {file: sha for file, sha in earlier["OUTPUTS"].items() if file not in OUTPUTS}
+    manifest["RUNS"] = [earlier for earlier in manifest["RUNS"] if len(earlier["OUTPUTS"]) > 0] + [RUN]
+
+    save_manifest(saveLoc, manifest)
+
+    return
+
+def get_command_function(command):
+    """Get stage function run by command."""
+
+    import scripts.cli
+
+    COMMANDS = scripts.cli.define_commands()
+
+    if command not in COMMANDS:
+        raise ValueError('Cannot recompute unknown command ' + str(command))
+
+    module, name = COMMANDS[command]
+
+    return getattr(importlib.import_module(module), name)
+
+def check_run_inputs(RUN):
+    """Check inputs of run are unchanged, returning inputs that are missing or changed."""
+
+    return [file for file, sha in sorted(RUN["INPUTS"].items()) if not os.path.exists(file) or get_file_hash(file) != sha]
+
+def sample_run_inputs(RUN, sample, rng, TEMPLOC):
+    """Copy sample of input files of run into temporary directory, returning path to use instead of files."""
+
+    files = RUN["PARAMETERS"]["files"]
+
+    if os.path.isfile(files) or RUN["COMMAND"] not in define_per_file_commands():
+        return files
+
+    inputs = get_input_files(files)
+
+    if len(inputs) <= sample:
+        return files
+
+    INPUTLOC = os.path.join(TEMPLOC, 'inputs', '')
+    os.makedirs(INPUTLOC)
+
+    for file in sorted(rng.sample(inputs, sample)):
+        shutil.copy2(file, INPUTLOC)
+
+    return INPUTLOC
+
+def compare_outputs(RUN, OUTPUTLOC):
+    """Compare hashes of outputs recomputed into directory with those recorded, returning matched, differing, and unrecorded outputs."""
+
+    matched, differing, unrecorded = [], [], []
+
+    for file in list_output_files(OUTPUTLOC):
+        if file not in RUN["OUTPUTS"]:
+            unrecorded.append(file)
+        elif get_file_hash(os.path.join(OUTPUTLOC, file)) == RUN["OUTPUTS"][file]:
+            matched.append(file)
+        else:
+            differing.append(file)
+
+    return matched, differing, unrecorded
+
+def report_version_changes(RUN):
+    """Print versions of python, libraries, and code that differ from those of run."""
+
+    VERSIONS = make_versions_dict()
+
+    for library, version in sorted(RUN["VERSIONS"].items()):
+        if VERSIONS.get(library) != version:
+            print('\t\t' + library + ' was ' + str(version) + ' and is now ' + str(VERSIONS.get(library)))
+
+    if make_code_dict()["HASH"] != RUN["CODE"]["HASH"]:
+        print('\t\tcode has changed since run (commit ' + str(RUN["CODE"]["COMMIT"]) + ')')
+
+    return
+
+def verify_run(RUN, sample, rng, processes=None):
+    """Recompute sample of run into temporary directory, returning differing outputs (None if no outputs of run were compared)."""
+
+    missing = check_run_inputs(RUN)
+
+    if len(missing) > 0:
+        print('\t\tInputs missing or changed since run, skipping: ' + ', '.join(missing[:5])
+              + (' and ' + str(len(missing) - 5) + ' more' if len(missing) > 5 else ''))
+        return None
+
+    report_version_changes(RUN)
+
+    function = get_command_function(RUN["COMMAND"])
+    TEMPLOC = tempfile.mkdtemp(prefix='carcade-verify-')
+
+    try:
+        PARAMETERS = dict(RUN["PARAMETERS"])
+        PARAMETERS["files"] = sample_run_inputs(RUN, sample, rng, TEMPLOC)
+        PARAMETERS["saveLoc"] = os.path.join(TEMPLOC, 'outputs', '')
+        if processes is not None and 'processes' in PARAMETERS:
+            PARAMETERS["processes"] = processes
+
+        os.makedirs(PARAMETERS["saveLoc"])
+        function(**PARAMETERS)
+
+        matched, differing, unrecorded = compare_outputs(RUN, PARAMETERS["saveLoc"])
+    finally:
+        shutil.rmtree(TEMPLOC, ignore_errors=True)
+
+    print('\t\t' + str(len(matched)) + ' outputs identical, ' + str(len(differing)) + ' differ'
+          + (', ' + str(len(unrecorded)) + ' not recorded' if len(unrecorded) > 0 else ''))
+
+    for file in differing:
+        print('\t\tDiffers: ' + file)
+
+    if len(matched) + len(differing) == 0:
+        print('\t\tNo recorded outputs were recomputed')
+        return None
+
+    return differing
+
+def verify(saveLoc, sample=3, seed=0, processes=None):
+    """Recompute sample of runs recorded in manifest of output directory and compare outputs with those recorded.
+
+    Returns list of differing outputs, by path relative to output directory, or None if nothing was
+    verified (no manifest, or no outputs of any sampled run were compared), which is not a success.
+    """
+
+    if not os.path.exists(os.path.join(saveLoc, define_manifest_name())):
+        print('No manifest in ' + saveLoc + ', nothing to verify')
+        return None
+
+    manifest = load_manifest(saveLoc)
+    rng = random.Random(int(seed))
+    sample = int(sample)
+
+    if len(manifest["RUNS"]) == 0:
+        print('No runs recorded in ' + os.path.join(saveLoc, define_manifest_name()) + ', nothing to verify')
+        return None
+
+    indices = sorted(rng.sample(range(len(manifest["RUNS"])), min(sample, len(manifest["RUNS"]))))
+    differing = []
+    unverified = 0
+
+    for index in indices:
+        RUN = manifest["RUNS"][index]
+        print('Verifying ' + RUN["COMMAND"] + ' run of ' + RUN["TIME"] + ' (' + str(len(RUN["OUTPUTS"])) + ' outputs)')
+
+        results = verify_run(RUN, sample, rng, processes)
+
+        if results is None:
+            unverified += 1
+        else:
+            differing += results
+
+    print('Verified ' + str(len(indices) - unverified) + ' of ' + str(len(indices)) + ' sampled runs, '
+          + str(len(differing)) + ' outputs differ')
+
+    if unverified == len(indices):
+        print('No sampled run could be verified')
+        return None
+
+    return differing
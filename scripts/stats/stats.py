@@ -1,29 +1,31 @@
 import scripts.analyze.analyze_utilities
+import scripts.cache.cache
 import scripts.plot.plot_utilities
-import scripts.stats.stats_utilities
-import scripts.stats.stats_heatmaps
 import scripts.stats.stats_features
-import pickle
-import pandas as pd
+import scripts.stats.stats_bootstrap
+import scripts.profile.profile_stages
+import scripts.storage.storage_arrays
+import scripts.storage.storage_schemas
 from itertools import combinations
-import matplotlib.pyplot as plt
 
 def get_file_id(fileName):
     """Get file ID based on file name."""
 
     FILEID = ''
 
+    fileName = fileName.replace('.tbl', '').replace('.pkl', '')
+
     if 'ANALYZED' in fileName:
-        FILEID = fileName.replace('_ANALYZED.pkl', '')
+        FILEID = fileName.replace('_ANALYZED', '')
 
     if 'ENVIRONMENT' in fileName:
-        FILEID = fileName.replace('_ENVIRONMENT.pkl', '')
+        FILEID = fileName.replace('_ENVIRONMENT', '')
 
     if 'SPATIAL' in fileName:
-        FILEID = fileName.replace('_SPATIAL.pkl', '')
+        FILEID = fileName.replace('_SPATIAL', '')
 
     if 'LYSED' in fileName:
-        FILEID = fileName.replace('_LYSED.pkl', '')
+        FILEID = fileName.replace('_LYSED', '')
 
     return FILEID
 
@@ -70,61 +72,64 @@ def clean_data(simsDF):
 
     return simsDF, untreatedDF
 
-def normalize_data_by_initial(simsDF, FILEID):
-    """Normalize data by initial cell count at start of treatment."""
+def get_treatment_start_index(FILEID):
+    """Get index of time point at which treatment starts based on simulation context."""
 
     if 'VITRO' in FILEID:
-        for i in range(0, len(simsDF)):
-            simsDF.at[i, 'Y_NORM_CANCER_LIVE'] = float(
-                simsDF.iloc[i]['CANCER LIVE'][-1] / simsDF.iloc[i]['CANCER LIVE'][0])
-            simsDF.at[i, 'Y_NORM_TCELL_LIVE'] = float(simsDF.iloc[i]['T-CELL LIVE'][-1] / simsDF.iloc[i]['DOSE'])
-            if '_CH_' in FILEID:
-                simsDF.at[i, 'Y_NORM_HEALTHY_LIVE'] = float(
-                    simsDF.iloc[i]['HEALTHY LIVE'][-1] / simsDF.iloc[i]['HEALTHY LIVE'][0])
-
+        START = 0
     else:
-        for i in range(0, len(simsDF)):
-            simsDF.at[i, 'Y_NORM_CANCER_LIVE'] = float(
-                simsDF.iloc[i]['CANCER LIVE'][-1] / simsDF.iloc[i]['CANCER LIVE'][44])
-            simsDF.at[i, 'Y_NORM_TCELL_LIVE'] = float(simsDF.iloc[i]['T-CELL LIVE'][-1] / simsDF.iloc[i]['DOSE'])
-            if '_CH_' in FILEID:
-                simsDF.at[i, 'Y_NORM_HEALTHY_LIVE'] = float(
-                    simsDF.iloc[i]['HEALTHY LIVE'][-1] / simsDF.iloc[i]['HEALTHY LIVE'][44])
+        START = 44
+
+    return START
+
+def get_live_counts_columns(FILEID):
+    """Get live cell count time series columns used by stats."""
+
+    pops = ['CANCER', 'T-CELL']
+    if '_CH_' in FILEID:
+        pops.append('HEALTHY')
+
+    return [pop + ' LIVE' for pop in pops]
+
+def extract_live_counts(arrayTable, FILEID):
+    """Extract simulation setup and final and treatment start live cell counts from time series blocks."""
+
+    START = get_treatment_start_index(FILEID)
+
+    simsDF = arrayTable["META"].copy()
+
+    for pop in get_live_counts_columns(FILEID):
+        column = pop.replace('-', '').replace(' ', '_')
+        simsDF[column + '_FINAL'] = scripts.storage.storage_arrays.get_values_at(arrayTable, pop, -1).astype(float)
+        simsDF[column + '_INIT'] = scripts.storage.storage_arrays.get_values_at(arrayTable, pop, START).astype(float)
 
     return simsDF
 
-def normalize_data_by_untreated(simsDF, untreatedDF, FILEID):
-    """Normalize data by number of cells in corresponding untreated seed."""
+def normalize_data_by_initial(simsDF, FILEID):
+    """Normalize data by initial cell count at start of treatment."""
 
-    if 'VITRO' in FILEID:
-        for i in range(0, len(simsDF)):
+    simsDF['Y_NORM_CANCER_LIVE'] = simsDF['CANCER_LIVE_FINAL'] / simsDF['CANCER_LIVE_INIT']
+    simsDF['Y_NORM_TCELL_LIVE'] = simsDF['TCELL_LIVE_FINAL'] / simsDF['DOSE'].astype(float)
+    if '_CH_' in FILEID:
+        simsDF['Y_NORM_HEALTHY_LIVE'] = simsDF['HEALTHY_LIVE_FINAL'] / simsDF['HEALTHY_LIVE_INIT']
 
-            for j in range(0, len(untreatedDF)):
-                if untreatedDF.iloc[j]['SEED'] == simsDF.iloc[i]['SEED']:
-                    cancerUntreated = untreatedDF.iloc[j]['CANCER LIVE'][-1]
-                    if '_CH_' in FILEID:
-                        healthyUntreated = untreatedDF.iloc[j]['HEALTHY LIVE'][-1]
-                    break
+    return simsDF
 
-            simsDF.at[i, 'Y_NORM_CANCER_LIVE'] = float(simsDF.iloc[i]['CANCER LIVE'][-1] / cancerUntreated)
-            simsDF.at[i, 'Y_NORM_TCELL_LIVE'] = float(simsDF.iloc[i]['T-CELL LIVE'][-1] / simsDF.iloc[i]['DOSE'])
-            if '_CH_' in FILEID:
-                simsDF.at[i, 'Y_NORM_HEALTHY_LIVE'] = float(simsDF.iloc[i]['HEALTHY LIVE'][-1] / healthyUntreated)
+def normalize_data_by_untreated(simsDF, untreatedDF, FILEID):
+    """Normalize data by number of cells in corresponding untreated seed."""
 
-    else:
-        for i in range(0, len(simsDF)):
+    columns = {'CANCER_LIVE_FINAL': 'CANCER_LIVE_UNTREATED'}
+    if '_CH_' in FILEID:
+        columns['HEALTHY_LIVE_FINAL'] = 'HEALTHY_LIVE_UNTREATED'
 
-            for j in range(0, len(untreatedDF)):
-                if untreatedDF.iloc[j]['SEED'] == simsDF.iloc[i]['SEED']:
-                    cancerUntreated = untreatedDF.iloc[j]['CANCER LIVE'][-1]
-                    if '_CH_' in FILEID:
-                        healthyUntreated = untreatedDF.iloc[j]['HEALTHY LIVE'][-1]
-                    break
+    # Join each simulation to the first untreated simulation with the same seed
+    untreatedCounts = untreatedDF[['SEED'] + list(columns)].drop_duplicates(subset='SEED').rename(columns=columns)
+    simsDF = simsDF.merge(untreatedCounts, on='SEED', how='left')
 
-            simsDF.at[i, 'Y_NORM_CANCER_LIVE'] = float(simsDF.iloc[i]['CANCER LIVE'][-1] / cancerUntreated)
-            simsDF.at[i, 'Y_NORM_TCELL_LIVE'] = float(simsDF.iloc[i]['T-CELL LIVE'][-1] / simsDF.iloc[i]['DOSE'])
-            if '_CH_' in FILEID:
-                simsDF.at[i, 'Y_NORM_HEALTHY_LIVE'] = float(simsDF.iloc[i]['HEALTHY LIVE'][-1] / healthyUntreated)
+    simsDF['Y_NORM_CANCER_LIVE'] = simsDF['CANCER_LIVE_FINAL'] / simsDF['CANCER_LIVE_UNTREATED']
+    simsDF['Y_NORM_TCELL_LIVE'] = simsDF['TCELL_LIVE_FINAL'] / simsDF['DOSE'].astype(float)
+    if '_CH_' in FILEID:
+        simsDF['Y_NORM_HEALTHY_LIVE'] = simsDF['HEALTHY_LIVE_FINAL'] / simsDF['HEALTHY_LIVE_UNTREATED']
 
     return simsDF
 
@@ -156,14 +161,10 @@ def create_feature_and_response_combo_lists(FILEID):
 
     return comb, response_list
 
-def calculate_score_sum(simsDF, i, cancer, healthy, FILEID):
+def calculate_score_sum(simsDF, cancer, healthy):
     """Calculate score as subtraction of normalized healthy and cancer counts."""
 
-    if 'VITRO' in FILEID:
-        norm = float(simsDF.iloc[i]['CANCER LIVE'][0] / simsDF.iloc[i]['HEALTHY LIVE'][0])
-
-    else:
-        norm = float(simsDF.iloc[i]['CANCER LIVE'][44] / simsDF.iloc[i]['HEALTHY LIVE'][44])
+    norm = simsDF['CANCER_LIVE_INIT'].values / simsDF['HEALTHY_LIVE_INIT'].values
 
     score = (healthy * norm) - cancer
 
@@ -172,25 +173,23 @@ def calculate_score_sum(simsDF, i, cancer, healthy, FILEID):
 def calculate_score(simsDF, simsDFanova, SCORE, FILEID):
     """Calculate score based on score type selected."""
 
-    scorelist = []
-    for i in range(0, len(simsDFanova)):
-        cancer = simsDFanova.iloc[i]['Y_NORM_CANCER_LIVE']
-        healthy = simsDFanova.iloc[i]['Y_NORM_HEALTHY_LIVE']
+    cancer = simsDFanova['Y_NORM_CANCER_LIVE'].values
+    healthy = simsDFanova['Y_NORM_HEALTHY_LIVE'].values
 
-        if SCORE == 'SUM':
-            score = calculate_score_sum(simsDF, i, cancer, healthy, FILEID)
+    if SCORE == 'SUM':
+        simsDFanova['SCORE'] = calculate_score_sum(simsDF, cancer, healthy)
 
-        else:
-            score = None
-
-        scorelist.append(score)
-    simsDFanova['SCORE'] = scorelist
+    else:
+        simsDFanova['SCORE'] = None
 
     return simsDFanova
 
 def plot_all_output_heatmaps_lineplot(simsDFanova, NORM, SCORE, FILEID, SAVELOC):
     """Call plotters for heatmaps with all outputs showing as line plots and sorted by score."""
 
+    import scripts.stats.stats_heatmaps
+    import matplotlib.pyplot as plt
+
     comb, response_list = create_feature_and_response_combo_lists(FILEID)
 
     scripts.stats.stats_heatmaps.plot_output_heatmap_with_subplots_line_multiple_outputs(simsDFanova, response_list, True, FILEID, NORM, SCORE, SAVELOC)
@@ -199,188 +198,152 @@ def plot_all_output_heatmaps_lineplot(simsDFanova, NORM, SCORE, FILEID, SAVELOC)
 
     return
 
-def create_csv_files_with_simulations_sorted_by_response(simsDFanova, NORM, SCORE, FILEID, SAVELOC):
+def create_csv_files_with_simulations_sorted_by_response(simsDFanova, NORM, SCORE, FILEID, SAVELOC, simsDFreplicates=None, RESAMPLE=None):
     """Call printers to make excel files with data analyzed by feature and score values."""
 
     comb, response_list = create_feature_and_response_combo_lists(FILEID)
 
+    if simsDFreplicates is None:
+        simsDFreplicates = simsDFanova
+    if RESAMPLE is None:
+        RESAMPLE = scripts.stats.stats_bootstrap.make_resample_dict()
+
+    # Add bootstrap confidence intervals of responses by condition
+    if RESAMPLE['BOOTSTRAP'] > 0:
+        simsDFanova = scripts.stats.stats_bootstrap.add_bootstrap_confidence_intervals(simsDFanova, simsDFreplicates, FILEID, RESAMPLE)
+
     # Create excel files sorted by output
     print('\t\tCreating Excel files for all threshold passing simulations.')
     for response in response_list:
         if response != 'Y_NORM_TCELL_LIVE':
-            scripts.stats.stats_features.feature_analysis(simsDFanova, response, FILEID, NORM, SCORE, SAVELOC)
-            scripts.stats.stats_features.save_sorted_df_csv(simsDFanova, response, FILEID, NORM, SCORE, SAVELOC)
+            simsDFrank = simsDFanova
+            if RESAMPLE['PERMUTATIONS'] > 0:
+                simsDFrank = scripts.stats.stats_bootstrap.add_permutation_pvalues(simsDFanova, simsDFreplicates, response, FILEID, RESAMPLE)
+            scripts.stats.stats_features.feature_analysis(simsDFrank, response, FILEID, NORM, SCORE, SAVELOC)
+            scripts.stats.stats_features.save_sorted_df_csv(simsDFrank, response, FILEID, NORM, SCORE, SAVELOC)
 
     return
 
-def plot_heatmaps_and_make_csv_files(simsDFanova, NORM, SCORE, FILEID, SAVELOC):
+def plot_heatmaps_and_make_csv_files(simsDFanova, NORM, SCORE, FILEID, SAVELOC, simsDFreplicates=None, RESAMPLE=None):
     """Call functions that will make heatmaps, elbow plots, and make excel files."""
 
     # Plot output heatmaps
     plot_all_output_heatmaps_lineplot(simsDFanova, NORM, SCORE, FILEID, SAVELOC)
 
     # Create excel files sorted by output
-    create_csv_files_with_simulations_sorted_by_response(simsDFanova, NORM, SCORE, FILEID, SAVELOC)
+    create_csv_files_with_simulations_sorted_by_response(simsDFanova, NORM, SCORE, FILEID, SAVELOC, simsDFreplicates, RESAMPLE)
 
     return
 
-def average_conditions(simsDF, FILEID):
-    """Average conditions across replicates (seeds)."""
+def make_quantile_function(q):
+    """Make named quantile function for use in grouped aggregation."""
 
-    AXES_SETS = scripts.stats.stats_utilities.define_axes_sets_dict()
-    TREAT_RATIO_DICT = scripts.plot.plot_utilities.make_treat_ratio_key_dict()
-    TREAT_RATIO_DICT_REVERSE = scripts.stats.stats_utilities.make_treat_ratio_reverse_key_dict_stats()
-
-    simsDFavg = pd.DataFrame({'DOSE': pd.Series([], dtype='float'),
-                              'TREAT_RATIO': pd.Series([], dtype='float'),
-                              'CAR_AFFINITY': pd.Series([], dtype='float'),
-                              'ANTIGENS_CANCER': pd.Series([], dtype='float'),
-                              'ANTIGENS_HEALTHY': pd.Series([], dtype='float'),
-                              'Y_NORM_CANCER_LIVE': pd.Series([], dtype='float'),
-                              'Y_NORM_HEALTHY_LIVE': pd.Series([], dtype='float'),
-                              'Y_NORM_TCELL_LIVE': pd.Series([], dtype='float'),
-                              'SCORE': pd.Series([], dtype=float)})
-
-    features = ['DOSE', 'TREAT RATIO', 'CAR AFFINITY', 'ANTIGENS CANCER']
+    def quantile(x):
+        return x.quantile(q)
+
+    quantile.__name__ = 'Q' + str(int(round(q * 100)))
+
+    return quantile
+
+def make_average_stats_functions_dict():
+    """Make dictionary of replicate statistic names to aggregation functions."""
+
+    AVG_STATS_FUNCS = {
+        "STD": 'std',
+        "SEM": 'sem',
+        "N": 'count',
+        "MIN": 'min',
+        "MAX": 'max',
+        "Q05": make_quantile_function(0.05),
+        "Q25": make_quantile_function(0.25),
+        "Q50": make_quantile_function(0.50),
+        "Q75": make_quantile_function(0.75),
+        "Q95": make_quantile_function(0.95)
+    }
+
+    return AVG_STATS_FUNCS
+
+def check_avgstats_arg(avgstats):
+    """Check average statistics argument for which extra replicate statistics to calculate."""
+
+    AVG_STATS_FUNCS = make_average_stats_functions_dict()
+
+    if isinstance(avgstats, str):
+        avgstats = [stat for stat in avgstats.split(',') if stat != '']
+
+    unknown = [stat for stat in avgstats if stat.upper() not in AVG_STATS_FUNCS]
+    if len(unknown) > 0:
+        raise ValueError('Unknown replicate statistics ' + ', '.join(unknown) + ', must be one of ' + ', '.join(AVG_STATS_FUNCS))
+
+    # Repeated statistics are only calculated once, keeping order in which they were given
+    AVGSTATS = []
+    for stat in avgstats:
+        if stat.upper() not in AVGSTATS:
+            AVGSTATS.append(stat.upper())
+
+    return AVGSTATS
+
+def average_conditions(simsDF, FILEID, AVGSTATS=[]):
+    """Average conditions across replicates (seeds).
+
+    Conditions are in order of sorted feature values, and only responses of the simulation type are
+    averaged, so _C_ files have no ANTIGENS_HEALTHY, Y_NORM_HEALTHY_LIVE, or SCORE columns (earlier
+    versions listed conditions in order of the axes sets and kept these columns with NaN values).
+    """
+
+    AVG_STATS_FUNCS = make_average_stats_functions_dict()
+    AVGSTATS = check_avgstats_arg(AVGSTATS)
+
+    features = ['DOSE', 'TREAT_RATIO', 'CAR_AFFINITY', 'ANTIGENS_CANCER']
+    responses = ['Y_NORM_CANCER_LIVE', 'Y_NORM_TCELL_LIVE']
     if '_CH_' in FILEID:
-        features.append('ANTIGENS HEALTHY')
-
-    cancerDict = {}
-    healthyDict = {}
-    tcellDict = {}
-    scoreDict = {}
-
-    for d in AXES_SETS['DOSE']:
-        d = str(d)
-        cancerDict[d] = {}
-        healthyDict[d] = {}
-        tcellDict[d] = {}
-        scoreDict[d] = {}
-        for tr in AXES_SETS['TREAT RATIO']:
-            cancerDict[d][tr] = {}
-            healthyDict[d][tr] = {}
-            tcellDict[d][tr] = {}
-            scoreDict[d][tr] = {}
-            for ca in AXES_SETS['CAR AFFINITY']:
-                ca = str(ca)
-                cancerDict[d][tr][ca] = {}
-                healthyDict[d][tr][ca] = {}
-                tcellDict[d][tr][ca] = {}
-                scoreDict[d][tr][ca] = {}
-                for ac in AXES_SETS['ANTIGENS CANCER']:
-                    ac = str(ac)
-                    if '_CH_' in FILEID:
-                        cancerDict[d][tr][ca][ac] = {}
-                        healthyDict[d][tr][ca][ac] = {}
-                        tcellDict[d][tr][ca][ac] = {}
-                        scoreDict[d][tr][ca][ac] = {}
-
-                        for ah in AXES_SETS['ANTIGENS HEALTHY']:
-                            ah = str(ah)
-                            cancerDict[d][tr][ca][ac][ah] = []
-                            healthyDict[d][tr][ca][ac][ah] = []
-                            tcellDict[d][tr][ca][ac][ah] = []
-                            scoreDict[d][tr][ca][ac][ah] = []
-
-                    else:
-                        cancerDict[d][tr][ca][ac] = []
-                        healthyDict[d][tr][ca][ac] = []
-                        tcellDict[d][tr][ca][ac] = []
-                        scoreDict[d][tr][ca][ac] = []
-
-    for i in range(0, len(simsDF)):
-        dose = str(int(simsDF.iloc[i]['DOSE']))
-        treatratio = str(simsDF.iloc[i]['TREAT_RATIO'])
-        caraffinity = str(simsDF.iloc[i]['CAR_AFFINITY'])
-        antigenscancer = str(int(simsDF.iloc[i]['ANTIGENS_CANCER']))
-
-        if treatratio == '0': treatratio = '0.0'
-        elif treatratio == '0.5': treatratio = '0.50'
-        elif treatratio == '1': treatratio = '1.0'
-        elif treatratio == '0.1': treatratio = '0.10'
-        elif treatratio == '0.9': treatratio = '0.90'
-
-        treatratio = TREAT_RATIO_DICT_REVERSE[treatratio]
-
-        if '_CH_' in FILEID:
-            antigenshealthy = str(int(simsDF.iloc[i]['ANTIGENS_HEALTHY']))
-            cancerDict[dose][treatratio][caraffinity][antigenscancer][antigenshealthy].append(simsDF.iloc[i]['Y_NORM_CANCER_LIVE'])
-            healthyDict[dose][treatratio][caraffinity][antigenscancer][antigenshealthy].append(simsDF.iloc[i]['Y_NORM_HEALTHY_LIVE'])
-            tcellDict[dose][treatratio][caraffinity][antigenscancer][antigenshealthy].append(simsDF.iloc[i]['Y_NORM_TCELL_LIVE'])
-            scoreDict[dose][treatratio][caraffinity][antigenscancer][antigenshealthy].append(simsDF.iloc[i]['SCORE'])
-        else:
-            cancerDict[dose][treatratio][caraffinity][antigenscancer].append(simsDF.iloc[i]['Y_NORM_CANCER_LIVE'])
-            tcellDict[dose][treatratio][caraffinity][antigenscancer].append(simsDF.iloc[i]['Y_NORM_TCELL_LIVE'])
-
-    for d in AXES_SETS['DOSE']:
-        for tr in AXES_SETS['TREAT RATIO']:
-            for ca in AXES_SETS['CAR AFFINITY']:
-                for ac in AXES_SETS['ANTIGENS CANCER']:
-                    if '_CH_' in FILEID:
-                        for ah in AXES_SETS['ANTIGENS HEALTHY']:
-                            if len(cancerDict[str(d)][tr][str(ca)][str(ac)][str(ah)]) == 0:
-                                continue
-                            else:
-                                simsDictAvg = {}
-                                simsDictAvg['DOSE'] = float(d)
-                                simsDictAvg['TREAT_RATIO'] = float(TREAT_RATIO_DICT[tr])
-                                simsDictAvg['CAR_AFFINITY'] = float(ca)
-                                simsDictAvg['ANTIGENS_CANCER'] = float(ac)
-                                simsDictAvg['ANTIGENS_HEALTHY'] = float(ah)
-                                d = str(d)
-                                ca = str(ca)
-                                ac = str(ac)
-                                ah = str(ah)
-                                canceravg = float(sum(cancerDict[d][tr][ca][ac][ah]) / len(cancerDict[d][tr][ca][ac][ah]))
-                                healthyavg = float(sum(healthyDict[d][tr][ca][ac][ah]) / len(healthyDict[d][tr][ca][ac][ah]))
-                                tcellavg = float(sum(tcellDict[d][tr][ca][ac][ah]) / len(tcellDict[d][tr][ca][ac][ah]))
-                                scoreavg = float(sum(scoreDict[d][tr][ca][ac][ah]) / len(scoreDict[d][tr][ca][ac][ah]))
-                                simsDictAvg['Y_NORM_CANCER_LIVE'] = float(canceravg)
-                                simsDictAvg['Y_NORM_HEALTHY_LIVE'] = float(healthyavg)
-                                simsDictAvg['Y_NORM_TCELL_LIVE'] = float(tcellavg)
-                                simsDictAvg['SCORE'] = float(scoreavg)
-                                simsDFavg = simsDFavg.append(simsDictAvg, ignore_index=True)
-
-                    else:
-                        if len(cancerDict[str(d)][tr][str(ca)][str(ac)]) == 0:
-                            continue
-                        else:
-                            simsDictAvg = {}
-                            simsDictAvg['DOSE'] = float(d)
-                            simsDictAvg['TREAT_RATIO'] = float(TREAT_RATIO_DICT[tr])
-                            simsDictAvg['CAR_AFFINITY'] = float(ca)
-                            simsDictAvg['ANTIGENS_CANCER'] = float(ac)
-                            d = str(d)
-                            ca = str(ca)
-                            ac = str(ac)
-                            canceravg = float(sum(cancerDict[d][tr][ca][ac]) / len(cancerDict[d][tr][ca][ac]))
-                            tcellavg = float(sum(tcellDict[d][tr][ca][ac]) / len(tcellDict[d][tr][ca][ac]))
-                            simsDictAvg['Y_NORM_CANCER_LIVE'] = float(canceravg)
-                            simsDictAvg['Y_NORM_TCELL_LIVE'] = float(tcellavg)
-                            simsDFavg = simsDFavg.append(simsDictAvg, ignore_index=True)
+        features.append('ANTIGENS_HEALTHY')
+        responses = ['Y_NORM_CANCER_LIVE', 'Y_NORM_HEALTHY_LIVE', 'Y_NORM_TCELL_LIVE', 'SCORE']
+
+    # Aggregate mean and any extra statistics for every condition in a single grouped pass
+    funcs = ['mean']
+    suffixes = {'mean': ''}
+    for stat in AVGSTATS:
+        func = AVG_STATS_FUNCS[stat]
+        funcs.append(func)
+        suffixes[func if isinstance(func, str) else func.__name__] = '_' + stat
+
+    simsDFgrouped = simsDF[features + responses].astype(float).groupby(features, sort=True).agg(funcs)
+    simsDFgrouped.columns = [response + suffixes[func] for response, func in simsDFgrouped.columns]
+
+    simsDFavg = simsDFgrouped.reset_index()
+
     return simsDFavg
 
-def conduct_stats_analyses_all_data(simsDFanova, NORM, SCORE, FILEID, SAVELOC):
+def conduct_stats_analyses_all_data(simsDFanova, NORM, SCORE, RESAMPLE, FILEID, SAVELOC):
     """Conduct stats analysis on all data (not averaged)."""
 
-    plot_heatmaps_and_make_csv_files(simsDFanova, NORM, SCORE, FILEID, SAVELOC)
+    plot_heatmaps_and_make_csv_files(simsDFanova, NORM, SCORE, FILEID, SAVELOC, simsDFanova, RESAMPLE)
 
     return
 
-def conduct_stats_analysis_averaged_data(simsDFanova, NORM, SCORE, FILEID, SAVELOC):
+def conduct_stats_analysis_averaged_data(simsDFanova, simsDFavg, NORM, SCORE, RESAMPLE, FILEID, SAVELOC):
     """Conduct analysis on averaged data."""
 
-    # Average data across conditions
-    print('\t\tAveraging datta across conditions.')
-    simsDFavg = average_conditions(simsDFanova, FILEID)
     FILEIDAVG = FILEID + '_AVG'
 
-    plot_heatmaps_and_make_csv_files(simsDFavg, NORM, SCORE, FILEIDAVG, SAVELOC)
+    plot_heatmaps_and_make_csv_files(simsDFavg, NORM, SCORE, FILEIDAVG, SAVELOC, simsDFanova, RESAMPLE)
 
     return
 
-def stats_data(simsDF, NORM, SCORE, AVG, FILEID, SAVELOC):
-    """Run stats analysis on given file."""
+def calculate_stats_data(simsDF, NORM, SCORE, AVG, FILEID, AVGSTATS=[]):
+    """Calculate normalized, scored, and optionally averaged data for given dataframe."""
+
+    columns = [column for column in scripts.storage.storage_schemas.define_meta_columns() if column in simsDF.columns]
+    arrayTable = scripts.storage.storage_arrays.make_array_table(simsDF[columns + get_live_counts_columns(FILEID)], 'ANALYZED')
+
+    return calculate_stats_arrays(arrayTable, NORM, SCORE, AVG, FILEID, AVGSTATS)
+
+def calculate_stats_arrays(arrayTable, NORM, SCORE, AVG, FILEID, AVGSTATS=[]):
+    """Calculate normalized, scored, and optionally averaged data for given array table."""
+
+    # Extract final and initial counts once for all simulations
+    simsDF = extract_live_counts(arrayTable, FILEID)
 
     simsDF, untreatedDF = clean_data(simsDF)
 
@@ -395,28 +358,69 @@ def stats_data(simsDF, NORM, SCORE, AVG, FILEID, SAVELOC):
     if '_CH_' in FILEID:
         simsDFanova = calculate_score(simsDF, simsDFanova, SCORE, FILEID)
 
+    # Average data across conditions
+    simsDFavg = None
+    if AVG:
+        print('\t\tAveraging datta across conditions.')
+        simsDFavg = average_conditions(simsDFanova, FILEID, AVGSTATS)
+
+    return simsDFanova, simsDFavg
+
+@scripts.profile.profile_stages.profile_stage(items='simsDFanova')
+def output_stats_data(simsDFanova, simsDFavg, NORM, SCORE, AVG, FILEID, SAVELOC, RESAMPLE=None):
+    """Make heatmaps and csv files from calculated stats data."""
+
     # Conduct analyses for data that is not averaged across replicates
     if not AVG:
 
-        conduct_stats_analyses_all_data(simsDFanova, NORM, SCORE, FILEID, SAVELOC)
+        conduct_stats_analyses_all_data(simsDFanova, NORM, SCORE, RESAMPLE, FILEID, SAVELOC)
 
     # Conduct analyses for data that is averaged across replicates
     else:
-        conduct_stats_analysis_averaged_data(simsDFanova, NORM, SCORE, FILEID, SAVELOC)
+        conduct_stats_analysis_averaged_data(simsDFanova, simsDFavg, NORM, SCORE, RESAMPLE, FILEID, SAVELOC)
+
+    return
+
+@scripts.profile.profile_stages.profile_stage(items='simsDF')
+def stats_data(simsDF, NORM, SCORE, AVG, FILEID, SAVELOC, AVGSTATS=[], RESAMPLE=None):
+    """Run stats analysis on given file."""
+
+    simsDFanova, simsDFavg = calculate_stats_data(simsDF, NORM, SCORE, AVG, FILEID, AVGSTATS)
+
+    output_stats_data(simsDFanova, simsDFavg, NORM, SCORE, AVG, FILEID, SAVELOC, RESAMPLE)
 
     return
 
-def stats(files, saveLoc, norm='INIT', score='SUM', average=False):
+def calculate_stats_file(file, NORM, SCORE, AVG, FILEID, AVGSTATS):
+    """Load file and calculate stats data."""
+
+    # Stats only use setup information and live counts over time, so other columns are not loaded
+    columns = scripts.storage.storage_schemas.define_meta_columns() + get_live_counts_columns(FILEID)
+    arrayTable = scripts.storage.storage_arrays.load_array_table(file, columns=columns)
+
+    return calculate_stats_arrays(arrayTable, NORM, SCORE, AVG, FILEID, AVGSTATS)
+
+@scripts.profile.profile_stages.profile_stage()
+def load_and_calculate_stats_data(file, NORM, SCORE, AVG, FILEID, AVGSTATS, CACHELOC, CACHESIZE):
+    """Load cached stats data for file if inputs and options are unchanged, otherwise calculate and cache it."""
+
+    simsDFanova, simsDFavg = scripts.cache.cache.cached_call(CACHELOC, calculate_stats_file, [file],
+                                                             [NORM, SCORE, AVG, FILEID, AVGSTATS], CACHESIZE)
+
+    return simsDFanova, simsDFavg
+
+def stats(files, saveLoc, norm='INIT', score='SUM', average=False, avgstats='', bootstrap=0, permutations=0, seed=0, processes=None, cache='', cachesize=None, output='svg', dpi=300):
     """Run stats analysis on all given files.
 
-    stats.py takes a directory of (or a single) .pkl simulation files that result from analyze_cells.py and
+    stats.py takes a directory of (or a single) .tbl (or .pkl) simulation files that result from analyze_cells.py and
     does statistics on the DATA features in the dataframe over time.
 
     Usage:
-        stats(files, saveLoc, norm='INIT', score='SUM', average=False)
+        stats(files, saveLoc, norm='INIT', score='SUM', average=False, avgstats='', bootstrap=0, permutations=0, seed=0,
+              processes=None, cache='', cachesize=None, output='svg', dpi=300)
 
         files
-            Path to .pkl or directory.
+            Path to .tbl (or .pkl) or directory.
         savLoc
             Location of where to save file, default will save here.
         [norm]
@@ -425,10 +429,32 @@ def stats(files, saveLoc, norm='INIT', score='SUM', average=False):
             Dictate which score type to use (default and only current option: SUM).
         [average]
             Average across seed replicates (default: False).
+        [avgstats]
+            Comma separated extra replicate statistics to include when averaging, any of
+            STD, SEM, N, MIN, MAX, Q05, Q25, Q50, Q75, Q95 (default: none).
+        [bootstrap]
+            Number of bootstrap resamples for confidence intervals of each condition, 0 to skip (default: 0).
+        [permutations]
+            Number of permutations for p-values between ranked neighbour conditions, 0 to skip (default: 0).
+        [seed]
+            Seed for bootstrap and permutation random number generation (default: 0).
+        [processes]
+            Number of processes to run resamples across (default: all cores).
+        [cache]
+            Directory to cache calculated stats data in so reruns with unchanged inputs and options skip
+            calculations, empty to not cache (default: '').
+        [cachesize]
+            Maximum size of cache in bytes before least recently used entries are removed (default: 2 GB).
+        [output]
+            Figure output format, one of SVG, SVGZ, PNG, RASTER or AUTO, see plot_data (default: SVG).
+        [dpi]
+            Resolution of PNG figures and rasterized data (default: 300).
     """
 
     # Get files
-    PKLFILES = scripts.analyze.analyze_utilities.get_pkl_files(files)
+    PKLFILES = scripts.analyze.analyze_utilities.get_table_files(files)
+
+    scripts.plot.plot_utilities.set_output_format(scripts.plot.plot_utilities.make_output_format_dict(output, dpi))
 
     print("Running stats for the following files:")
 
@@ -440,12 +466,13 @@ def stats(files, saveLoc, norm='INIT', score='SUM', average=False):
 
         FILEID = get_file_id(fileName)
 
-        with open(file, 'rb') as f:
-            simsDF = pickle.load(f)
-
         NORM = check_norm_arg(norm)
         SCORE = check_score_arg(score)
+        AVGSTATS = check_avgstats_arg(avgstats)
+        RESAMPLE = scripts.stats.stats_bootstrap.make_resample_dict(bootstrap, permutations, seed, processes)
+
+        simsDFanova, simsDFavg = load_and_calculate_stats_data(file, NORM, SCORE, average, FILEID, AVGSTATS, cache, cachesize)
 
-        stats_data(simsDF, NORM, SCORE, average, FILEID, saveLoc)
+        output_stats_data(simsDFanova, simsDFavg, NORM, SCORE, average, FILEID, saveLoc, RESAMPLE)
 
     return
\ No newline at end of file
@@ -0,0 +1,207 @@
+import scripts.reproduce.reproduce
+import numpy as np
+import multiprocessing
+
+def define_resample_chunk_size():
+    """Define number of resamples drawn together in a single vectorized chunk."""
+
+    CHUNK_SIZE = 100
+
+    return CHUNK_SIZE
+
+def define_confidence_level():
+    """Define confidence level of bootstrap confidence intervals."""
+
+    CONFIDENCE_LEVEL = 0.95
+
+    return CONFIDENCE_LEVEL
+
+def make_resample_dict(bootstrap=0, permutations=0, seed=0, processes=None):
+    """Make dictionary of resampling options."""
+
+    if processes is None or int(processes) < 1:
+        processes = multiprocessing.cpu_count()
+
+    RESAMPLE = {
+        "BOOTSTRAP": int(bootstrap),
+        "PERMUTATIONS": int(permutations),
+        "SEED": int(seed),
+        "PROCESSES": int(processes)
+    }
+
+    return RESAMPLE
+
+def define_feature_and_response_columns(FILEID):
+    """Define feature columns that identify a condition and response columns to resample."""
+
+    features = ['DOSE', 'TREAT_RATIO', 'CAR_AFFINITY', 'ANTIGENS_CANCER']
+    responses = ['Y_NORM_CANCER_LIVE', 'Y_NORM_TCELL_LIVE']
+
+    if '_CH_' in FILEID:
+        features.append('ANTIGENS_HEALTHY')
+        responses = ['Y_NORM_CANCER_LIVE', 'Y_NORM_HEALTHY_LIVE', 'Y_NORM_TCELL_LIVE', 'SCORE']
+
+    return features, responses
+
+def make_replicate_array(simsDF, features, responses):
+    """Make array of responses x conditions x replicates padded with NaN and count of replicates per condition."""
+
+    simsDF = simsDF[features + responses].astype(float)
+    grouped = simsDF.groupby(features, sort=True)
+
+    condition = grouped.ngroup().values
+    replicate = grouped.cumcount().values
+
+    conditionsDF = grouped.size().reset_index()[features]
+    counts = np.bincount(condition, minlength=len(conditionsDF))
+
+    values = np.full((len(responses), len(conditionsDF), counts.max()), np.nan)
+    values[:, condition, replicate] = simsDF[responses].values.T
+
+    return conditionsDF, values, counts
+
+def bootstrap_means_chunk(task):
+    """Draw chunk of bootstrap resamples for all conditions and return resampled means."""
+
+    values, counts, size, seed = task
+    rng = np.random.default_rng(seed)
+
+    nresponses, nconditions, nreplicates = values.shape
+
+    # Draw replicate indices within each condition's own number of replicates
+    draws = rng.random((size, nconditions, nreplicates))
+    idx = np.floor(draws * counts[None, :, None]).astype(int)
+    samples = values[:, np.arange(nconditions)[None, :, None], idx]
+
+    mask = np.arange(nreplicates)[None, :] < counts[:, None]
+    means = np.where(mask, samples, 0).sum(axis=-1) / counts
+
+    return means
+
+def permutation_diffs_chunk(task):
+    """Draw chunk of label permutations for all neighbour pairs and return count of extreme differences."""
+
+    pooled, countsA, countsB, observed, size, seed = task
+    rng = np.random.default_rng(seed)
+
+    npairs, npooled = pooled.shape
+    positions = np.arange(npooled)[None, :]
+
+    # Shuffle valid replicates of each pair while keeping padding at the end
+    keys = rng.random((size, npairs, npooled))
+    keys[:, np.isnan(pooled)] = 2
+    order = np.argsort(keys, axis=-1)
+    permuted = np.take_along_axis(np.broadcast_to(pooled, keys.shape), order, axis=-1)
+
+    maskA = positions < countsA[:, None]
+    maskB = (positions >= countsA[:, None]) & (positions < (countsA + countsB)[:, None])
+    meansA = np.where(maskA, permuted, 0).sum(axis=-1) / countsA
+    meansB = np.where(maskB, permuted, 0).sum(axis=-1) / countsB
+
+    extreme = np.abs(meansA - meansB) >= np.abs(observed) - 1e-12
+
+    return extreme.sum(axis=0)
+
+def run_resample_chunks(function, args, NRESAMPLE, SEED, PROCESSES):
+    """Run resample chunks across processes with an independent seeded random stream per chunk."""
+
+    CHUNK_SIZE = define_resample_chunk_size()
+
+    sizes = [CHUNK_SIZE] * (NRESAMPLE // CHUNK_SIZE)
+    if NRESAMPLE % CHUNK_SIZE != 0:
+        sizes.append(NRESAMPLE % CHUNK_SIZE)
+
+    # Chunks and their seeds do not depend on number of processes so results are reproducible
+    seeds = np.random.SeedSequence(SEED).spawn(len(sizes))
+    tasks = [args + (size, seed) for size, seed in zip(sizes, seeds)]
+
+    if PROCESSES == 1 or len(tasks) == 1:
+        results = [function(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(min(PROCESSES, len(tasks))) as pool:
+            results = pool.map(function, tasks)
+
+    return results
+
+def bootstrap_confidence_intervals(simsDF, FILEID, RESAMPLE):
+    """Calculate bootstrap confidence intervals of the mean of each response for all conditions."""
+
+    CONFIDENCE_LEVEL = define_confidence_level()
+
+    features, responses = define_feature_and_response_columns(FILEID)
+    conditionsDF, values, counts = make_replicate_array(simsDF, features, responses)
+
+    print('\t\tBootstrapping confidence intervals with ' + str(RESAMPLE['BOOTSTRAP']) + ' resamples.')
+    SEED = scripts.reproduce.reproduce.make_task_seed('BOOTSTRAP', FILEID, RESAMPLE['SEED'])
+    results = run_resample_chunks(bootstrap_means_chunk, (values, counts), RESAMPLE['BOOTSTRAP'],
+                                  SEED, RESAMPLE['PROCESSES'])
+    means = np.concatenate(results, axis=1)
+
+    alpha = (1 - CONFIDENCE_LEVEL) / 2
+    low, high = np.nanpercentile(means, [100 * alpha, 100 * (1 - alpha)], axis=1)
+
+    ciDF = conditionsDF.copy()
+    for i, response in enumerate(responses):
+        ciDF[response + '_CI_LOW'] = low[i]
+        ciDF[response + '_CI_HIGH'] = high[i]
+
+    return ciDF
+
+def permutation_neighbour_pvalues(simsDF, RANK, FILEID, RESAMPLE):
+    """Calculate permutation p-values between each condition and the next condition ranked by response."""
+
+    features, responses = define_feature_and_response_columns(FILEID)
+    conditionsDF, values, counts = make_replicate_array(simsDF, features, [RANK])
+    values = values[0]
+
+    pDF = conditionsDF.copy()
+    pvalues = np.full(len(conditionsDF), np.nan)
+
+    if len(conditionsDF) < 2:
+        pDF[RANK + '_P_NEXT'] = pvalues
+        return pDF
+
+    # Rank conditions in the same direction as the sorted csv files
+    means = np.nanmean(values, axis=1)
+    if RANK == 'SCORE' or RANK == 'Y_NORM_HEALTHY_LIVE':
+        order = np.argsort(-means, kind='stable')
+    else:
+        order = np.argsort(means, kind='stable')
+
+    a = order[:-1]
+    b = order[1:]
+
+    pooled = np.concatenate([values[a], values[b]], axis=1)
+    pooled = np.take_along_axis(pooled, np.argsort(np.isnan(pooled), axis=1, kind='stable'), axis=1)
+    observed = means[a] - means[b]
+
+    print('\t\tRunning ' + str(RESAMPLE['PERMUTATIONS']) + ' permutations between neighbours ranked by ' + RANK + '.')
+    SEED = scripts.reproduce.reproduce.make_task_seed('PERMUTATIONS', FILEID, RANK, RESAMPLE['SEED'])
+    results = run_resample_chunks(permutation_diffs_chunk, (pooled, counts[a], counts[b], observed),
+                                  RESAMPLE['PERMUTATIONS'], SEED, RESAMPLE['PROCESSES'])
+    extreme = np.sum(results, axis=0)
+
+    pvalues[a] = (extreme + 1) / (RESAMPLE['PERMUTATIONS'] + 1)
+    pDF[RANK + '_P_NEXT'] = pvalues
+
+    return pDF
+
+def add_bootstrap_confidence_intervals(simsDF, simsDFreplicates, FILEID, RESAMPLE):
+    """Add bootstrap confidence intervals of each response to dataframe by condition."""
+
+    features, responses = define_feature_and_response_columns(FILEID)
+
+    ciDF = bootstrap_confidence_intervals(simsDFreplicates, FILEID, RESAMPLE)
+    simsDF = simsDF.merge(ciDF, on=features, how='left')
+
+    return simsDF
+
+def add_permutation_pvalues(simsDF, simsDFreplicates, RANK, FILEID, RESAMPLE):
+    """Add permutation p-values between neighbours ranked by response to dataframe by condition."""
+
+    features, responses = define_feature_and_response_columns(FILEID)
+
+    pDF = permutation_neighbour_pvalues(simsDFreplicates, RANK, FILEID, RESAMPLE)
+    simsDF = simsDF.merge(pDF, on=features, how='left')
+
+    return simsDF
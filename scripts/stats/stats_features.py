@@ -1,3 +1,4 @@
+import scripts.plot.plot_utilities
 import scripts.stats.stats_utilities
 import json
 import pandas as pd
@@ -77,25 +78,50 @@ def populate_anova_df(simsDF, simsDFanova, FILEID):
 
     # Fill in simsDFanova
     if '_C_' in FILEID:
-        for i in range(0, len(simsDF)):
-            simDict = {}
-            for column in ['DOSE','TREAT_RATIO','CAR_AFFINITY','ANTIGENS_CANCER','Y_NORM_CANCER_LIVE','Y_NORM_TCELL_LIVE']:
-                simDict[column] = float(simsDF.at[i, column])
-            simsDFanova = simsDFanova.append(simDict, ignore_index=True)
+        columns = ['DOSE','TREAT_RATIO','CAR_AFFINITY','ANTIGENS_CANCER','Y_NORM_CANCER_LIVE','Y_NORM_TCELL_LIVE']
     else:
-        for i in range(0, len(simsDF)):
-            simDict = {}
-            for column in ['DOSE','TREAT_RATIO','CAR_AFFINITY','ANTIGENS_CANCER','ANTIGENS_HEALTHY','Y_NORM_CANCER_LIVE','Y_NORM_HEALTHY_LIVE','Y_NORM_TCELL_LIVE']:
-                simDict[column] = float(simsDF.at[i, column])
-            simsDFanova = simsDFanova.append(simDict, ignore_index=True)
+        columns = ['DOSE','TREAT_RATIO','CAR_AFFINITY','ANTIGENS_CANCER','ANTIGENS_HEALTHY','Y_NORM_CANCER_LIVE','Y_NORM_HEALTHY_LIVE','Y_NORM_TCELL_LIVE']
+
+    simsDFanova = simsDF[columns].astype(float).reset_index(drop=True).reindex(columns=simsDFanova.columns)
 
     return simsDFanova
 
+def make_feature_categories_dict():
+    """Make dictionary of canonical ordered value keys for each feature."""
+
+    FEATURE_DICT = make_empty_features_dict()
+
+    FEATURE_CATEGORIES = {feature: list(FEATURE_DICT[feature]) for feature in FEATURE_DICT}
+
+    return FEATURE_CATEGORIES
+
+def make_feature_keys(simsDF, feature):
+    """Convert numeric feature column to categorical of canonical feature value keys."""
+
+    FEATURE_CATEGORIES = make_feature_categories_dict()
+
+    values = simsDF[feature.replace(' ', '_')].astype(float)
+
+    if feature == 'TREAT RATIO':
+        TREAT_RATIO_DICT = scripts.plot.plot_utilities.make_treat_ratio_key_dict()
+        keys = values.map({ratio: key for key, ratio in TREAT_RATIO_DICT.items()})
+    elif feature == 'CAR AFFINITY':
+        keys = values.map(str)
+    else:
+        keys = values.astype(int).map(str)
+
+    # Values missing from the categories would otherwise be silently dropped from feature counts
+    unknown = sorted(set([str(value) for value, key in zip(values, keys) if key not in FEATURE_CATEGORIES[feature]]))
+    if len(unknown) > 0:
+        raise ValueError(feature + ' has values ' + ', '.join(unknown) + ' that are not feature values '
+                         + ', '.join(FEATURE_CATEGORIES[feature]) + ', add them to make_empty_features_dict')
+
+    return pd.Series(pd.Categorical(keys, categories=FEATURE_CATEGORIES[feature]))
+
 def feature_analysis(simsDF, RANK, FILEID, NORM, SCORE, SAVELOC):
     """Conduct analysis to count number of each features value across simulations that meet a specified threshold."""
 
     SCORE_MIN_HEALTHY_THRESHOLD = scripts.stats.stats_utilities.define_score_min_healthy_threshold()
-    TREAT_RATIO_DICT_REVERSE = scripts.stats.stats_utilities.make_treat_ratio_reverse_key_dict_stats()
 
     if RANK == 'Y_NORM_CANCER_LIVE':
         simsDF = simsDF[simsDF[RANK] < 1]
@@ -109,27 +135,13 @@ def feature_analysis(simsDF, RANK, FILEID, NORM, SCORE, SAVELOC):
 
     featuresDict = make_empty_features_dict()
 
-    for i in range(0, len(simsDF)):
-        for feature in featuresDict:
-            if '_CH_' not in FILEID and feature == 'ANTIGENS HEALTHY':
-                continue
-            else:
-                if feature != 'TREAT RATIO' and feature != 'CAR AFFINITY':
-                    key = int(simsDF.iloc[i][feature.replace(' ','_')])
-                    key = str(key)
-                else:
-                    key = str(simsDF.iloc[i][feature.replace(' ','_')])
-
-                if key == '0' and feature == 'TREAT_RATIO': key = '0.0'
-                elif key == '0.5': key = '0.50'
-                elif key == '1': key = '1.0'
-                elif key == '0.1': key = '0.10'
-                elif key == '0.9': key = '0.90'
-
-                if feature == 'TREAT RATIO':
-                    key = TREAT_RATIO_DICT_REVERSE[str(key)]
-
-                featuresDict[feature][key] += 1
+    for feature in list(featuresDict):
+        if '_CH_' not in FILEID and feature == 'ANTIGENS HEALTHY':
+            continue
+
+        # Count all values of feature at once, including values with no passing simulations
+        counts = make_feature_keys(simsDF, feature).value_counts(sort=False)
+        featuresDict[feature] = {key: int(count) for key, count in counts.items()}
 
     if '_CH_' in FILEID:
         add = SCORE + '_'
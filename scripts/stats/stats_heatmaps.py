@@ -214,6 +214,6 @@ def plot_output_heatmap_with_subplots_line_multiple_outputs(simsDF, OUTPUTS, SOR
     else:
         add_score = ''
     plt.subplots_adjust(wspace=0, hspace=0)
-    plt.savefig(SAVELOC + FILEID + "_" + NORM + add_score + "_HEATMAP_ALLOUTPUTS_SUBPLOTS" + add_sort + '.pdf', bbox_inches='tight')
+    scripts.plot.plot_utilities.save_figure(SAVELOC + FILEID + "_" + NORM + add_score + "_HEATMAP_ALLOUTPUTS_SUBPLOTS" + add_sort + '.pdf')
 
     return
\ No newline at end of file
@@ -1,5 +1,4 @@
 import scripts.plot.plot_utilities
-from matplotlib import colors as mcolors
 
 def define_axes_sets_dict():
     """Define axes sets dictionary."""
@@ -46,6 +45,8 @@ def define_color_reference_list(FILEID):
 def NonLinCdict(steps, col_array):
     """Create non-linear color dictionary."""
 
+    from matplotlib import colors as mcolors
+
     cdict = {'red': (), 'green': (), 'blue': ()}
 
     for s, col in zip(steps, col_array):
@@ -0,0 +1,395 @@
+import scripts.analyze.analyze_utilities
+import scripts.cache.cache
+import scripts.storage.storage_schemas
+import gc
+import itertools
+import json
+import os
+import pickle
+import tempfile
+import numpy as np
+
+'''
+Storage of analyzed and subset tables in a versioned, schema-declared binary format.
+
+Tables are saved as .tbl files in the form:
+
+    CARCADE TABLE\n | header length (8 bytes) | JSON header | arrays
+
+where the header holds the format version, table type, number of rows, the kind and type of each column
+(see storage_schemas), the values of META columns, and the type, shape, and offset of each stored array
+of the other columns. Arrays are little-endian and aligned to 64 bytes. Files are read without pickle,
+so they do not depend on the pandas version that wrote them and are safe to share, and only the arrays
+of requested columns are read. Files from newer format versions can be read as long as their major
+version matches, with columns of unknown kinds skipped.
+
+Usage:
+    convert(files, saveLoc='', remove=False)
+
+    files
+        Path to analyzed or subset .pkl files or directory.
+    [saveLoc]
+        Location of where to save converted files, default will save next to each file.
+    [remove]
+        Remove .pkl files once converted (default: False).
+'''
+
+def define_table_format():
+    """Define name and version of stored table format, increment version when layout of columns changes."""
+
+    FORMAT = 'CARCADE TABLE'
+    VERSION = [1, 0]
+
+    return FORMAT, VERSION
+
+def define_table_alignment():
+    """Define alignment in bytes of stored arrays."""
+
+    ALIGN = 64
+
+    return ALIGN
+
+def get_python_value(value):
+    """Get python value of numpy scalar so it can be saved to header."""
+
+    return value.item() if isinstance(value, np.generic) else value
+
+def check_integer_values(array, DTYPE, column):
+    """Check values stored as integers are integers within range of declared type so they are not changed when stored."""
+
+    if array.dtype.kind == 'f' and not np.array_equal(array, np.round(array)):
+        raise ValueError(column + ' has non integer values but is declared as an integer column')
+
+    if array.size > 0 and (array.min() < np.iinfo(DTYPE).min or array.max() > np.iinfo(DTYPE).max):
+        raise ValueError(column + ' has values out of range of its declared type ' + DTYPE)
+
+    return
+
+def encode_series(values, DTYPE, column):
+    """Encode list of values per row as fixed-width (rows x width) array and length of each row."""
+
+    lengths = np.array([len(v) for v in values], dtype=np.int64)
+    array = np.zeros((len(values), lengths.max() if len(values) > 0 else 0), dtype=DTYPE)
+
+    for row, value in enumerate(values):
+        if lengths[row] > 0:
+            original = np.asarray(value)
+            if np.dtype(DTYPE).kind == 'i':
+                check_integer_values(original, DTYPE, column)
+            array[row, :lengths[row]] = original
+
+    return {"VALUES": array, "LENGTHS": lengths}
+
+def encode_radial(values, DTYPE, column):
+    """Encode list per time point of values per radius as fixed-width (rows x times x radii) array."""
+
+    lengths = np.array([len(v) for v in values], dtype=np.int64)
+    widths = np.array([len(v[0]) if len(v) > 0 else 0 for v in values], dtype=np.int64)
+    shape = (len(values), lengths.max() if len(values) > 0 else 0, widths.max() if len(values) > 0 else 0)
+    array = np.zeros(shape, dtype=DTYPE)
+
+    for row, value in enumerate(values):
+        if lengths[row] > 0:
+            original = np.asarray([np.asarray(v) for v in value])
+            if original.ndim != 2:
+                raise ValueError(column + ' does not have the same number of radii at each time point')
+            if np.dtype(DTYPE).kind == 'i':
+                check_integer_values(original, DTYPE, column)
+            array[row, :lengths[row], :widths[row]] = original
+
+    return {"VALUES": array, "LENGTHS": lengths, "WIDTHS": widths}
+
+def encode_ragged(values, DTYPE, column):
+    """Encode list of values per row of any length as flat array and length of each row."""
+
+    lengths = np.array([len(v) for v in values], dtype=np.int64)
+    flat = [np.asarray(v) for v in values if len(v) > 0]
+    flat = np.concatenate(flat) if len(flat) > 0 else np.zeros(0)
+
+    if np.dtype(DTYPE).kind == 'i':
+        check_integer_values(flat, DTYPE, column)
+
+    return {"VALUES": flat.astype(DTYPE), "LENGTHS": lengths}
+
+def encode_nested(values, DTYPE, column):
+    """Encode list per time point of values of any length as flat array, number of time points, and counts."""
+
+    lengths = np.array([len(v) for v in values], dtype=np.int64)
+    inner = list(itertools.chain.from_iterable(values))
+    counts = np.array([len(v) for v in inner], dtype=np.int64)
+    flat = [np.asarray(v) for v in inner if len(v) > 0]
+    flat = np.concatenate(flat) if len(flat) > 0 else np.zeros(0)
+
+    if np.dtype(DTYPE).kind == 'i':
+        check_integer_values(flat, DTYPE, column)
+
+    return {"VALUES": flat.astype(DTYPE), "LENGTHS": lengths, "COUNTS": counts}
+
+def decode_series(parts, rows):
+    """Decode fixed-width array into list of values per row."""
+
+    array = parts["VALUES"]
+    lengths = parts["LENGTHS"]
+
+    if rows > 0 and np.all(lengths == array.shape[1]):
+        return array.tolist()
+
+    return [array[row, :lengths[row]].tolist() for row in range(rows)]
+
+def decode_radial(parts, rows):
+    """Decode fixed-width array into list per time point of values per radius for each row."""
+
+    array = parts["VALUES"]
+    lengths = parts["LENGTHS"]
+    widths = parts["WIDTHS"]
+
+    return [array[row, :lengths[row], :widths[row]].tolist() for row in range(rows)]
+
+def split_list(values, lengths):
+    """Split list into consecutive lists of given lengths."""
+
+    ends = np.cumsum(lengths).tolist()
+    starts = [0] + ends[:-1]
+
+    return [values[start:end] for start, end in zip(starts, ends)]
+
+def decode_ragged(parts, rows):
+    """Decode flat array into list of values per row."""
+
+    return split_list(parts["VALUES"].tolist(), parts["LENGTHS"])
+
+def decode_nested(parts, rows):
+    """Decode flat array into list per time point of values for each row."""
+
+    return split_list(split_list(parts["VALUES"].tolist(), parts["COUNTS"]), parts["LENGTHS"])
+
+def define_column_coders():
+    """Define encoder and decoder of each column kind."""
+
+    CODERS = {
+        'SERIES': (encode_series, decode_series),
+        'RADIAL': (encode_radial, decode_radial),
+        'RAGGED': (encode_ragged, decode_ragged),
+        'NESTED': (encode_nested, decode_nested)
+    }
+
+    return CODERS
+
+def make_table_parts(simsDF, TABLE):
+    """Make header entry of each column and arrays of its stored parts, checking columns against the declared schema."""
+
+    CODERS = define_column_coders()
+    schema = scripts.storage.storage_schemas.get_table_schema(TABLE)
+
+    entries = []
+    arrays = []
+
+    for column in simsDF.columns:
+        if column not in schema:
+            raise ValueError(str(column) + ' is not a declared column of ' + TABLE + ' tables')
+
+        KIND, DTYPE = schema[column]
+        values = simsDF[column].tolist()
+        entry = {"NAME": column, "KIND": KIND, "DTYPE": DTYPE}
+
+        if KIND == 'META':
+            entry["VALUES"] = [get_python_value(value) for value in values]
+        else:
+            entry["PARTS"] = {}
+            for part, array in CODERS[KIND][0](values, DTYPE, column).items():
+                entry["PARTS"][part] = len(arrays)
+                arrays.append(np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<')))
+
+        entries.append(entry)
+
+    return entries, arrays
+
+def save_table(simsDF, file, TABLE):
+    """Save dataframe as table of given type."""
+
+    FORMAT, VERSION = define_table_format()
+    ALIGN = define_table_alignment()
+
+    entries, arrays = make_table_parts(simsDF, TABLE)
+
+    # Arrays are stored one after another after the header, each starting at an aligned offset
+    parts = []
+    offset = 0
+    for array in arrays:
+        parts.append({"DTYPE": array.dtype.str, "SHAPE": list(array.shape), "OFFSET": offset})
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+
+    header = {
+        "FORMAT": FORMAT,
+        "VERSION": VERSION,
+        "TABLE": TABLE,
+        "ROWS": len(simsDF),
+        "COLUMNS": entries,
+        "PARTS": parts
+    }
+
+    headerBytes = json.dumps(header).encode('utf-8')
+    start = -(-(len(FORMAT) + 9 + len(headerBytes)) // ALIGN) * ALIGN
+
+    # Write to temporary file first so interrupted runs do not leave partial tables
+    directory = os.path.dirname(os.path.abspath(file))
+    fd, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(FORMAT.encode('utf-8') + b'\n')
+            f.write(np.array(len(headerBytes), dtype='<u8').tobytes())
+            f.write(headerBytes)
+            for array, part in zip(arrays, parts):
+                f.seek(start + part["OFFSET"])
+                f.write(array.tobytes())
+        scripts.cache.cache.set_shared_permissions(temp)
+        os.replace(temp, file)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+    return
+
+def load_table_header(f, file):
+    """Load header of table and offset of its arrays, checking it is a table of a readable format version."""
+
+    FORMAT, VERSION = define_table_format()
+    ALIGN = define_table_alignment()
+
+    if f.read(len(FORMAT) + 1) != FORMAT.encode('utf-8') + b'\n':
+        raise ValueError(file + ' is not a stored table')
+
+    length = int(np.frombuffer(f.read(8), dtype='<u8')[0])
+    header = json.loads(f.read(length).decode('utf-8'))
+
+    if header["VERSION"][0] != VERSION[0]:
+        raise ValueError(file + ' is stored with table format version ' + '.'.join(map(str, header["VERSION"]))
+                         + ', which cannot be read by version ' + '.'.join(map(str, VERSION)))
+
+    start = -(-(len(FORMAT) + 9 + length) // ALIGN) * ALIGN
+
+    return header, start
+
+def load_table_part(f, part, start):
+    """Load stored array of column part."""
+
+    dtype = np.dtype(part["DTYPE"])
+    count = int(np.prod(part["SHAPE"]))
+
+    f.seek(start + part["OFFSET"])
+
+    return np.frombuffer(f.read(count * dtype.itemsize), dtype=dtype).reshape(part["SHAPE"])
+
+def select_table_columns(names, columns=None, exclude=[]):
+    """Select columns to load from given columns (all if none) without excluded columns."""
+
+    return [name for name in names if (columns is None or name in columns) and name not in exclude]
+
+def load_table_columns(file, columns=None, exclude=[]):
+    """Load header entry and stored arrays of each selected column of table, only reading selected columns."""
+
+    with open(file, 'rb') as f:
+        header, start = load_table_header(f, file)
+        loaded = []
+        selected = select_table_columns([entry["NAME"] for entry in header["COLUMNS"]], columns, exclude)
+
+        for entry in header["COLUMNS"]:
+            if entry["NAME"] not in selected:
+                continue
+
+            parts = {name: load_table_part(f, header["PARTS"][index], start) for name, index in entry.get("PARTS", {}).items()}
+            loaded.append((entry, parts))
+
+    return header, loaded
+
+def count_table_values(file, columns=None, exclude=[]):
+    """Count values stored in selected columns of table from its header, without loading its arrays."""
+
+    with open(file, 'rb') as f:
+        header, start = load_table_header(f, file)
+
+    selected = select_table_columns([entry["NAME"] for entry in header["COLUMNS"]], columns, exclude)
+    count = 0
+
+    for entry in header["COLUMNS"]:
+        if entry["NAME"] not in selected:
+            continue
+        elif "VALUES" in entry:
+            count += len(entry["VALUES"])
+        else:
+            count += int(np.prod(header["PARTS"][entry["PARTS"]["VALUES"]]["SHAPE"]))
+
+    return count
+
+def load_table(file, columns=None, exclude=[]):
+    """Load stored table (or .pkl dataframe) into dataframe, with only given columns (if any) and without excluded columns."""
+
+    import pandas as pd
+
+    if file.endswith('.pkl'):
+        with open(file, 'rb') as f:
+            simsDF = pickle.load(f)
+        return simsDF[select_table_columns(simsDF.columns, columns, exclude)]
+
+    CODERS = define_column_coders()
+
+    header, loaded = load_table_columns(file, columns, exclude)
+    rows = header["ROWS"]
+    table = {}
+
+    # Decoding makes many lists, which would otherwise trigger repeated garbage collection passes
+    enabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        for entry, parts in loaded:
+            column, KIND = entry["NAME"], entry["KIND"]
+
+            if KIND == 'META':
+                table[column] = entry["VALUES"]
+            elif KIND in CODERS:
+                table[column] = CODERS[KIND][1](parts, rows)
+            else:
+                print('\t\tSkipping column ' + column + ' of unknown kind ' + KIND)
+    finally:
+        if enabled:
+            gc.enable()
+
+    return pd.DataFrame(table, columns=list(table), index=range(rows))
+
+def get_table_file_name(file, saveLoc):
+    """Get name of stored table file converted from .pkl file."""
+
+    name = os.path.basename(file).replace('.pkl', '.tbl')
+
+    return os.path.join(os.path.dirname(file), name) if saveLoc == '' else saveLoc + name
+
+def convert(files, saveLoc='', remove=False):
+    """Convert analyzed or subset .pkl files into stored tables."""
+
+    PKLFILES = scripts.analyze.analyze_utilities.get_pkl_files(files)
+
+    if saveLoc != '' and not os.path.exists(saveLoc):
+        os.makedirs(saveLoc)
+
+    print("Converting the following files:")
+
+    for file in PKLFILES:
+
+        try:
+            TABLE = scripts.storage.storage_schemas.get_table_type(file)
+        except ValueError:
+            print('\t' + os.path.basename(file) + ' (skipped, not an analyzed or subset file)')
+            continue
+
+        print('\t' + os.path.basename(file))
+
+        with open(file, 'rb') as f:
+            simsDF = pickle.load(f)
+
+        save_table(simsDF, get_table_file_name(file, saveLoc), TABLE)
+
+        if remove:
+            os.remove(file)
+
+    return
@@ -0,0 +1,221 @@
+import scripts.storage.storage
+import scripts.storage.storage_schemas
+import gc
+import numpy as np
+
+'''
+Array tables of analyzed and subset tables, in which time series are dense arrays rather than lists.
+
+An array table is a dictionary of:
+
+    TABLE       table type (see storage_schemas)
+    COLUMNS     names of columns in order
+    META        dataframe of META columns, one row per simulation
+    BLOCKS      array of each SERIES (simulations x times) and RADIAL (simulations x times x radii) column
+    LENGTHS     number of time points of each SERIES and RADIAL column in each simulation
+    WIDTHS      number of radii of each RADIAL column in each simulation
+    DTYPES      declared type of each SERIES and RADIAL column
+    LISTS       lists of each RAGGED and NESTED column, which have no dense form
+
+Blocks keep their declared type when all simulations have the same number of time points (and radii),
+otherwise they are float arrays with NaN after the last time point of shorter simulations. Blocks made
+from stored tables are read-only views of the loaded arrays. Array tables can be made from stored tables
+without making lists, and converted back into dataframes (make_frame) for functions that still take
+dataframes of lists, or into long tables of one row per simulation and time point (make_long_frame).
+'''
+
+def make_array_block(parts, KIND):
+    """Make dense block of stored column parts, padding shorter simulations with NaN."""
+
+    block = parts["VALUES"]
+    lengths = parts["LENGTHS"]
+    widths = parts.get("WIDTHS", None)
+
+    full = np.all(lengths == block.shape[1]) if block.shape[0] > 0 else True
+    if KIND == 'RADIAL' and block.shape[0] > 0:
+        full = full and np.all(widths == block.shape[2])
+
+    if full:
+        return block
+
+    padded = np.full(block.shape, np.nan)
+
+    for row in range(block.shape[0]):
+        if KIND == 'RADIAL':
+            padded[row, :lengths[row], :widths[row]] = block[row, :lengths[row], :widths[row]]
+        else:
+            padded[row, :lengths[row]] = block[row, :lengths[row]]
+
+    padded.setflags(write=False)
+
+    return padded
+
+def make_array_table_from_columns(TABLE, rows, loaded):
+    """Make array table from header entry and stored parts of each column."""
+
+    import pandas as pd
+
+    CODERS = scripts.storage.storage.define_column_coders()
+
+    arrayTable = {
+        "TABLE": TABLE,
+        "COLUMNS": [],
+        "META": {},
+        "BLOCKS": {},
+        "LENGTHS": {},
+        "WIDTHS": {},
+        "DTYPES": {},
+        "LISTS": {}
+    }
+
+    # Decoding lists of ragged and nested columns would otherwise trigger repeated garbage collection passes
+    enabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        for entry, parts in loaded:
+            column, KIND = entry["NAME"], entry["KIND"]
+
+            if KIND == 'META':
+                arrayTable["META"][column] = entry["VALUES"]
+            elif KIND in ['SERIES', 'RADIAL']:
+                arrayTable["BLOCKS"][column] = make_array_block(parts, KIND)
+                arrayTable["LENGTHS"][column] = parts["LENGTHS"]
+                arrayTable["DTYPES"][column] = entry["DTYPE"]
+                if KIND == 'RADIAL':
+                    arrayTable["WIDTHS"][column] = parts["WIDTHS"]
+            elif KIND in CODERS:
+                arrayTable["LISTS"][column] = CODERS[KIND][1](parts, rows)
+            else:
+                print('\t\tSkipping column ' + column + ' of unknown kind ' + KIND)
+                continue
+
+            arrayTable["COLUMNS"].append(column)
+    finally:
+        if enabled:
+            gc.enable()
+
+    arrayTable["META"] = pd.DataFrame(arrayTable["META"], columns=list(arrayTable["META"]), index=range(rows))
+
+    return arrayTable
+
+def make_array_table(simsDF, TABLE):
+    """Make array table of given type from dataframe of lists."""
+
+    entries, arrays = scripts.storage.storage.make_table_parts(simsDF, TABLE)
+
+    loaded = [(entry, {part: arrays[index] for part, index in entry.get("PARTS", {}).items()}) for entry in entries]
+
+    return make_array_table_from_columns(TABLE, len(simsDF), loaded)
+
+def load_array_table(file, columns=None, exclude=[]):
+    """Load stored table (or .pkl dataframe) into array table, with only given columns (if any) and without excluded columns."""
+
+    if file.endswith('.pkl'):
+        simsDF = scripts.storage.storage.load_table(file, columns, exclude)
+        return make_array_table(simsDF, scripts.storage.storage_schemas.get_table_type(file))
+
+    header, loaded = scripts.storage.storage.load_table_columns(file, columns, exclude)
+
+    return make_array_table_from_columns(header["TABLE"], header["ROWS"], loaded)
+
+def get_block(arrayTable, column):
+    """Get dense block of SERIES or RADIAL column."""
+
+    if column not in arrayTable["BLOCKS"]:
+        raise KeyError(column + ' is not a SERIES or RADIAL column of array table')
+
+    return arrayTable["BLOCKS"][column]
+
+def get_values_at(arrayTable, column, index):
+    """Get value of SERIES column at given time index for each simulation, with -1 for last time point of each simulation."""
+
+    block = get_block(arrayTable, column)
+
+    if index == -1:
+        return block[np.arange(block.shape[0]), arrayTable["LENGTHS"][column] - 1]
+
+    return block[:, index]
+
+def select_rows(arrayTable, rows):
+    """Select simulations of array table by boolean mask or positions."""
+
+    rows = np.flatnonzero(rows) if np.asarray(rows).dtype == bool else np.asarray(rows, dtype=int)
+
+    selected = dict(arrayTable)
+    selected["META"] = arrayTable["META"].iloc[rows].reset_index(drop=True)
+
+    for key in ["BLOCKS", "LENGTHS", "WIDTHS"]:
+        selected[key] = {column: values[rows] for column, values in arrayTable[key].items()}
+
+    selected["LISTS"] = {column: [values[row] for row in rows] for column, values in arrayTable["LISTS"].items()}
+
+    return selected
+
+def make_frame(arrayTable):
+    """Make dataframe of lists from array table, for functions that take dataframes."""
+
+    import pandas as pd
+
+    CODERS = scripts.storage.storage.define_column_coders()
+
+    rows = len(arrayTable["META"])
+    table = {}
+
+    enabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        for column in arrayTable["COLUMNS"]:
+            if column in arrayTable["META"].columns:
+                table[column] = arrayTable["META"][column].tolist()
+            elif column in arrayTable["BLOCKS"]:
+                block = arrayTable["BLOCKS"][column]
+                DTYPE = arrayTable["DTYPES"][column]
+                parts = {
+                    "VALUES": block if block.dtype == DTYPE else np.nan_to_num(block).astype(DTYPE),
+                    "LENGTHS": arrayTable["LENGTHS"][column]
+                }
+                if column in arrayTable["WIDTHS"]:
+                    parts["WIDTHS"] = arrayTable["WIDTHS"][column]
+                    table[column] = CODERS['RADIAL'][1](parts, rows)
+                else:
+                    table[column] = CODERS['SERIES'][1](parts, rows)
+            else:
+                table[column] = arrayTable["LISTS"][column]
+    finally:
+        if enabled:
+            gc.enable()
+
+    return pd.DataFrame(table, columns=list(table), index=range(rows))
+
+def make_long_frame(arrayTable, columns=None):
+    """Make long dataframe of one row per simulation and time point with META columns, TIME, and SERIES columns.
+
+    Columns default to all SERIES columns with one value per time point.
+    """
+
+    times = get_block(arrayTable, 'TIME')
+    rows, width = times.shape
+
+    if columns is None:
+        columns = [column for column, block in arrayTable["BLOCKS"].items()
+                   if column != 'TIME' and block.ndim == 2 and block.shape[1] == width]
+
+    for column in columns:
+        block = get_block(arrayTable, column)
+        if block.ndim != 2 or block.shape[1] != width:
+            raise ValueError(column + ' does not have one value per time point')
+
+    # Time points after the last time point of shorter simulations are dropped
+    valid = np.arange(width)[None, :] < arrayTable["LENGTHS"]['TIME'][:, None]
+    simulations = np.repeat(np.arange(rows), width).reshape(rows, width)[valid]
+
+    longDF = arrayTable["META"].iloc[simulations].reset_index(drop=True)
+    longDF.insert(0, 'SIMULATION', simulations)
+    longDF['TIME'] = times[valid]
+
+    for column in columns:
+        longDF[column] = get_block(arrayTable, column)[valid]
+
+    return longDF
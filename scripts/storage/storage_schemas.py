@@ -0,0 +1,136 @@
+import scripts.analyze.analyze_cells
+import scripts.analyze.analyze_env
+import scripts.analyze.analyze_spatial
+import scripts.analyze.analyze_lysis
+import os
+
+'''
+Declared schemas of stored tables.
+
+Each column of a table is declared with a kind, describing how its values are laid out, and the
+numeric type its values are stored as:
+
+    META        one value (number or string) per simulation, such as DOSE or SEED
+    SERIES      list of values per simulation, one per time point (or radius), stored as a fixed-width
+                (simulations x times) array
+    RADIAL      list per time point of values per radius, stored as a fixed-width
+                (simulations x times x radii) array
+    RAGGED      list of values per simulation of any length, such as exact lysis times, stored as
+                one flat array
+    NESTED      list per time point of values per cell, such as cell volumes, stored as one flat array
+
+Columns of each table are those of the dataframes made by the analyze stage, subsets of a table (such
+as STATES subsets) may contain any of them.
+'''
+
+def define_meta_columns():
+    """Define columns of simulation setup information shared by all tables."""
+
+    META_COLUMNS = ['TUMOR ID', 'SEED', 'PLATE', 'NUTRIENTS', 'DOSE', 'TREAT RATIO', 'CAR AFFINITY',
+                    'ANTIGENS CANCER', 'ANTIGENS HEALTHY']
+
+    return META_COLUMNS
+
+def define_cells_schema():
+    """Define schema of cell (ANALYZED and SHAREDLOCS) tables."""
+
+    schema = {column: ('META', None) for column in define_meta_columns()}
+
+    for column in scripts.analyze.analyze_cells.make_cells_df().columns:
+        if column in schema:
+            continue
+        elif column == 'TIME' or column.endswith('%'):
+            schema[column] = ('SERIES', 'float64')
+        elif column.startswith('AVG CELL CYCLES') or column.startswith('CELL VOLUMES'):
+            schema[column] = ('NESTED', 'int16')
+        else:
+            schema[column] = ('SERIES', 'int32')
+
+    return schema
+
+def define_env_schema():
+    """Define schema of environment (ENVIRONMENT) tables."""
+
+    schema = {column: ('META', None) for column in define_meta_columns()}
+
+    for column in scripts.analyze.analyze_env.make_env_df().columns:
+        if column in schema:
+            continue
+        elif column == 'RADIUS':
+            schema[column] = ('SERIES', 'int64')
+        elif column == 'IL-2':
+            schema[column] = ('RADIAL', 'float32')
+        elif column in ['GLUCOSE', 'OXYGEN', 'TGFA']:
+            schema[column] = ('RADIAL', 'float16')
+        else:
+            schema[column] = ('SERIES', 'float64')
+
+    return schema
+
+def define_spatial_schema():
+    """Define schema of spatial (SPATIAL) tables."""
+
+    schema = {column: ('META', None) for column in define_meta_columns()}
+
+    for column in scripts.analyze.analyze_spatial.make_spatial_df().columns:
+        if column in schema:
+            continue
+        elif column == 'TIME':
+            schema[column] = ('SERIES', 'float64')
+        elif column == 'RADIUS':
+            schema[column] = ('SERIES', 'int64')
+        elif column.endswith('NORMALIZED'):
+            schema[column] = ('RADIAL', 'float64')
+        else:
+            schema[column] = ('RADIAL', 'int32')
+
+    return schema
+
+def define_lysis_schema():
+    """Define schema of lysis (LYSED) tables."""
+
+    schema = {column: ('META', None) for column in define_meta_columns()}
+
+    for column in scripts.analyze.analyze_lysis.make_lysis_df().columns:
+        if column in schema:
+            continue
+        elif column.endswith('SEEDED'):
+            schema[column] = ('META', None)
+        elif column == 'TIME':
+            schema[column] = ('SERIES', 'float64')
+        elif column == 'RADIUS LYSED EXACT':
+            # Radius is NaN for coordinates get_radius does not support (such as rect geometry)
+            schema[column] = ('RAGGED', 'float64')
+        elif column.endswith('EXACT'):
+            schema[column] = ('RAGGED', 'int64')
+        else:
+            schema[column] = ('SERIES', 'int32')
+
+    return schema
+
+def get_table_schema(TABLE):
+    """Get schema of given table type."""
+
+    SCHEMAS = {
+        'ANALYZED': define_cells_schema,
+        'SHAREDLOCS': define_cells_schema,
+        'ENVIRONMENT': define_env_schema,
+        'SPATIAL': define_spatial_schema,
+        'LYSED': define_lysis_schema
+    }
+
+    if TABLE not in SCHEMAS:
+        raise ValueError('No schema declared for ' + str(TABLE) + ' tables, must be one of ' + ', '.join(SCHEMAS))
+
+    return SCHEMAS[TABLE]()
+
+def get_table_type(fileName):
+    """Get table type from analyzed or subset file name."""
+
+    name = os.path.splitext(os.path.basename(fileName))[0]
+
+    for TABLE in ['SHAREDLOCS', 'ENVIRONMENT', 'SPATIAL', 'LYSED', 'ANALYZED']:
+        if name.endswith('_' + TABLE):
+            return TABLE
+
+    raise ValueError('Cannot determine table type of ' + fileName)
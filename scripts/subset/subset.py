@@ -1,21 +1,23 @@
 import scripts.analyze.analyze_utilities
 import scripts.subset.subset_utilities
-import os
-import pickle
+import scripts.profile.profile_stages
+import scripts.memory.memory
+import scripts.storage.storage
+import scripts.storage.storage_schemas
 
 __author__ = "Alexis N. Prybutok"
 __email__ = "aprybutok@u.northwestern.edu"
 
 '''
-ABM_SUBSET takes a directory of (or a single) .pkl analyzed files
+ABM_SUBSET takes a directory of (or a single) .tbl (or .pkl) analyzed files
 and extracts the specified subset of the data into a dataframe in the form of the
 corresponding data file type (analyze, lysis, environment, spatial).
 
 Usage:
-    python subset.py FILES XMLNAME TYPE SAVELOC SUBSET STATES
+    python -m scripts subset FILES XMLNAME TYPE SAVELOC [--subsets SUBSET] [--states]
 
     FILES
-        Path to .pkl or directory
+        Path to .tbl (or .pkl) or directory
     XMLNAME
         Name of XML file used to generate dataset for purpose of saving
     TYPE
@@ -61,7 +63,7 @@ def parse_requested_subsets(subsetsRequested):
 
     return SUBSETS
 
-def check_if_file_in_subset(file, files, optionsDict):
+def check_if_file_in_subset(file, files, optionsDict, noprint=False):
     """Determine if a file should be included in a subset based on file feature values."""
 
     file_in_subset = False
@@ -80,10 +82,20 @@ def check_if_file_in_subset(file, files, optionsDict):
                 if fileSplit[7] == optionsDict['ANTIGENS CANCER'] or optionsDict['ANTIGENS CANCER'] == 'X':
                     if fileSplit[8] == optionsDict['ANTIGENS HEALTHY'] or optionsDict['ANTIGENS HEALTHY'] == 'X' or fileSplit[8] == 'NA':
                         file_in_subset = True
-                        print('\t' + filename)
+                        print('\t' + filename) if not noprint else []
 
     return file_in_subset
 
+def get_subset_files(subsetRequested, files, PKLFILES):
+    """Get files that would be added to given subset, including untreated control, without loading them."""
+
+    optionsDict = scripts.subset.subset_utilities.make_options_dict()
+
+    for s in subsetRequested:
+        optionsDict[s[0]] = str(s[1]).replace(':', '-')
+
+    return [file for file in PKLFILES if '0_NA_NA' in file or check_if_file_in_subset(file, files, optionsDict, noprint=True)]
+
 def drop_list_columns(simsDF, untreatedDF):
     """Drop columns in dataframe where values are lists (ex: volume, cell cycle legth)."""
 
@@ -94,13 +106,17 @@ def drop_list_columns(simsDF, untreatedDF):
 
     return simsDF, untreatedDF
 
-def retrieve_file_data(file, states):
-    """Load file information from given pkl based on if only states (and not list columns) selected."""
+def retrieve_file_data(file, states, columns=None):
+    """Load file information from given table based on if only states (and not list columns) or given columns selected."""
 
-    with open(file, 'rb') as f:
-        simDF = pickle.load(f)
-    if states:
+    if columns is not None:
+        simDF = scripts.storage.storage.load_table(file, columns=columns)
+    elif states:
+        LIST_COLUMNS = scripts.subset.subset_utilities.make_list_columns_list()
+        simDF = scripts.storage.storage.load_table(file, exclude=LIST_COLUMNS)
         simDF = simDF.loc[:, 'TUMOR ID':'PAUSE CD8 %']
+    else:
+        simDF = scripts.storage.storage.load_table(file)
 
     return simDF
 
@@ -118,67 +134,106 @@ def update_options_dict_antigens_healthy_if_no_healthy_cells(optionsDict, untrea
     return optionsDict
 
 def save_data_subsetted(simsDF, saveLoc, xmlName, name, TYPE, states, subsetsRequested):
-    """Save data subsetted into single pkl."""
+    """Save data subsetted into single table."""
 
-    # Save file
+    # Save file, tables are written to a temporary file first so failed saves leave no partial file
     try:
         if states:
-            with open(saveLoc + xmlName + '_' + name + 'STATES_' + TYPE + '.pkl', 'wb') as f:
-                pickle.dump(simsDF, f)
+            scripts.storage.storage.save_table(simsDF, saveLoc + xmlName + '_' + name + 'STATES_' + TYPE + '.tbl', TYPE)
         else:
-            with open(saveLoc + xmlName + '_' + name + TYPE + '.pkl', 'wb') as f:
-                pickle.dump(simsDF, f)
+            scripts.storage.storage.save_table(simsDF, saveLoc + xmlName + '_' + name + TYPE + '.tbl', TYPE)
 
         scripts.subset.subset_utilities.print_save_message(subsetsRequested)
 
     except MemoryError:
-        # Remove empty pickle file
-        os.remove(saveLoc + xmlName + '_' + name + TYPE + '.pkl')
-        print('MemoryError when attempting to save full pkl.')
+        print('MemoryError when attempting to save full table.')
         if TYPE == 'ANALYZED' and not states:
             print('Saving all non-list columns.')
-            with open(saveLoc + xmlName + '_' + name + 'STATES_ANALYZED.pkl', 'wb') as f:
-                simsDFstates = simsDF.loc[:, 'TUMOR ID':'PAUSE CD8 %']
-                pickle.dump(simsDFstates, f)
-                # pickle.dump(simsDF[:, 0:-10], f)
+            simsDFstates = simsDF.loc[:, 'TUMOR ID':'PAUSE CD8 %']
+            scripts.storage.storage.save_table(simsDFstates, saveLoc + xmlName + '_' + name + 'STATES_ANALYZED.tbl', TYPE)
             print('Saving all list columns in separate files.')
-            simsDFcycle = simsDF[["TUMOR ID", "SEED", "PLATE", "NUTRIENTS", "DOSE", "TREAT RATIO", "CAR AFFINITY",
-                                  "ANTIGENS CANCER", "ANTIGENS HEALTHY", "TIME", "AVG CELL CYCLES CANCER",
-                                  "AVG CELL CYCLES HEALTHY",
-                                  "AVG CELL CYCLES T-CELL", "AVG CELL CYCLES CD4", "AVG CELL CYCLES CD8"]]
-            simsDFvol = simsDF[["TUMOR ID", "SEED", "PLATE", "NUTRIENTS", "DOSE", "TREAT RATIO", "CAR AFFINITY",
-                                "ANTIGENS CANCER", "ANTIGENS HEALTHY", "TIME", "CELL VOLUMES CANCER",
-                                "CELL VOLUMES HEALTHY",
-                                "CELL VOLUMES T-CELL", "CELL VOLUMES CD4", "CELL VOLUMES CD8"]]
-            with open(saveLoc + xmlName + '_' + name + 'CYCLES_ANALYZED.pkl', 'wb') as f:
-                pickle.dump(simsDFcycle, f)
-            with open(saveLoc + xmlName + '_' + name + 'VOLUMES_ANALYZED.pkl', 'wb') as f:
-                pickle.dump(simsDFvol, f)
+            PARTS = make_subset_parts(TYPE)
+            simsDFcycle = simsDF[PARTS['CYCLES_']]
+            simsDFvol = simsDF[PARTS['VOLUMES_']]
+            scripts.storage.storage.save_table(simsDFcycle, saveLoc + xmlName + '_' + name + 'CYCLES_ANALYZED.tbl', TYPE)
+            scripts.storage.storage.save_table(simsDFvol, saveLoc + xmlName + '_' + name + 'VOLUMES_ANALYZED.tbl', TYPE)
 
             scripts.subset.subset_utilities.print_save_message(subsetsRequested)
 
     return
 
 def save_large_data_subsetted(simsDF, saveLoc, xmlName, name, TYPE, subsetsRequested):
-    """Save large subsets into single pkl without list information."""
+    """Save large subsets into single table without list information."""
+
+    LIST_COLUMNS = scripts.subset.subset_utilities.make_list_columns_list()
 
     print('Large number of files.')
     if TYPE == 'ANALYZED':
         print('Saving all non-list columns.')
-        with open(saveLoc + xmlName + '_' + name + 'STATES_ANALYZED.pkl', 'wb') as f:
-            pickle.dump(simsDF.iloc[:, 0:-10], f)
-            scripts.subset.subset_utilities.print_save_message(subsetsRequested)
+        simsDFstates = simsDF[[column for column in simsDF.columns if column not in LIST_COLUMNS]]
+        scripts.storage.storage.save_table(simsDFstates, saveLoc + xmlName + '_' + name + 'STATES_ANALYZED.tbl', TYPE)
+        scripts.subset.subset_utilities.print_save_message(subsetsRequested)
 
     return
 
-def find_and_save_all_data(PKLFILES, files, simsDF, untreatedDF, states):
-    """Find all data per file in list of files and add to datarame."""
+def save_data_subsetted_part(simsDF, saveLoc, xmlName, name, PART, TYPE, subsetsRequested):
+    """Save part of data subsetted (such as STATES_) into its own table."""
+
+    scripts.storage.storage.save_table(simsDF, saveLoc + xmlName + '_' + name + PART + TYPE + '.tbl', TYPE)
+    scripts.subset.subset_utilities.print_save_message(subsetsRequested)
+
+    return
+
+def make_subset_parts(TYPE):
+    """Make columns of each part of cell subsets saved as separate tables, non-list columns and each group of list columns."""
+
+    simsDF, untreatedDF, TYPE = scripts.subset.subset_utilities.make_datatype_specific_df(TYPE)
+    LIST_COLUMNS = scripts.subset.subset_utilities.make_list_columns_list()
+    GROUPS = scripts.subset.subset_utilities.make_list_column_groups()
+    META = scripts.storage.storage_schemas.define_meta_columns() + ['TIME']
+
+    PARTS = {
+        'STATES_': [column for column in simsDF.columns if column not in LIST_COLUMNS],
+        'CYCLES_': META + GROUPS["CYCLES"],
+        'VOLUMES_': META + GROUPS["VOLUMES"]
+    }
+
+    return PARTS
+
+def get_subset_parts(selected, TYPE, states):
+    """Get parts of subset to collect and save one at a time, splitting cell subsets into separate tables of non-list
+    and list columns if all columns of selected files would not fit in memory budget."""
+
+    LIST_COLUMNS = scripts.subset.subset_utilities.make_list_columns_list()
+
+    if scripts.memory.memory.get_memory_budget() is None:
+        return [('', None)]
+
+    needed = scripts.memory.memory.estimate_files_memory(selected, exclude=LIST_COLUMNS if states else [])
+
+    if scripts.memory.memory.check_memory(needed):
+        return [('', None)]
+
+    available = scripts.memory.memory.format_memory(max(0, scripts.memory.memory.get_available_memory()))
+
+    if states or TYPE not in ['ANALYZED', 'SHAREDLOCS']:
+        print('\t\tSubset needs about ' + scripts.memory.memory.format_memory(needed) + ' but only ' + available
+              + ' of memory budget is available, and cannot be split.')
+        return [('', None)]
+
+    print('\t\tSubset needs about ' + scripts.memory.memory.format_memory(needed) + ' but only ' + available
+          + ' of memory budget is available, saving non-list (STATES) and list (CYCLES and VOLUMES) columns separately.')
+
+    return list(make_subset_parts(TYPE).items())
+
+def find_and_save_all_data(PKLFILES, files, simsDF, untreatedDF, states, columns=None):
+    """Find all data (or given columns) per file in list of files and add to datarame."""
 
     untreatedName = ''
 
     # Grab all files
     for file in PKLFILES:
-        simDF = retrieve_file_data(file, states)
+        simDF = retrieve_file_data(file, states, columns)
         if '0_NA_NA' in file:
             untreatedDF = untreatedDF.append(simDF, ignore_index=True)
             untreatedName = file.replace(files, '')
@@ -187,36 +242,51 @@ def find_and_save_all_data(PKLFILES, files, simsDF, untreatedDF, states):
 
     return simsDF, untreatedDF, untreatedName
 
+@scripts.profile.profile_stages.profile_stage(items='PKLFILES')
 def collect_and_save_all_data(files, PKLFILES, xmlName, TYPE, saveLoc, states, subsetsRequested):
     """Collect all data in all files if no subsets selected."""
 
-    simsDF, untreatedDF, TYPE = scripts.subset.subset_utilities.make_datatype_specific_df(TYPE)
+    TYPE = scripts.subset.subset_utilities.make_datatype_specific_df(TYPE)[2]
 
-    if (TYPE == 'ANALYZED' or TYPE == 'SHAREDLOCS') and states:
-        simsDF, untreatedDF = drop_list_columns(simsDF, untreatedDF)
+    # Collect and save parts of data one at a time if all data would not fit in memory
+    for PART, columns in get_subset_parts(PKLFILES, TYPE, states):
 
-    # Grab all files
-    simsDF, untreatedDF, untreatedName = find_and_save_all_data(PKLFILES, files, simsDF, untreatedDF, states)
+        simsDF, untreatedDF, TYPE = scripts.subset.subset_utilities.make_datatype_specific_df(TYPE)
 
-    # Set up options dictionary for naming save file
-    optionsDict = scripts.subset.subset_utilities.make_options_dict()
+        if (TYPE == 'ANALYZED' or TYPE == 'SHAREDLOCS') and states:
+            simsDF, untreatedDF = drop_list_columns(simsDF, untreatedDF)
 
-    # Fill out optionsDict with NA if true in untreated file
-    optionsDict = update_options_dict_antigens_healthy_if_no_healthy_cells(optionsDict, untreatedName, TYPE)
+        if columns is not None:
+            print('Collecting ' + PART[:-1] + ' columns...')
+            simsDF, untreatedDF = simsDF[columns], untreatedDF[columns]
+
+        # Grab all files
+        simsDF, untreatedDF, untreatedName = find_and_save_all_data(PKLFILES, files, simsDF, untreatedDF, states, columns)
+
+        # Set up options dictionary for naming save file
+        optionsDict = scripts.subset.subset_utilities.make_options_dict()
+
+        # Fill out optionsDict with NA if true in untreated file
+        optionsDict = update_options_dict_antigens_healthy_if_no_healthy_cells(optionsDict, untreatedName, TYPE)
+
+        # Add untreated control to set
+        simsDF = simsDF.append(untreatedDF, ignore_index=True)
 
-    # Add untreated control to set
-    simsDF = simsDF.append(untreatedDF, ignore_index=True)
+        # Construct save file name
+        name = scripts.subset.subset_utilities.construct_file_save_name(optionsDict)
 
-    # Construct save file name
-    name = scripts.subset.subset_utilities.construct_file_save_name(optionsDict)
+        # Save file
+        if columns is not None:
+            save_data_subsetted_part(simsDF, saveLoc, xmlName, name, PART, TYPE, subsetsRequested)
+        else:
+            save_data_subsetted(simsDF, saveLoc, xmlName, name, TYPE, states, subsetsRequested)
 
-    # Save file
-    save_data_subsetted(simsDF, saveLoc, xmlName, name, TYPE, states, subsetsRequested)
+        del simsDF, untreatedDF
 
     return
 
-def find_and_save_files_within_specified_subset(PKLFILES, files, optionsDict, simsDF, untreatedDF, states):
-    """Add files that belong in subset to dataframes."""
+def find_and_save_files_within_specified_subset(PKLFILES, files, optionsDict, simsDF, untreatedDF, states, columns=None):
+    """Add files (or given columns of files) that belong in subset to dataframes."""
 
     print('Adding the following files to set:')
 
@@ -226,7 +296,7 @@ def find_and_save_files_within_specified_subset(PKLFILES, files, optionsDict, si
     for file in PKLFILES:
         if '0_NA_NA' in file:
             print('\t' + file.replace(files, ''))
-            simDF = retrieve_file_data(file, states)
+            simDF = retrieve_file_data(file, states, columns)
             fileCount += 1
             untreatedDF = untreatedDF.append(simDF, ignore_index=True)
             untreatedName = file.replace(files, '')
@@ -235,45 +305,63 @@ def find_and_save_files_within_specified_subset(PKLFILES, files, optionsDict, si
 
             if file_in_subset:
                 # Open file and save to set
-                simDF = retrieve_file_data(file, states)
+                simDF = retrieve_file_data(file, states, columns)
                 fileCount += 1
                 simsDF = simsDF.append(simDF, ignore_index=True)
 
     return simsDF, untreatedDF, untreatedName, fileCount
 
+@scripts.profile.profile_stages.profile_stage(items='PKLFILES')
 def collect_and_save_each_subset(subsetRequested, files, PKLFILES, xmlName, TYPE, saveLoc, states):
     """Collect all data in all files in given selected subset."""
 
-    simsDF, untreatedDF, TYPE = scripts.subset.subset_utilities.make_datatype_specific_df(TYPE)
+    TYPE = scripts.subset.subset_utilities.make_datatype_specific_df(TYPE)[2]
 
-    if (TYPE == 'ANALYZED' or TYPE == 'SHAREDLOCS') and states:
-        simsDF, untreatedDF = drop_list_columns(simsDF, untreatedDF)
+    # Large cell subsets are saved without list columns, so they are not loaded
+    selected = get_subset_files(subsetRequested, files, PKLFILES)
+    large = TYPE == 'ANALYZED' and len(selected) > 6
 
-    # Set up options dictionary for sorting files and naming save file
-    optionsDict = scripts.subset.subset_utilities.make_options_dict()
+    # Collect and save parts of subset one at a time if whole subset would not fit in memory
+    for PART, columns in get_subset_parts(selected, TYPE, states or large):
 
-    # Fill out options dictionary with set specifications
-    for s in subsetRequested:
-        optionsDict[s[0]] = str(s[1]).replace(':', '-')
+        simsDF, untreatedDF, TYPE = scripts.subset.subset_utilities.make_datatype_specific_df(TYPE)
 
-    # Find only files with specificed set information
-    simsDF, untreatedDF, untreatedName, fileCount = find_and_save_files_within_specified_subset(PKLFILES, files, optionsDict, simsDF, untreatedDF, states)
+        if (TYPE == 'ANALYZED' or TYPE == 'SHAREDLOCS') and (states or large):
+            simsDF, untreatedDF = drop_list_columns(simsDF, untreatedDF)
 
-    # Fill out optionsDict with NA if true in untreated file
-    optionsDict = update_options_dict_antigens_healthy_if_no_healthy_cells(optionsDict, untreatedName, TYPE)
+        if columns is not None:
+            print('Collecting ' + PART[:-1] + ' columns...')
+            simsDF, untreatedDF = simsDF[columns], untreatedDF[columns]
 
-    # Add untreated control to set
-    simsDF = simsDF.append(untreatedDF, ignore_index=True)
+        # Set up options dictionary for sorting files and naming save file
+        optionsDict = scripts.subset.subset_utilities.make_options_dict()
 
-    # Construct save file name
-    name = scripts.subset.subset_utilities.construct_file_save_name(optionsDict)
+        # Fill out options dictionary with set specifications
+        for s in subsetRequested:
+            optionsDict[s[0]] = str(s[1]).replace(':', '-')
 
-    # Save set
-    print('Saving set...')
-    if (fileCount <= 6 and TYPE == 'ANALYZED') or (TYPE != 'ANALYZED'):
-        save_data_subsetted(simsDF, saveLoc, xmlName, name, TYPE, states, subsetRequested)
-    else:
-        save_large_data_subsetted(simsDF, saveLoc, xmlName, name, TYPE, subsetRequested)
+        # Find only files with specificed set information
+        simsDF, untreatedDF, untreatedName, fileCount = find_and_save_files_within_specified_subset(PKLFILES, files, optionsDict, simsDF, untreatedDF, states or large, columns)
+
+        # Fill out optionsDict with NA if true in untreated file
+        optionsDict = update_options_dict_antigens_healthy_if_no_healthy_cells(optionsDict, untreatedName, TYPE)
+
+        # Add untreated control to set
+        simsDF = simsDF.append(untreatedDF, ignore_index=True)
+
+        # Construct save file name
+        name = scripts.subset.subset_utilities.construct_file_save_name(optionsDict)
+
+        # Save set
+        print('Saving set...')
+        if columns is not None:
+            save_data_subsetted_part(simsDF, saveLoc, xmlName, name, PART, TYPE, subsetRequested)
+        elif (fileCount <= 6 and TYPE == 'ANALYZED') or (TYPE != 'ANALYZED'):
+            save_data_subsetted(simsDF, saveLoc, xmlName, name, TYPE, states, subsetRequested)
+        else:
+            save_large_data_subsetted(simsDF, saveLoc, xmlName, name, TYPE, subsetRequested)
+
+        del simsDF, untreatedDF
 
     return
 
@@ -284,14 +372,14 @@ def subset_data(files, xmlName, dataType, saveLoc, subsetsRequested='', states=F
     SUBSETS = parse_requested_subsets(subsetsRequested)
 
     # Get files
-    PKLFILES = scripts.analyze.analyze_utilities.get_pkl_files(files)
+    PKLFILES = scripts.analyze.analyze_utilities.get_table_files(files)
 
     # Set type
     TYPE = dataType.upper()
     print(TYPE + ' SUBSET REQUESTED')
 
     # If no subsets specified, put all data in one file
-    # Warning: Highly likely you will run into memory error
+    # Warning: Highly likely you will run into memory error without a memory budget to split the data by
     if subsetsRequested == '':
 
         collect_and_save_all_data(files, PKLFILES, xmlName, TYPE, saveLoc, states, subsetsRequested)
@@ -38,6 +38,18 @@ def make_list_columns_list():
 
     return LIST_COLUMNS
 
+def make_list_column_groups():
+    """Make groups of list columns saved as separate tables when a subset does not fit in memory."""
+
+    GROUPS = {
+        "CYCLES": ["AVG CELL CYCLES CANCER", "AVG CELL CYCLES HEALTHY", "AVG CELL CYCLES T-CELL",
+                   "AVG CELL CYCLES CD4", "AVG CELL CYCLES CD8"],
+        "VOLUMES": ["CELL VOLUMES CANCER", "CELL VOLUMES HEALTHY", "CELL VOLUMES T-CELL", "CELL VOLUMES CD4",
+                    "CELL VOLUMES CD8"]
+    }
+
+    return GROUPS
+
 def make_options_dict():
     """Inititlaize empty options dictionary to help name file based on subset requested where X indicates all values of that feature present in subset."""
 